@@ -1,11 +1,21 @@
-import datetime, traceback
-from flask import Flask, Response, request, jsonify
+import datetime, traceback, time
+from flask import Flask, Response, request, jsonify, g
+from flask.json import JSONEncoder
 from flask_cors import CORS
 
 import firebase_admin
 import player_analyzer
+import nba_cache
+import rate_limiter
+import standings_snapshot
+import team_usage
+import player_aggregates
+import singleflight
+import game_record
+import fanout
+import timing
 from prediction_analyzer import calculate_poisson_probability
-from monte_carlo import monte_carlo_for_player
+from monte_carlo import points_distribution, probability, probabilities
 from chatgpt_bet_explainer import get_bet_explanation_from_chatgpt
 from volatility import fetch_point_series, forecast_volatility, forecast_playoff_volatility
 import injury_report
@@ -13,6 +23,7 @@ import injury_report
 from screenshot_parser import parse_image_data_url
 import base64
 import requests
+import pytz
 
 import os
 import json
@@ -26,8 +37,18 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+class _JSONEncoder(JSONEncoder):
+    """Serialize compact GameRecords (see game_record) in their dict shape."""
+
+    def default(self, o):
+        if isinstance(o, game_record.Record):
+            return o.to_dict()
+        return super().default(o)
+
+
 # Initialize Flask app and CORS
 app = Flask(__name__)
+app.json_encoder = _JSONEncoder
 CORS(app, resources={r"/api/*": {
     "origins": [
         "http://localhost:5173",
@@ -45,6 +66,37 @@ if not firebase_admin._apps:
     firebase_admin.initialize_app()
 db = firestore.client()
 
+# Restore game logs / career stats / standings persisted by earlier containers
+nba_cache.load_persistent_cache()
+
+# Per-stage latency breakdown of the analysis endpoints (see timing)
+_TIMED_PATHS = ("/api/player", "/api/players")
+
+
+@app.before_request
+def _start_timing():
+    if request.path in _TIMED_PATHS:
+        g.timing = timing.start(f"{request.method} {request.path}")
+
+
+@app.after_request
+def _finish_timing(response):
+    started = g.pop("timing", None)
+    if started is not None:
+        collector = timing.finish(started, response.status_code)
+        if timing.SERVER_TIMING:
+            response.headers["Server-Timing"] = collector.server_timing()
+    return response
+
+
+@app.teardown_request
+def _drop_timing(_error):
+    # the request failed before after_request ran: still log what was timed
+    started = g.pop("timing", None)
+    if started is not None:
+        timing.finish(started, 500)
+
+
 def pkey(name: str) -> str:
     return name.lower().replace(" ", "_")
 
@@ -71,11 +123,27 @@ def _strip_sentinels(obj):
         return [_strip_sentinels(v) for v in obj]
     return obj
 
-def _fetch_scoreboard() -> dict:
-    """Pull raw JSON for a single YYYYMMDD date."""
-    resp = requests.get("https://site.api.espn.com/apis/site/v2/sports/basketball/nba/scoreboard")
+# ESPN's scoreboard (odds for every game today) changes slowly; every pick
+# analysed within a minute shares one download
+SCOREBOARD_TTL = 60
+_scoreboard = {"data": None, "fetchedAt": 0.0}
+_scoreboard_flights = singleflight.Group("espn_scoreboard")
+
+
+def _download_scoreboard() -> dict:
+    resp = rate_limiter.get("https://site.api.espn.com/apis/site/v2/sports/basketball/nba/scoreboard")
     resp.raise_for_status()
-    return resp.json()
+    _scoreboard["data"], _scoreboard["fetchedAt"] = resp.json(), time.time()
+    return _scoreboard["data"]
+
+
+@timing.timed("espn.scoreboard")
+def _fetch_scoreboard() -> dict:
+    """Today's ESPN scoreboard JSON (at most one download per SCOREBOARD_TTL seconds)."""
+    if _scoreboard["data"] is not None and time.time() - _scoreboard["fetchedAt"] < SCOREBOARD_TTL:
+        return _scoreboard["data"]
+    data, _ = _scoreboard_flights.do("scoreboard", _download_scoreboard)
+    return data
 
 
 ######### BEGINNING OF MAIN ROUTES #########
@@ -122,8 +190,11 @@ def fetch_game_status(data):
         logger.error(f"Error fetching game status: {e}")
         return False
 
-def fetch_player_stats(game_id, player_id):
-    """Return (points, minutes) or (None, None)."""
+def fetch_player_stats(game_id, player_id, home_game=None):
+    """
+    Return (points, minutes) or (None, None). With `home_game` known, the box
+    score is also folded into the player's running season aggregates.
+    """
     try:
         bb = BoxScoreTraditionalV2(game_id=game_id, timeout=30)
         df = bb.player_stats.get_data_frame()
@@ -152,6 +223,11 @@ def fetch_player_stats(game_id, player_id):
             mins = int(raw_min.split(":")[0].split(".")[0])
         
         logger.info(f"Player {player_id} stats: {pts} points, {mins} minutes")
+        if home_game is not None and pts != -1 and mins != -1:
+            try:
+                player_aggregates.observe_game(int(player_id), game_id, "Home" if home_game else "Away", row)
+            except Exception as e:
+                logger.warning(f"Could not update aggregates for player {player_id}: {e}")
         return pts, mins
         
     except ReadTimeout:
@@ -172,7 +248,7 @@ def update_doc(ref, data):
             logger.error(f"Missing gameId or playerId in data: {data}")
             return False
             
-        pts, mins = fetch_player_stats(game_id, player_id)
+        pts, mins = fetch_player_stats(game_id, player_id, data.get("home_game"))
             
         # Determine bet result
         hit = -1
@@ -287,6 +363,12 @@ def check_active_players():
                 logger.info(f"Game not finished for player {player_id}")
                 
         logger.info(f"Processed {processed_count} active players, moved {moved_count} to concluded")
+
+        # Standings only move once the night's last game is Final
+        if standings_snapshot.refresh_after_final():
+            logger.info("Standings snapshot refreshed after the last game went Final")
+        if team_usage.refresh_after_final():
+            logger.info("Team usage table rebuilt after the last game went Final")
         
     except Exception as e:
         logger.error(f"Error checking active players: {e}")
@@ -516,12 +598,13 @@ def check_games_handler(request):
 
 
 ######### BETTING OF API ENDPOINTS #########
-@app.route("/api/player", methods=["POST"])
-def analyze_player_endpoint():
-    body      = request.json or {}
-    name      = body.get("playerName")
-    threshold = float(body.get("threshold"))
-    key       = name.lower().replace(" ", "_")
+# concurrent /api/player requests for the same (player, threshold, day) share one analysis
+_analysis_flights = singleflight.Group("analysis")
+
+
+@timing.timed("firestore.lookup")
+def _find_active_pick(key, threshold):
+    """The stored active document for (player key, threshold), or None."""
     coll_ref = (
         db.collection("processedPlayers")
           .document("players")
@@ -534,20 +617,103 @@ def analyze_player_endpoint():
             doc_ref = doc.reference
             break
 
-    # 2) If found, return it
     if doc_ref:
         snap = doc_ref.get()
         if snap.exists:
-            return jsonify(snap.to_dict()), 200
+            return snap.to_dict()
+    return None
+
+
+@app.route("/api/player", methods=["POST"])
+def analyze_player_endpoint():
+    body      = request.json or {}
+    name      = body.get("playerName")
+    threshold = float(body.get("threshold"))
+    key       = name.lower().replace(" ", "_")
+
+    # 2) If found, return it
+    existing = _find_active_pick(key, threshold)
+    if existing is not None:
+        return jsonify(existing), 200
+
+    # 3) If not found, continue with analysis – joining an identical one
+    #    already in flight instead of starting another
+    today_et = datetime.datetime.now(pytz.timezone("America/New_York")).strftime("%Y%m%d")
+    flight_key = (key, threshold, today_et)
+    (pdata, status), shared = _analysis_flights.do(flight_key, _analyze_once, name, threshold, flight_key)
+    if shared:
+        logger.info(f"[/api/player] shared analysis for {flight_key}")
+    return jsonify(pdata), status
+
+
+def _analyze_once(name, threshold, flight_key, pick_base=None, line_probability=None):
+    """
+    Leader of a single-flight analysis. Another gunicorn worker may be running
+    the same one: wait for it, then serve the document it stored.
+    """
+    with singleflight.file_lock(flight_key):
+        existing = _find_active_pick(pkey(name), threshold)
+        if existing is not None:
+            return existing, 200
+        return _build_player_document(name, threshold, pick_base, line_probability)
 
 
-    # 3) If not found, continue with analysis
+# Everything in a pick document except the threshold-specific fields (the
+# analysis, injury report, volatility forecasts and ESPN odds) is built once per
+# (player, day) and shared by every line requested on that player. A failed
+# build (e.g. no ESPN odds yet) is stored too, briefly, so the lines asked for
+# meanwhile get the error instead of each rebuilding it
+PICK_BASE = "pick_base"
+PICK_BASE_TTL = int(os.getenv("PICK_BASE_TTL", "3600"))
+PICK_BASE_ERROR_TTL = int(os.getenv("PICK_BASE_ERROR_TTL", "60"))
+_base_flights = singleflight.Group(PICK_BASE)
 
-    # 1) run your pipeline
-    first, last = name.split(maxsplit=1)
-    pdata = player_analyzer.analyze_player(first, last, threshold)
+
+def _pick_base_key(name):
+    return pkey(name), datetime.datetime.now(pytz.timezone("America/New_York")).strftime("%Y%m%d")
+
+
+def _pick_base(name, base=None, injury_reports=None):
+    """
+    The stored base document of `name` for today, built (once across threads
+    and workers) if there is none. A batch passes the analyze_player_base
+    result it already has as `base`, and a shared {team_key: report} dict as
+    `injury_reports`.
+    """
+    base_key = _pick_base_key(name)
+    stored = nba_cache.get_derived(PICK_BASE, base_key)
+    if stored is not None:
+        return stored
+    stored, _ = _base_flights.do(base_key, _build_base_once, name, base_key, base, injury_reports)
+    return stored
+
+
+def _build_base_once(name, base_key, base, injury_reports):
+    with singleflight.file_lock((PICK_BASE,) + base_key):
+        stored = nba_cache.get_derived(PICK_BASE, base_key)
+        if stored is not None:
+            return stored
+        try:
+            base = _build_pick_base(name, base, injury_reports)
+        except Exception as e:
+            traceback.print_exc()
+            base = {"error": str(e), "status": 500}
+        ttl = PICK_BASE_ERROR_TTL if "error" in base else PICK_BASE_TTL
+        nba_cache.set_derived(PICK_BASE, base_key, base, ttl=ttl)
+        return base
+
+
+def _build_pick_base(name, pdata=None, injury_reports=None):
+    """Run the threshold-independent pipeline for one player."""
+    # 1) run your pipeline (upstream nba_api calls are served from nba_cache)
+    if pdata is None:
+        first, last = name.split(maxsplit=1)
+        pdata = player_analyzer.analyze_player_base(first, last)
     if "error" in pdata:
-        return jsonify({"error": pdata["error"]}), 400
+        return pdata
+    # the batch's analysis is shared with its other lines; fill in a copy
+    pdata = dict(pdata)
+    pdata[player_analyzer.SCORING_KEY] = dict(pdata[player_analyzer.SCORING_KEY])
 
 
 
@@ -568,26 +734,24 @@ def analyze_player_endpoint():
             name,
             player_team,
             opponent_team,
+            reports=injury_reports,
         )
     )
 
-    season_avg = pdata.get("seasonAvgPoints")
-    pdata["poissonProbability"] = (
-        calculate_poisson_probability(season_avg, threshold)
-        if season_avg is not None
-        else None
-    )
-    pdata["monteCarloProbability"] = monte_carlo_for_player(name, threshold) or -1
+    # μ/σ of recent points; each line only reruns the simulation
+    with timing.span("monte_carlo.fit"):
+        pdata[player_analyzer.SCORING_KEY]["pointsDistribution"] = points_distribution(name)
 
     # — GARCH vol forecast —
-    series = fetch_point_series(pdata, n_games=50)
-    vol   = forecast_volatility(series)
-    pdata["volatilityForecast"] = vol
+    with timing.span("volatility"):
+        series = fetch_point_series(pdata, n_games=50)
+        vol   = forecast_volatility(series)
+        pdata["volatilityForecast"] = vol
 
-    if pdata["num_playoff_games"] >= 5:
-        pdata["volatilityPlayOffsForecast"] = forecast_playoff_volatility(pdata)
-    else:
-        pdata["volatilityPlayOffsForecast"] = None
+        if pdata["num_playoff_games"] >= 5:
+            pdata["volatilityPlayOffsForecast"] = forecast_playoff_volatility(pdata)
+        else:
+            pdata["volatilityPlayOffsForecast"] = None
 
 
     import re
@@ -684,7 +848,41 @@ def analyze_player_endpoint():
     #pdata['awayTeamOdds'] = odds.get('awayTeamOdds')
     #pdata['homeTeamOdds'] = odds.get('homeTeamOdds')
 
+    return pdata
+
+
+def _build_player_document(name, threshold, pick_base=None, line_probability=None):
+    """
+    Derive one line from the player's base document, persist it and return
+    (document, status). Only the threshold-specific fields – underCount,
+    playoff_underCount, the probabilities, pick_id and the explanation – are
+    computed here. A batch passes the base document it already resolved as
+    `pick_base` and the line's monte_carlo.probability() result it evaluated
+    with the rest of the slate as `line_probability`.
+    """
+    key = pkey(name)
+
+    if pick_base is None:
+        with timing.span("pick_base"):
+            pick_base = _pick_base(name)
+    base = pick_base
+    if "error" in base:
+        return {"error": base["error"]}, base.get("status", 400)
+    pdata = player_analyzer.with_threshold(base, threshold)
 
+    season_avg = pdata.get("seasonAvgPoints")
+    pdata["poissonProbability"] = (
+        calculate_poisson_probability(season_avg, threshold)
+        if season_avg is not None
+        else None
+    )
+    distribution = base[player_analyzer.SCORING_KEY]["pointsDistribution"]
+    result = line_probability
+    if result is None and distribution:
+        with timing.span("monte_carlo.simulate"):
+            result = probability(*distribution, float(threshold))
+    pdata["monteCarloProbability"] = (result["probability"] if result else None) or -1
+    pdata["monteCarloBackend"] = f"{result['method']}:{result['backend']}" if result else None
 
     game_date_obj = datetime.datetime.strptime(pdata["gameDate"], "%m/%d/%Y")
     # …and re-format to YYYYMMDD
@@ -704,10 +902,140 @@ def analyze_player_endpoint():
             .document("players") \
             .collection("active") \
             .document(f"{key}_{threshold}_{doc_date}")
-    ref.set(pdata)
+    with timing.span("firestore.write"):
+        ref.set(game_record.to_jsonable(pdata))
 
     # 3) return it
-    return jsonify(pdata), 200
+    return pdata, 200
+
+
+def _analyze_picks(picks):
+    """
+    Batch version of /api/player for [(playerName, threshold), ...].
+
+    Stored picks are served from Firestore. Players without a stored base
+    document are analysed together on this thread (player_analyzer.
+    analyze_players_batch fetches the nba_api data they share once), their
+    base documents are finished concurrently, the Monte Carlo probability of
+    every line is evaluated in one vectorized call, then every line is
+    finished concurrently – the explainer and the Firestore write – each
+    through the same single-flight group as /api/player. Returns one result
+    dict per pick, in input order.
+
+    The concurrent stages run on the fanout pool, so they are handed every
+    base they need: no task can reach analyze_player_base, which runs Plans
+    of its own.
+    """
+    today_et = datetime.datetime.now(pytz.timezone("America/New_York")).strftime("%Y%m%d")
+    results = [None] * len(picks)
+    pending = {}                          # flight key -> [indexes into picks]
+    for i, (name, threshold) in enumerate(picks):
+        existing = _find_active_pick(pkey(name), threshold)
+        if existing is not None:
+            results[i] = {"playerName": name, "threshold": threshold, "status": 200, "data": existing}
+        else:
+            pending.setdefault((pkey(name), threshold, today_et), []).append(i)
+
+    if pending:
+        order = list(pending)
+        names = [picks[indexes[0]][0] for indexes in pending.values()]
+
+        # the stored base documents, taken once; one analysis per player
+        # without one, however many lines they have
+        players = {pkey(name): name for name in names}
+        stored = {key: nba_cache.get_derived(PICK_BASE, _pick_base_key(name)) for key, name in players.items()}
+        unanalysed = [key for key, base in stored.items() if base is None]
+        analyses = player_analyzer.analyze_players_batch([
+            (*players[key].split(maxsplit=1), None) for key in unanalysed
+        ])
+        bases = dict(zip(unanalysed, analyses))
+
+        injury_reports = {}     # {team_key: report}; injury_report coalesces concurrent reads of a team
+        def pick_base(key):
+            if stored[key] is not None:
+                return stored[key]
+            try:
+                return _pick_base(players[key], bases[key], injury_reports)
+            except Exception as e:
+                traceback.print_exc()
+                return {"error": str(e), "status": 500}
+
+        plan = fanout.Plan()
+        for key in players:
+            plan.add(key, lambda key=key: pick_base(key), host=fanout.LOCAL)
+        pick_bases = plan.run()
+
+        # every line's P(over) in one call instead of one simulation per line
+        lines = [
+            (flight_key, pick_bases[pkey(name)][player_analyzer.SCORING_KEY]["pointsDistribution"])
+            for name, flight_key in zip(names, order)
+            if "error" not in pick_bases[pkey(name)]
+            and pick_bases[pkey(name)][player_analyzer.SCORING_KEY]["pointsDistribution"]
+        ]
+        line_probabilities = {}
+        if lines:
+            with timing.span("monte_carlo.simulate"):
+                batch = probabilities(
+                    [mu for _, (mu, _) in lines],
+                    [sigma for _, (_, sigma) in lines],
+                    [float(flight_key[1]) for flight_key, _ in lines],
+                )
+            for (flight_key, _), p in zip(lines, batch["probability"]):
+                line_probabilities[flight_key] = {
+                    "probability": float(p), "model": batch["model"],
+                    "method": batch["method"], "backend": batch["backend"],
+                }
+
+        def finish(name, flight_key):
+            base = pick_bases[pkey(name)]
+            if "error" in base:
+                return {"error": base["error"]}, base.get("status", 400)
+            try:
+                (doc, status), _ = _analysis_flights.do(
+                    flight_key, _analyze_once, name, flight_key[1], flight_key,
+                    base, line_probabilities.get(flight_key))
+                return doc, status
+            except Exception as e:
+                traceback.print_exc()
+                return {"error": str(e)}, 500
+
+        plan = fanout.Plan()
+        for n, (name, flight_key) in enumerate(zip(names, order)):
+            plan.add(n, lambda name=name, flight_key=flight_key: finish(name, flight_key), host=fanout.LOCAL)
+        finished = plan.run()
+
+        for n, flight_key in enumerate(order):
+            doc, status = finished[n]
+            for i in pending[flight_key]:
+                name, threshold = picks[i]
+                result = {"playerName": name, "threshold": threshold, "status": status}
+                if "error" in doc:
+                    result["error"] = doc["error"]
+                else:
+                    result["data"] = doc
+                results[i] = result
+    return results
+
+
+@app.route("/api/players", methods=["POST"])
+def analyze_players_endpoint():
+    """
+    Analyze many picks in one request.
+    Body: {"picks": [{"playerName": ..., "threshold": ...}, ...]}
+    Returns {"results": [{playerName, threshold, status, data | error}, ...]}
+    in the order the picks were given.
+    """
+    body  = request.json or {}
+    picks = []
+    for entry in body.get("picks") or []:
+        name, threshold = entry.get("playerName"), entry.get("threshold")
+        if not name or threshold is None or len(name.split()) < 2:
+            return jsonify({"error": f"Invalid pick: {entry}"}), 400
+        picks.append((name, float(threshold)))
+    if not picks:
+        return jsonify({"error": "No picks provided"}), 400
+
+    return jsonify({"results": _analyze_picks(picks)}), 200
 
 
 @app.route("/api/parse_screenshot", methods=["POST"])
@@ -715,7 +1043,8 @@ def parse_screenshot_endpoint():
     """
     1) Accepts multipart/form-data images under 'images'
     2) For each: encode → parse_image_data_url → get list of {player,threshold}
-    3) For each pair: POST to /api/player so it goes through your normal pipeline.
+    3) POST all pairs at once to /api/players so they go through the normal
+       pipeline as one batch.
     4) Return the flat list of all parsed entries.
     """
     files = request.files.getlist("images")
@@ -746,19 +1075,16 @@ def parse_screenshot_endpoint():
             if not name or threshold is None:
                 continue
 
-            # Fire off your existing analyze route:
-            try:
-                requests.post(
-                    f"{base}/api/player",
-                    json={"playerName": name, "threshold": threshold, "image": image},
-                    timeout=10
-                )
-            except Exception:
-                # swallow any network or timeout errors
-                pass
-
             parsed.append({"playerName": name, "threshold": threshold, "image": image})
-            print(f"[→ POST]/api/player  {name}  @ {threshold}")
+
+    # Fire off the batch analyze route:
+    if parsed:
+        try:
+            requests.post(f"{base}/api/players", json={"picks": parsed}, timeout=10)
+        except Exception:
+            # swallow any network or timeout errors
+            pass
+        print(f"[→ POST]/api/players  {len(parsed)} picks")
 
     return jsonify({"status": "ok", "parsedPlayers": parsed}), 200
 
@@ -876,6 +1202,12 @@ def admin_system():
         
         # Merge function health into main health data
         health_data["cloudFunctions"] = functions_health
+        health_data["nbaCache"] = nba_cache.get_cache_stats()
+        health_data["rateLimits"] = rate_limiter.get_stats()
+        health_data["analysisFlights"] = _analysis_flights.stats()
+        health_data["scoreboardFlights"] = _scoreboard_flights.stats()
+        health_data["pickBaseFlights"] = _base_flights.stats()
+        health_data["stageTimings"] = timing.stats()
         
         return jsonify(health_data), 200
     except Exception as e:
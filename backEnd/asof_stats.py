@@ -0,0 +1,174 @@
+"""
+As-of (point-in-time) statistics
+A PrefixIndex holds cumulative sums of a game log's stats in chronological
+order, so the average of any stat over the games before a given game – or
+between two games – is two array lookups instead of slicing the frame and
+recomputing a mean. Historical picks, backfills and backtests ask exactly
+these questions for every concluded document.
+
+Games are located by Game_ID through a dict. Home / away splits and sums
+of squares (for variances) are kept alongside the plain sums.
+
+player_index() / team_index() build (and memoize) the index of a log held
+by nba_cache; PrefixIndex(df) works on any PlayerGameLog / TeamGameLog frame.
+The memo is small – an index holds a sorted copy of its log outside the
+nba_cache budget – and is keyed on the log's version (its games), so it
+never pins the cached frame itself.
+"""
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+import nba_cache
+
+# PlayerGameLog / TeamGameLog columns summed (MIN in whole minutes)
+STATS = ("PTS", "MIN", "FGM", "FGA", "FG3M", "FG3A", "FTM", "FTA", "TOV",
+         "OREB", "DREB", "REB", "AST", "STL", "BLK", "PF")
+SPLITS = ("all", "Home", "Away")
+_MAX_INDEXES = 64
+
+
+def parse_minutes(column):
+    """A MIN column ("34:12" strings or numbers) as whole minutes."""
+    if not pd.api.types.is_numeric_dtype(column):
+        column = column.astype(str).str.split(':').str[0]
+    return pd.to_numeric(column, errors='coerce').fillna(0).astype(int)
+
+
+def _dates(column):
+    dates = pd.to_datetime(column, format="%b %d, %Y", errors="coerce")
+    if dates.isna().any():
+        dates = pd.to_datetime(column, errors="coerce")
+    return dates
+
+
+def chronological(df):
+    """(frame, dates): `df` sorted oldest → newest by game date (then Game_ID), and its parsed dates."""
+    dates = _dates(df["GAME_DATE"]) if not df.empty else pd.Series([], dtype="datetime64[ns]")
+    frame = df.assign(_date=dates).sort_values(["_date", "Game_ID"], kind="stable")
+    return frame.drop(columns="_date").reset_index(drop=True), frame["_date"]
+
+
+def _prefix(values):
+    out = np.zeros(len(values) + 1)
+    np.cumsum(values, out=out[1:])
+    return out
+
+
+class PrefixIndex:
+    """Prefix sums over one game log (any row order; sorted oldest → newest)."""
+
+    def __init__(self, df):
+        self.frame, _ = chronological(df)
+        self.game_ids = self.frame["Game_ID"].tolist()
+        self._position = {game_id: i for i, game_id in enumerate(self.game_ids)}
+
+        matchup = self.frame["MATCHUP"].astype(str) if "MATCHUP" in self.frame else pd.Series("", index=self.frame.index)
+        masks = {
+            "all":  np.ones(len(self.frame), dtype=bool),
+            "Home": matchup.str.contains(" vs. ", regex=False).to_numpy(),
+            "Away": matchup.str.contains(" @ ", regex=False).to_numpy(),
+        }
+        self._games = {split: _prefix(mask.astype(float)) for split, mask in masks.items()}
+        self._sums = {}
+        self._squares = {}
+        for stat in STATS:
+            if stat not in self.frame:
+                continue
+            column = self.frame[stat]
+            values = (parse_minutes(column) if stat == "MIN" else pd.to_numeric(column, errors="coerce").fillna(0))
+            values = values.to_numpy(dtype=float)
+            for split, mask in masks.items():
+                masked = np.where(mask, values, 0.0)
+                self._sums[stat, split] = _prefix(masked)
+                self._squares[stat, split] = _prefix(masked * masked)
+
+    def __len__(self):
+        return len(self.game_ids)
+
+    def __contains__(self, game_id):
+        return game_id in self._position
+
+    # ── locating games ──────────────────────────────────────────────────────
+    def position(self, game_id):
+        """Number of games before `game_id` (KeyError if it is not in the log)."""
+        return self._position[game_id]
+
+    def _range(self, start, end):
+        end = len(self) if end is None else end
+        return max(0, start), min(len(self), end)
+
+    # ── aggregates over games [start, end) ─────────────────────────────────
+    def games(self, start=0, end=None, split="all"):
+        start, end = self._range(start, end)
+        return int(self._games[split][end] - self._games[split][start]) if end > start else 0
+
+    def total(self, stat, start=0, end=None, split="all"):
+        start, end = self._range(start, end)
+        sums = self._sums[stat, split]
+        return float(sums[end] - sums[start]) if end > start else 0.0
+
+    def mean(self, stat, start=0, end=None, split="all"):
+        """Per-game average, or None without games."""
+        n = self.games(start, end, split)
+        return self.total(stat, start, end, split) / n if n else None
+
+    def variance(self, stat, start=0, end=None, split="all", ddof=1):
+        n = self.games(start, end, split)
+        if n <= ddof:
+            return None
+        start, end = self._range(start, end)
+        squares = self._squares[stat, split]
+        total = self.total(stat, start, end, split)
+        return max(0.0, (float(squares[end] - squares[start]) - total * total / n) / (n - ddof))
+
+    # ── as-of helpers ──────────────────────────────────────────────────────
+    def means_before(self, game_id, stats, split="all"):
+        """Tuple of per-game averages of `stats` over the games before `game_id` (Nones if none)."""
+        end = self.position(game_id)
+        return tuple(self.mean(stat, 0, end, split) for stat in stats)
+
+    def frame_before(self, game_id):
+        """Rows of the games before `game_id`, newest first (the order nba_api returns)."""
+        return self.frame.iloc[:self.position(game_id)].iloc[::-1].reset_index(drop=True)
+
+
+_indexes = OrderedDict()           # (kind, id, season, season_type) -> (version, PrefixIndex)
+_lock = threading.Lock()
+
+
+def _version(df):
+    """(games, first Game_ID, last Game_ID) – changes whenever nba_cache adds games to the log."""
+    if df.empty:
+        return (0, None, None)
+    return (len(df), df["Game_ID"].iloc[0], df["Game_ID"].iloc[-1])
+
+
+def _memoized(key, df):
+    version = _version(df)
+    with _lock:
+        held = _indexes.get(key)
+        if held is not None and held[0] == version:
+            _indexes.move_to_end(key)
+            return held[1]
+    index = PrefixIndex(df)
+    with _lock:
+        _indexes[key] = (version, index)
+        _indexes.move_to_end(key)
+        while len(_indexes) > _MAX_INDEXES:
+            _indexes.popitem(last=False)
+    return index
+
+
+def player_index(player_id, season, season_type="Regular Season"):
+    """PrefixIndex of a player's cached game log (rebuilt when nba_cache refreshes the log)."""
+    df = nba_cache.get_player_gamelog(player_id, season, season_type)
+    return _memoized(("player", int(player_id), season, season_type), df)
+
+
+def team_index(team_id, season, season_type="Regular Season"):
+    """PrefixIndex of a team's cached game log."""
+    df = nba_cache.get_team_gamelog(team_id, season, season_type)
+    return _memoized(("team", int(team_id), season, season_type), df)
@@ -17,6 +17,8 @@ from __future__ import annotations
 import json, math, os, random, typing as _t
 
 import numpy as np
+import game_record
+import timing
 from scipy import stats as st
 from openai import OpenAI
 from firebase_admin import functions
@@ -107,6 +109,7 @@ def _get_client() -> OpenAI:
 
 
 
+@timing.timed("chatgpt")
 def get_bet_explanation_from_chatgpt(pdata: dict) -> dict[str, str]:
     """Return {"explanation", "confidenceRange", "recommendation"} for this prop."""
 
@@ -135,6 +138,8 @@ def get_bet_explanation_from_chatgpt(pdata: dict) -> dict[str, str]:
         "    ≥ 55 % → \"Lean Over\"\n"
         "    45–55 % → \"Stay Away\"\n"
         "    ≤ 45 % → \"Lean Under\"\n"
+        "- `playerDoc.rollingStats` holds last-5/10/15, season and EWMA "
+        "points/minutes (mean and std), overall, home, away and vs. this opponent.\n"
     )
 
     user_payload = {
@@ -151,16 +156,17 @@ def get_bet_explanation_from_chatgpt(pdata: dict) -> dict[str, str]:
     }
 
     # 3) Call the model (JSON mode keeps parsing bullet-proof)
-    chat = _get_client().chat.completions.create(
-        model=MODEL,
-        response_format={"type": "json_object"},
-        messages=[
-            {"role": "system", "content": sys_prompt},
-            {"role": "user",   "content": json.dumps(user_payload)},
-        ],
-        max_tokens=300,
-        temperature=0.3,
-    )
+    with timing.span("chatgpt.request"):
+        chat = _get_client().chat.completions.create(
+            model=MODEL,
+            response_format={"type": "json_object"},
+            messages=[
+                {"role": "system", "content": sys_prompt},
+                {"role": "user",   "content": json.dumps(user_payload, default=game_record.json_default)},
+            ],
+            max_tokens=300,
+            temperature=0.3,
+        )
 
     # 4) Safe-parse; fall back to a template if anything goes sideways
     try:
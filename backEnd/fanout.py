@@ -0,0 +1,103 @@
+"""
+Concurrent fan-out for upstream calls
+A Plan is a small graph of calls: each task names the tasks it depends on
+and the upstream host it talks to. A task is submitted to a shared thread
+pool as soon as its dependencies have finished, so independent calls overlap
+and a cold analysis costs roughly the slowest chain instead of the sum of
+every call.
+
+Each host has its own concurrency cap (a semaphore held for the duration of
+the call), so a fan-out never opens more parallel requests against
+stats.nba.com or balldontlie than they tolerate, however many analyses are
+running at once. Tasks run inside a copy of the caller's contextvars.
+
+Tasks must not run a Plan themselves – they would be waiting on the same
+pool they occupy.
+"""
+import os
+import logging
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+logger = logging.getLogger(__name__)
+
+NBA_STATS   = "stats.nba.com"
+BALLDONTLIE = "api.balldontlie.io"
+LOCAL       = None          # pure computation / cache reads – no host cap
+
+HOST_LIMITS = {
+    NBA_STATS:   int(os.getenv("FANOUT_NBA_STATS_CONCURRENCY", "3")),
+    BALLDONTLIE: int(os.getenv("FANOUT_BALLDONTLIE_CONCURRENCY", "2")),
+}
+MAX_WORKERS = int(os.getenv("FANOUT_MAX_WORKERS", "8"))
+
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="fanout")
+_host_slots = {host: threading.BoundedSemaphore(n) for host, n in HOST_LIMITS.items()}
+
+
+def _call(host, ctx, fn, args):
+    slot = _host_slots.get(host)
+    if slot is None:
+        return ctx.run(fn, *args)
+    with slot:
+        return ctx.run(fn, *args)
+
+
+class Plan:
+    """
+    plan = Plan()
+    plan.add("log", fetch_log)
+    plan.add("avg", lambda log: log["PTS"].mean(), deps=("log",), host=LOCAL)
+    results = plan.run()            # {"log": ..., "avg": ...}
+    """
+
+    def __init__(self):
+        self._tasks = {}            # name -> (fn, deps, host), in insertion order
+
+    def add(self, name, fn, deps=(), host=NBA_STATS):
+        """Register `fn`; it is called with the results of `deps`, in order."""
+        missing = [d for d in deps if d not in self._tasks]
+        if missing:
+            raise ValueError(f"task {name!r} depends on unknown task(s) {missing}")
+        self._tasks[name] = (fn, tuple(deps), host)
+        return self
+
+    def run(self):
+        """
+        Execute the plan and return {name: result}. If a task raises, nothing
+        new is started, in-flight tasks are joined and the first error is
+        re-raised.
+        """
+        pending = dict(self._tasks)
+        running = {}
+        results = {}
+        error = None
+
+        while pending or running:
+            if error is None:
+                ready = [name for name, (_, deps, _) in pending.items()
+                         if all(d in results for d in deps)]
+                for name in ready:
+                    fn, deps, host = pending.pop(name)
+                    args = [results[d] for d in deps]
+                    future = _executor.submit(_call, host, contextvars.copy_context(), fn, args)
+                    running[future] = name
+            else:
+                pending.clear()
+
+            if not running:
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    results[name] = future.result()
+                except Exception as e:
+                    logger.warning(f"[fanout] task {name!r} failed: {e}")
+                    if error is None:
+                        error = e
+
+        if error is not None:
+            raise error
+        return results
@@ -0,0 +1,154 @@
+"""
+Compact game records
+Game histories (last5RegularGames, playoff_games, fetch_more_games, ...)
+used to be lists of dicts with a dozen string keys each. GameRecord holds
+the same data in __slots__: team abbreviations, dates and game ids are
+interned (one string object per distinct value across every cached
+history), location and game type are small int codes, and derived fields
+(opponent full name, logo URL) are computed on access instead of stored.
+
+Records are read-only Mappings with the original keys, so `g["points"]`,
+`g.get("location")` and `record == {...}` keep working. The dict / JSON shape
+is produced only at the boundary: to_jsonable() before Firestore writes and
+json.dumps, and the Flask JSON encoder for responses.
+"""
+import sys
+from collections.abc import Mapping
+
+import static_index
+
+LOCATIONS  = ("Home", "Away", "Unknown")
+GAME_TYPES = ("Regular Season", "Playoffs")
+
+_LOCATION_CODES  = {name: code for code, name in enumerate(LOCATIONS)}
+_GAME_TYPE_CODES = {name: code for code, name in enumerate(GAME_TYPES)}
+_ABSENT = object()          # field not part of this record's dict shape
+
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class Record(Mapping):
+    """Base: subclasses list their output keys and getters in _FIELDS, in dict order."""
+    __slots__ = ()
+    _FIELDS = ()
+    _GETTERS = {}
+
+    def __getitem__(self, key):
+        getter = self._GETTERS.get(key)
+        value = getter(self) if getter is not None else _ABSENT
+        if value is _ABSENT:
+            raise KeyError(key)
+        return value
+
+    def __iter__(self):
+        for key, getter in self._FIELDS:
+            if getter(self) is not _ABSENT:
+                yield key
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def to_dict(self):
+        out = {}
+        for key, getter in self._FIELDS:
+            value = getter(self)
+            if value is not _ABSENT:
+                out[key] = value
+        return out
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+
+def _fields(cls, fields):
+    cls._FIELDS = tuple(fields)
+    cls._GETTERS = dict(fields)
+    return cls
+
+
+class GameRecord(Record):
+    """
+    One game of a player's history. Playoff games also carry game_number,
+    round, series_score and result; `game_id=None` omits "gameId" (the shape
+    fetch_more_games has always returned).
+    """
+    __slots__ = ("game_id", "date", "points", "opponent", "location_code", "minutes",
+                 "game_type_code", "game_number", "round", "series_score", "result")
+
+    def __init__(self, game_id, date, points, opponent, location, minutes, game_type,
+                 game_number=None, round=None, series_score=None, result=None):
+        self.game_id = _intern(game_id)
+        self.date = _intern(date)
+        self.points = points
+        self.opponent = _intern(opponent)
+        self.location_code = _LOCATION_CODES[location]
+        self.minutes = minutes
+        self.game_type_code = _GAME_TYPE_CODES[game_type]
+        self.game_number = game_number
+        self.round = _intern(round)
+        self.series_score = series_score
+        self.result = _intern(result)
+
+    def __reduce__(self):
+        # rebuilt through __init__, so a record read back from the disk cache is interned again
+        return (GameRecord, (self.game_id, self.date, self.points, self.opponent, self.location,
+                             self.minutes, self.game_type, self.game_number, self.round,
+                             self.series_score, self.result))
+
+    @property
+    def location(self):
+        return LOCATIONS[self.location_code]
+
+    @property
+    def game_type(self):
+        return GAME_TYPES[self.game_type_code]
+
+    def opponent_full_name(self):
+        return static_index.team_full_name_from_abbr(self.opponent) if self.opponent else None
+
+    def opponent_logo(self):
+        team_id = static_index.team_id_from_abbr(self.opponent) if self.opponent else None
+        return static_index.team_logo_url(team_id) if team_id else None
+
+    def _playoff(name):
+        def get(self):
+            return getattr(self, name) if self.game_type_code == _GAME_TYPE_CODES["Playoffs"] else _ABSENT
+        return get
+
+
+_fields(GameRecord, [
+    ("gameId",           lambda r: _ABSENT if r.game_id is None else r.game_id),
+    ("date",             lambda r: r.date),
+    ("points",           lambda r: r.points),
+    ("opponent",         lambda r: r.opponent),
+    ("opponentFullName", GameRecord.opponent_full_name),
+    ("opponentLogo",     GameRecord.opponent_logo),
+    ("location",         lambda r: r.location),
+    ("minutes",          lambda r: r.minutes),
+    ("game_number",      GameRecord._playoff("game_number")),
+    ("round",            GameRecord._playoff("round")),
+    ("series_score",     GameRecord._playoff("series_score")),
+    ("result",           GameRecord._playoff("result")),
+    ("gameType",         lambda r: r.game_type),
+])
+del GameRecord._playoff
+
+
+def to_jsonable(obj):
+    """Copy of `obj` with every Record replaced by its dict (for Firestore / json.dumps)."""
+    if isinstance(obj, Record):
+        return obj.to_dict()
+    if isinstance(obj, dict):
+        return {k: to_jsonable(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [to_jsonable(v) for v in obj]
+    return obj
+
+
+def json_default(obj):
+    """`default=` hook for json.dumps."""
+    if isinstance(obj, Record):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
@@ -4,15 +4,24 @@ from datetime import datetime
 import pytz
 import logging
 import nba_api
-from nba_api.stats.endpoints import TeamGameLog
-from nba_api.stats.endpoints import playergamelog
-from nba_api.stats.static import teams, players
-import requests
+import static_index
+import nba_cache
+import rate_limiter
+import singleflight
+import player_identity
+import team_usage
+import timing
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# pace TeamGameLog / PlayerGameLog through the shared stats.nba.com bucket
+rate_limiter.install_nba_api()
+
+# one read of a team's report per batch, however many of its picks run at once
+_team_reports = singleflight.Group("team_injury_report")
+
 def get_current_season():
     now = datetime.datetime.now()
     if now.month >= 10:
@@ -24,36 +33,20 @@ def get_current_season():
     return f"{season_start}-{str(season_end)[-2:]}"
 
 def get_ids(first_name, last_name):
-    url = "https://api.balldontlie.io/v1/players"
-    headers = {"Authorization": "03f64803-21d9-40e4-ab9f-5d69ca82c8dc"}
-    params = {"first_name": first_name, "last_name": last_name}
-    response = requests.get(url, headers=headers, params=params)
-    if response.status_code != 200:
-        return {"error": f"API Error from balldontlie: {response.status_code}"}
-    bd_players = response.json().get("data", [])
-    if not bd_players:
-        return {"error": f"No players found in balldontlie for {first_name} {last_name}"}
-    bdl_player = bd_players[0]
-
-    full_name = f"{bdl_player['first_name']} {bdl_player['last_name']}"
-    nba_found = players.find_players_by_full_name(full_name)
-    if not nba_found:
-        return {"error": f"No matching NBA Stats player found for {full_name}"}
-    nba_player_id = nba_found[0]["id"]
-    player_team = bdl_player["team"]["full_name"] if bdl_player.get("team") else "Unknown Team"
-    player_team_standings = teams.find_teams_by_full_name(player_team)[0]
-    player_team_id = player_team_standings["id"]
-
-    return nba_player_id, player_team_id
+    player = player_identity.resolve(first_name, last_name)
+    if player is None:
+        return {"error": f"No matching NBA Stats player found for {first_name} {last_name}"}
+    if player["teamId"] is None:
+        return {"error": f"{player['name']} is not on an NBA roster"}
+    return player["playerId"], player["teamId"]
 
 def get_player_image_url(player_id):
     return f"https://ak-static.cms.nba.com/wp-content/uploads/headshots/nba/latest/260x190/{player_id}.png"
 
 def player_image_loading(player_name):
-    nba_found = players.find_players_by_full_name(player_name)
-    if not nba_found:
+    nba_player_id = static_index.player_id_from_name(player_name)
+    if nba_player_id is None:
         return {"error": f"No matching NBA Stats player found for {player_name}"}
-    nba_player_id = nba_found[0]["id"]
     return get_player_image_url(nba_player_id)
 
 def fetch_player_game_stats(nba_player_id, season_str):
@@ -62,7 +55,7 @@ def fetch_player_game_stats(nba_player_id, season_str):
     Returns per-game stats including FGM, FGA, 3PA, 3PM, etc.
     """
     fga = fta = tov = minutes = 0
-    gamelog_df = playergamelog.PlayerGameLog(player_id=nba_player_id, season=season_str).get_data_frames()[0]
+    gamelog_df = nba_cache.get_player_gamelog(nba_player_id, season_str)
 
 
     for idx, row in gamelog_df.iterrows():
@@ -78,22 +71,15 @@ def fetch_player_game_stats(nba_player_id, season_str):
 
     return fga, fta, tov, minutes
 
-def fetch_team_stats_for_usage(team_id, season):
-    """
-    Fetches per‐game averages for every team, then adds an 'AVG_POSS' column.
-    """
-    gamelog_df = TeamGameLog(team_id=team_id, season=season).get_data_frames()[0]
-    return (
-            float(gamelog_df['FGA'].mean()),
-            float(gamelog_df['FTA'].mean()),
-            float(gamelog_df['TOV'].mean())
-        )
-
+@timing.timed("injury_report.metrics")
 def get_data_metrics(player_name):
     first_name, last_name = player_name.split(" ", 1)
-    player_id, player_team_id = get_ids(first_name, last_name)
+    ids = get_ids(first_name, last_name)
+    if isinstance(ids, dict):
+        return ids
+    player_id, player_team_id = ids
     fga, fta, tov, mins = fetch_player_game_stats(player_id, get_current_season())
-    team_fga, team_fta, team_tov = fetch_team_stats_for_usage(player_team_id, get_current_season())
+    team_fga, team_fta, team_tov = team_usage.usage_inputs(player_team_id, get_current_season())
 
     alpha = 0.7
     usage_rate = (
@@ -109,9 +95,9 @@ def get_data_metrics(player_name):
     else:
         importance_role = "Bench"
 
-    player_image_url = get_player_image_url(player_image_loading(player_name))
+    player_image_url = player_image_loading(player_name)
     
-    return usage_rate, importance_score, importance_role
+    return usage_rate, importance_score, importance_role, player_image_url
 
 def get_team_injury_report(team_name_normalized, db=None):
     """
@@ -270,7 +256,11 @@ def get_team_injury_report_new(team_name, db):
             if player['reason'] == "NOT YET SUBMITTED":
                 return {'status': "NOT YET SUBMITTED", 'reason': "Injury report not yet submitted by team"}
             else:
-                usage_rate, importance_score, importance_role, player_image_url = get_data_metrics(player['player'])  # Call to get_data_metrics to ensure player data is fetched
+                metrics = get_data_metrics(player['player'])  # Call to get_data_metrics to ensure player data is fetched
+                if isinstance(metrics, dict):
+                    logger.warning(f"No metrics for {player['player']}: {metrics['error']}")
+                    metrics = (None, None, None, None)
+                usage_rate, importance_score, importance_role, player_image_url = metrics
                 injured_players[player['player']] = {
                     'status': player['status'],
                     'reason': player['reason'],
@@ -287,9 +277,14 @@ def get_team_injury_report_new(team_name, db):
         return {}
     
     
-def get_player_injury_status_new(player_name, player_team, opponent_team):
+@timing.timed("injury_report")
+def get_player_injury_status_new(player_name, player_team, opponent_team, reports=None):
     """
     Look up a player's injury status plus both teams' full injury lists.
+
+    `reports` is an optional {team_key: report} dict shared across a batch of
+    picks, so each team's report is read (and its players' metrics computed)
+    once per batch – concurrent picks on the same team wait for the first.
     """
     if not player_name:
         return {"error": "No player name provided"}
@@ -303,8 +298,21 @@ def get_player_injury_status_new(player_name, player_team, opponent_team):
     team_key  = player_team.lower().replace(" ", "_").replace(".", "")
     opp_key   = opponent_team.lower().replace(" ", "_").replace(".", "") if opponent_team else None
 
-    team_injuries     = get_team_injury_report_new(team_key, db)              # may be {}, {'status': 'NOT YET SUBMITTED'}, or {player: {...}}
-    opponent_injuries = get_team_injury_report_new(opp_key,  db) if opp_key else {}
+    def read_once(key):
+        if key not in reports:
+            reports[key] = get_team_injury_report_new(key, db)
+        return reports[key]
+
+    def team_report(key):
+        if reports is None:
+            return get_team_injury_report_new(key, db)
+        if key in reports:
+            return reports[key]
+        report, _ = _team_reports.do((id(reports), key), read_once, key)
+        return report
+
+    team_injuries     = team_report(team_key)              # may be {}, {'status': 'NOT YET SUBMITTED'}, or {player: {...}}
+    opponent_injuries = team_report(opp_key) if opp_key else {}
 
     # ── 3. Decide the player flag ──────────────────────────────────────────
     #
@@ -1,8 +1,15 @@
+import math
+
 import numpy as np
-from nba_api.stats.static import players
-# Import helper functions from player_analyzer
-from player_analyzer import fetch_player_game_logs, get_current_season
+from scipy import stats
+from scipy.stats import qmc
+from scipy.special import ndtri
+import static_index
+import nba_cache
+import rolling_stats
+from player_analyzer import get_current_season
 import os
+import threading
 from ctypes import CDLL, c_double, c_uint64
 
 _ocaml_mc = None
@@ -12,31 +19,17 @@ if os.path.exists(_so_path):
     _ocaml_mc.monte_carlo.argtypes = (c_double, c_double, c_double, c_uint64)
     _ocaml_mc.monte_carlo.restype  = c_double
 
-def get_player_game_data(player_name, max_games=60):
-    """
-    Retrieves up to `max_games` most recent points for the given player
-    by calling your real 'fetch_player_game_logs' function.
-    Returns a list of points or None if no data is found.
-    """
-    player_list = players.find_players_by_full_name(player_name)
-    if not player_list:
-        return None
-    player_id = player_list[0]["id"]
+MAX_GAMES = 60   # most recent games the points distribution is fitted on
 
-    season_str = get_current_season()  # dynamic season like "2024-25"
-    logs = fetch_player_game_logs(player_id, season_str=season_str)
-    if not logs:
-        return None
+_local = threading.local()           # per thread: Generator + standard-normal buffer
 
-    points_only = [g["points"] for g in logs if "points" in g]
-    if not points_only:
-        return None
 
-    if len(points_only) > max_games:
-        points_only = points_only[-max_games:]
+def _generator():
+    rng = getattr(_local, "rng", None)
+    if rng is None:
+        rng = _local.rng = np.random.default_rng()
+    return rng
 
-    print(f"[monte_carlo] Found {len(points_only)} games for {player_name}")
-    return points_only
 
 def run_monte_carlo_simulation(mu, sigma,
                                point_threshold,
@@ -56,6 +49,330 @@ def run_monte_carlo_simulation(mu, sigma,
     count_over = np.sum(simulated > point_threshold)
     return count_over / num_simulations
 
+
+# ── probability engine ───────────────────────────────────────────────────────
+# P(points > threshold) has a closed form for every parametric model below, so
+# method="auto" evaluates it exactly; only models without one (the empirical
+# distribution of recent games) are simulated. method="simulation" forces
+# sampling for any model, e.g. to cross-check an analytic backend.
+ANALYTIC = "analytic"
+SIMULATION = "simulation"
+
+
+def _negative_binomial_params(mu, sigma):
+    """(n, p) matching mean mu and variance sigma², or None if not overdispersed."""
+    var = sigma * sigma
+    if mu <= 0 or var <= mu:
+        return None
+    return mu * mu / (var - mu), mu / var
+
+
+def _skew_normal_params(mu, sigma, skew):
+    """(shape, loc, scale) of the skew-normal with mean mu, sd sigma and skewness `skew`."""
+    g = min(abs(skew), 0.99) ** (2 / 3)
+    delta = math.copysign(math.sqrt(math.pi / 2 * g / (g + ((4 - math.pi) / 2) ** (2 / 3))), skew)
+    scale = sigma / math.sqrt(1 - 2 * delta * delta / math.pi)
+    loc = mu - scale * delta * math.sqrt(2 / math.pi)
+    return delta / math.sqrt(1 - delta * delta), loc, scale
+
+
+def _resolve_model(model, mu, sigma):
+    # a negative binomial needs variance above the mean; otherwise it is a Poisson
+    if model == "negative_binomial" and _negative_binomial_params(mu, sigma) is None:
+        return "poisson"
+    return model
+
+
+def _analytic(model, mu, sigma, threshold, skew):
+    if model == "normal":
+        return stats.norm.sf(threshold, loc=mu, scale=sigma)
+    if model == "poisson":
+        return stats.poisson.sf(math.floor(threshold), max(mu, 0.5))
+    if model == "negative_binomial":
+        n, p = _negative_binomial_params(mu, sigma)
+        return stats.nbinom.sf(math.floor(threshold), n, p)
+    if model == "skew_normal":
+        shape, loc, scale = _skew_normal_params(mu, sigma, skew)
+        return stats.skewnorm.sf(threshold, shape, loc=loc, scale=scale)
+    return None
+
+
+def _draw(model, mu, sigma, skew, samples, size, rng):
+    if model == "normal":
+        return rng.normal(mu, sigma, size)
+    if model == "poisson":
+        return rng.poisson(max(mu, 0.5), size)
+    if model == "negative_binomial":
+        n, p = _negative_binomial_params(mu, sigma)
+        return rng.negative_binomial(n, p, size)
+    if model == "skew_normal":
+        shape, loc, scale = _skew_normal_params(mu, sigma, skew)
+        return stats.skewnorm.rvs(shape, loc=loc, scale=scale, size=size, random_state=rng)
+    if model == "empirical":
+        return rng.choice(np.asarray(samples, dtype=float), size=size, replace=True)
+    raise ValueError(f"unknown model {model!r}")
+
+
+def _quantile(model, mu, sigma, skew, samples):
+    """Inverse CDF of `model`, for antithetic / Sobol sampling (u in (0, 1) -> draws)."""
+    if model == "normal":
+        return lambda u: stats.norm.ppf(u, loc=mu, scale=sigma)
+    if model == "poisson":
+        return lambda u: stats.poisson.ppf(u, max(mu, 0.5))
+    if model == "negative_binomial":
+        n, p = _negative_binomial_params(mu, sigma)
+        return lambda u: stats.nbinom.ppf(u, n, p)
+    if model == "skew_normal":
+        shape, loc, scale = _skew_normal_params(mu, sigma, skew)
+        return lambda u: stats.skewnorm.ppf(u, shape, loc=loc, scale=scale)
+    if model == "empirical":
+        ordered = np.sort(np.asarray(samples, dtype=float))
+        return lambda u: ordered[np.minimum((u * len(ordered)).astype(int), len(ordered) - 1)]
+    raise ValueError(f"unknown model {model!r}")
+
+
+MODELS = ("normal", "poisson", "negative_binomial", "skew_normal", "empirical")
+
+# Simulation sampling modes:
+#   random      plain pseudo-random draws
+#   antithetic  draws in pairs F⁻¹(u), F⁻¹(1 − u); each pair is one observation
+#   sobol       randomized quasi-Monte Carlo: independent scrambled Sobol
+#               blocks, each block's estimate is one observation
+# With a `tolerance`, draws are taken SIM_CHUNK (a power of two) at a time
+# until the standard error of the estimate is at most `tolerance` (after at
+# least two chunks) or num_simulations is reached. Sobol runs take blocks of
+# 2·SIM_CHUNK / SOBOL_BLOCKS draws instead and check after SOBOL_BLOCKS of
+# them, so their error is never estimated from a handful of observations.
+# Without a tolerance a Sobol run uses blocks of the power of two nearest
+# num_simulations / SOBOL_BLOCKS and draws num_simulations rounded up to a
+# whole block (100,000 → 13 × 8192 = 106,496); "draws" reports the count.
+SAMPLING = ("random", "antithetic", "sobol")
+SIM_CHUNK = 4096
+SOBOL_BLOCKS = 16       # blocks a Sobol run is split into (at least, with a tolerance)
+
+
+def _observations(sampling, over, draw, size, rng):
+    """(observations, draws used) for one chunk of `size` draws."""
+    if sampling == "random":
+        return over(draw(size)).astype(float), size
+    if sampling == "antithetic":
+        u = rng.random(max(1, size // 2))
+        return (over(u).astype(float) + over(1 - u)) / 2, 2 * len(u)
+    m = max(1, int(round(math.log2(size))))
+    u = qmc.Sobol(d=1, scramble=True, seed=rng).random_base2(m).ravel()
+    return np.array([over(u).mean()]), 2 ** m
+
+
+def _simulate(model, mu, sigma, threshold, skew, samples, sampling, num_simulations, tolerance, rng):
+    """(probability, draws, standard error) of a simulated P(X > threshold)."""
+    if sampling == "random":
+        draw = lambda size: _draw(model, mu, sigma, skew, samples, size, rng)
+        over = lambda x: x > threshold
+    else:
+        quantile = _quantile(model, mu, sigma, skew, samples)
+        draw = None
+        over = lambda u: quantile(u) > threshold
+
+    if sampling == "sobol":
+        chunk = 2 * SIM_CHUNK // SOBOL_BLOCKS if tolerance is not None else max(2, num_simulations // SOBOL_BLOCKS)
+        min_draws = SOBOL_BLOCKS * chunk
+    elif tolerance is not None:
+        chunk = SIM_CHUNK
+        min_draws = 2 * chunk
+    else:
+        chunk = min_draws = num_simulations
+
+    total = squares = count = draws = 0
+    while draws < num_simulations:
+        size = chunk if sampling == "sobol" else min(chunk, num_simulations - draws)
+        y, used = _observations(sampling, over, draw, size, rng)
+        total += y.sum()
+        squares += (y * y).sum()
+        count += len(y)
+        draws += used
+        if tolerance is not None and draws >= min_draws and _std_error(total, squares, count) <= tolerance:
+            break
+    return total / count, draws, _std_error(total, squares, count)
+
+
+def _std_error(total, squares, count):
+    if count < 2:
+        return float("nan")
+    variance = max(0.0, (squares - total * total / count) / (count - 1))
+    return math.sqrt(variance / count)
+
+
+def probability(mu, sigma, point_threshold, model="normal", method="auto",
+                skew=0.0, samples=None, num_simulations=100_000, rng=None,
+                sampling="random", tolerance=None):
+    """
+    P(points > point_threshold) under `model`:
+      normal             N(mu, sigma)
+      poisson            Poisson(max(mu, 0.5))
+      negative_binomial  mean mu, variance sigma² (Poisson if not overdispersed)
+      skew_normal        mean mu, sd sigma, skewness `skew`
+      empirical          the values in `samples` (e.g. recent games' points)
+
+    method: "auto" (exact when the model has a closed form), "analytic" or
+    "simulation". Returns {"probability", "model", "method", "backend"};
+    backend is "scipy" for closed forms and "ocaml" / "numpy" for simulations.
+    Simulations also report "sampling", "draws" and "stdError"; `sampling`
+    is one of SAMPLING and `tolerance` (a standard error, e.g. 0.005) stops
+    them early once the estimate is that precise. Sobol runs draw whole
+    power-of-two blocks, so "draws" may exceed num_simulations by up to one
+    block.
+    """
+    if model not in MODELS:
+        raise ValueError(f"unknown model {model!r}; expected one of {MODELS}")
+    if sampling not in SAMPLING:
+        raise ValueError(f"unknown sampling {sampling!r}; expected one of {SAMPLING}")
+    model = _resolve_model(model, mu, sigma)
+    if method in ("auto", ANALYTIC):
+        p = _analytic(model, mu, sigma, point_threshold, skew)
+        if p is not None:
+            return {"probability": float(p), "model": model, "method": ANALYTIC, "backend": "scipy"}
+        if method == ANALYTIC:
+            raise ValueError(f"model {model!r} has no closed form; use method='simulation'")
+    elif method != SIMULATION:
+        raise ValueError(f"unknown method {method!r}")
+
+    result = {"model": model, "method": SIMULATION, "sampling": sampling}
+    if model == "normal" and _ocaml_mc and rng is None and sampling == "random" and tolerance is None:
+        p = _ocaml_mc.monte_carlo(mu, sigma, point_threshold, num_simulations)
+        return dict(result, probability=float(p), backend="ocaml", draws=num_simulations,
+                    stdError=math.sqrt(p * (1 - p) / num_simulations))
+    p, draws, std_error = _simulate(model, mu, sigma, point_threshold, skew, samples,
+                                    sampling, num_simulations, tolerance, rng or _generator())
+    return dict(result, probability=float(p), backend="numpy", draws=int(draws),
+                stdError=None if math.isnan(std_error) else float(std_error))
+
+
+# ── batched simulation ───────────────────────────────────────────────────────
+# Every normal line is mu + sigma·Z, so a whole slate can share one buffer of
+# standard-normal draws: P(mu + sigma·Z > t) is the share of Z above
+# (t − mu) / sigma, compared for a block of lines at once by broadcasting.
+# Blocks are sized so the (lines × draws) comparison stays under
+# MC_BATCH_CHUNK_MB; the buffer is per thread and refilled in place – with
+# fresh draws, antithetic pairs (z, −z) or a scrambled Sobol block mapped
+# through the normal inverse CDF, per `sampling`.
+BATCH_CHUNK_BYTES = int(float(os.getenv("MC_BATCH_CHUNK_MB", "32")) * 1024 * 1024)
+
+
+def _standard_normals(size, rng, sampling="random"):
+    buf = getattr(_local, "normals", None)
+    if buf is None or len(buf) != size:
+        buf = _local.normals = np.empty(size)
+    if sampling == "antithetic":
+        half = size // 2
+        rng.standard_normal(out=buf[:half])
+        np.negative(buf[:half], out=buf[half:2 * half])
+        buf[2 * half:] = rng.standard_normal(size - 2 * half)
+    elif sampling == "sobol":
+        ndtri(qmc.Sobol(d=1, scramble=True, seed=rng).random(size).ravel(), out=buf)
+    else:
+        rng.standard_normal(out=buf)
+    return buf
+
+
+def run_monte_carlo_batch(mu, sigma, point_threshold, num_simulations=100_000, rng=None,
+                          sampling="random"):
+    """
+    Vectorized run_monte_carlo_simulation (normal model): arrays (or scalars)
+    of mu, sigma and threshold, broadcast together, evaluated from one shared
+    buffer of `num_simulations` standard-normal draws (rounded up to a power
+    of two for Sobol sampling). Returns an array of P(points > threshold)
+    shaped like the broadcast inputs.
+    """
+    if sampling not in SAMPLING:
+        raise ValueError(f"unknown sampling {sampling!r}; expected one of {SAMPLING}")
+    if sampling == "sobol":
+        num_simulations = 2 ** math.ceil(math.log2(num_simulations))
+    mu, sigma, threshold = np.broadcast_arrays(
+        np.asarray(mu, dtype=float), np.asarray(sigma, dtype=float), np.asarray(point_threshold, dtype=float))
+    shape = mu.shape
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cutoffs = ((threshold - mu) / sigma).ravel()     # sigma 0: ±inf, or nan (never over) at mu
+    z = _standard_normals(num_simulations, rng or _generator(), sampling)
+
+    rows = max(1, BATCH_CHUNK_BYTES // num_simulations)
+    over = np.empty(len(cutoffs))
+    for start in range(0, len(cutoffs), rows):
+        block = cutoffs[start:start + rows]
+        over[start:start + rows] = np.count_nonzero(z > block[:, None], axis=1)
+    return (over / num_simulations).reshape(shape)
+
+
+def probabilities(mu, sigma, point_threshold, model="normal", method="auto",
+                  skew=0.0, samples=None, num_simulations=100_000, rng=None,
+                  sampling="random", tolerance=None):
+    """
+    probability() for many lines in one call: array-like mu, sigma,
+    threshold and skew (broadcast together); `samples` and `tolerance` apply
+    to every line. Returns {"probability": array, "model", "method",
+    "backend"}. Normal and Poisson lines are evaluated as arrays (closed
+    form, or run_monte_carlo_batch for simulated normals without a
+    tolerance); other models fall back to one probability() call per line.
+    """
+    mu, sigma, threshold, skew = np.broadcast_arrays(
+        np.asarray(mu, dtype=float), np.asarray(sigma, dtype=float), np.asarray(point_threshold, dtype=float),
+        np.asarray(skew, dtype=float))
+    if method in ("auto", ANALYTIC) and model == "normal":
+        p = stats.norm.sf(threshold, loc=mu, scale=sigma)
+        return {"probability": p, "model": model, "method": ANALYTIC, "backend": "scipy"}
+    if method in ("auto", ANALYTIC) and model == "poisson":
+        p = stats.poisson.sf(np.floor(threshold), np.maximum(mu, 0.5))
+        return {"probability": p, "model": model, "method": ANALYTIC, "backend": "scipy"}
+    if method == SIMULATION and model == "normal" and tolerance is None:
+        p = run_monte_carlo_batch(mu, sigma, threshold, num_simulations, rng, sampling)
+        return {"probability": p, "model": model, "method": SIMULATION, "backend": "numpy"}
+
+    results = [
+        probability(m, s, t, model=model, method=method, skew=k, samples=samples,
+                    num_simulations=num_simulations, rng=rng, sampling=sampling, tolerance=tolerance)
+        for m, s, t, k in zip(mu.ravel(), sigma.ravel(), threshold.ravel(), skew.ravel())
+    ]
+    p = np.array([r["probability"] for r in results]).reshape(mu.shape)
+    summary = {"probability": p}
+    for field, default in (("model", model), ("method", method), ("backend", None)):
+        values = {r[field] for r in results} or {default}
+        summary[field] = values.pop() if len(values) == 1 else "mixed"
+    return summary
+
+
+def points_distribution(player_name, max_games=MAX_GAMES):
+    """
+    (mu, sigma) of the player's points over the `max_games` most recent games
+    – the threshold-independent half of monte_carlo_for_player – or None if
+    no data is found.
+    """
+    player_id = static_index.player_id_from_name(player_name)
+    games = 0
+    if player_id is not None:
+        try:
+            df = nba_cache.get_player_gamelog(player_id, get_current_season())
+        except Exception as e:
+            print(f"[monte_carlo] Error fetching logs for {player_name}: {e}")
+        else:
+            games, mu, sigma = rolling_stats.last_n(df, max_games)
+    if not games:
+        print(f"[monte_carlo] No data for player: {player_name}.")
+        return None
+
+    print(f"[monte_carlo] Found {games} games for {player_name}")
+    if sigma is None or sigma < 0.0001:
+        sigma = 0.5
+    return mu, sigma
+
+
+def probability_over(mu, sigma, point_threshold,
+                     distribution="normal",
+                     num_simulations=100_000):
+    """P(points > point_threshold) for a points_distribution() result (see probability())."""
+    print(f"[monte_carlo] P(over): μ={mu:.2f}, σ={sigma:.2f}, threshold={point_threshold}, model={distribution}")
+    return probability(mu, sigma, point_threshold, model=distribution,
+                       num_simulations=num_simulations)["probability"]
+
+
 def monte_carlo_for_player(player_name,
                            point_threshold,
                            distribution="normal",
@@ -66,8 +383,8 @@ def monte_carlo_for_player(player_name,
     Parameters:
       - player_name (str)
       - point_threshold (float): **required**; no more default of 25
-      - distribution (str): "normal" or "poisson"
-      - num_simulations (int): how many samples to draw
+      - distribution (str): a probability() model, e.g. "normal" or "poisson"
+      - num_simulations (int): how many samples to draw if it is simulated
 
     Returns:
       - probability (float) or None if no data
@@ -79,26 +396,10 @@ def monte_carlo_for_player(player_name,
         print(f"[monte_carlo] ERROR: invalid threshold {point_threshold}")
         return None
 
-    player_points = get_player_game_data(player_name)
-    if not player_points:
-        print(f"[monte_carlo] No data for player: {player_name}.")
+    params = points_distribution(player_name)
+    if params is None:
         return None
-
-    mu    = float(np.mean(player_points))
-    sigma = float(np.std(player_points, ddof=1))
-    if sigma < 0.0001:
-        sigma = 0.5
-
-    print(f"[monte_carlo] Running MC: μ={mu:.2f}, σ={sigma:.2f}, threshold={point_threshold}")
-    if _ocaml_mc:
-        # call into OCaml for a pure-C binding
-        prob = _ocaml_mc.monte_carlo(mu, sigma, point_threshold, num_simulations)
-    else:
-        # fallback to Python NumPy version
-        prob = run_monte_carlo_simulation(
-            mu, sigma,
-            point_threshold=point_threshold,
-            num_simulations=num_simulations,
-            distribution=distribution
-        )
-    return prob
+    mu, sigma = params
+    return probability_over(mu, sigma, point_threshold,
+                            distribution=distribution,
+                            num_simulations=num_simulations)
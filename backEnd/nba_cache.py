@@ -2,16 +2,59 @@
 NBA API Caching Module
 Provides in-memory caching and retry logic for NBA API calls
 to prevent rate limiting and improve performance.
+
+Every entry carries its own TTL (short for the current season, long for
+finished seasons) and the whole cache is bounded by an approximate memory
+budget; the least-recently-used entries are evicted first.
+
+Game logs and career stats are also written to a SQLite file so a
+fresh container (Cloud Run cold start) can serve them without going back to
+stats.nba.com. Finished seasons are stored permanently. The file must live on
+a real volume (Cloud Run's /tmp is memory), so the disk store is only on when
+NBA_CACHE_DB names one; at boot it is pruned of long-expired entries and, oldest
+first, down to its size budget.
+
+When a current-season game log expires it is refreshed incrementally: only
+games on/after the newest GAME_DATE already held are requested (nba_api's
+date_from_nullable) and appended to the cached frame.
+
+`ingest_league_gamelogs()` warms every player and team log of a season from
+two LeagueGameLog calls instead of one PlayerGameLog call per player.
+
+Env vars:
+  NBA_CACHE_MAX_MB          memory budget for all cached frames   (default 256)
+  NBA_CACHE_CURRENT_TTL     seconds, current-season entries       (default 900)
+  NBA_CACHE_PAST_TTL        seconds, finished-season entries      (default 7 days)
+  NBA_CACHE_DB              SQLite file on a mounted volume (unset: no on-disk backend)
+  NBA_CACHE_DISK            set to "0" to disable the on-disk backend
+  NBA_CACHE_DISK_MAX_MB     size budget of the SQLite file's entries    (default 1024)
+  NBA_CACHE_DISK_MAX_AGE    seconds an expired entry is kept on disk    (default 7 days)
+  NBA_CACHE_INCREMENTAL     set to "0" to always refetch whole seasons on expiry
 """
+import os
+import sys
+import time
+import pickle
+import logging
+import sqlite3
+import datetime
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
 
-# ----  GLOBAL CACHES  ---------------------------------------------------
-_player_info_cache   = {}           # player_name -> (player_id, team_id)
-_player_gamelog_df_cache = {}       # player_id -> full pd.DataFrame
-_team_gamelog_df_cache   = {}       # team_id -> full pd.DataFrame
+import rate_limiter
+import singleflight
+
+logger = logging.getLogger(__name__)
 
 # ----  ONE SHARED HTTP SESSION WITH RETRY / BACK-OFF  -------------------
-from requests.adapters import HTTPAdapter, Retry
+from requests.adapters import Retry
 from nba_api.stats.library.http import NBAStatsHTTP
+from nba_api.stats.endpoints import PlayerGameLog, TeamGameLog
+from nba_api.stats.endpoints import playercareerstats
+from nba_api.stats.endpoints import ScoreboardV2, LeagueGameLog
 
 retry = Retry(
     total=6,                 # 6 attempts max
@@ -20,27 +63,596 @@ retry = Retry(
     allowed_methods=["GET"],
 )
 
-# Get the global session that all nba_api endpoints reuse
-session = NBAStatsHTTP().get_session()
-
-# Attach retry adapter
-session.mount("https://", HTTPAdapter(max_retries=retry))
-session.mount("http://", HTTPAdapter(max_retries=retry))
+# Attach the retry + rate-limit adapter to the global session that all
+# nba_api endpoints reuse: every call takes a token from the shared
+# stats.nba.com bucket first, so retries are a last resort, not the throttle
+session = rate_limiter.install_nba_api(retry)
 
 # Increase timeout for every endpoint
 NBAStatsHTTP.TIMEOUT = 30
 
-def clear_cache():
+# ----  CACHE POLICY  ----------------------------------------------------
+MAX_BYTES        = int(float(os.getenv("NBA_CACHE_MAX_MB", "256")) * 1024 * 1024)
+CURRENT_TTL      = int(os.getenv("NBA_CACHE_CURRENT_TTL", "900"))          # 15 min
+PAST_TTL         = int(os.getenv("NBA_CACHE_PAST_TTL", str(7 * 24 * 3600)))  # 7 days
+SCOREBOARD_TTL   = 300
+
+# cache "kinds" – one namespace per upstream endpoint
+PLAYER_GAMELOG = "player_gamelog"    # (player_id, season, season_type) -> pd.DataFrame
+TEAM_GAMELOG   = "team_gamelog"      # (team_id, season, season_type)   -> pd.DataFrame
+CAREER_STATS   = "career_stats"      # (player_id, current season)      -> pd.DataFrame
+SCOREBOARD     = "scoreboard"        # game_date (MM/DD/YYYY)           -> pd.DataFrame
+LEAGUE_GAMELOG = "league_gamelog"    # (season, season_type, "P"|"T")   -> pd.DataFrame
+DERIVED        = "derived"           # (index name, key)                -> indexes built from the above
+KINDS = (PLAYER_GAMELOG, TEAM_GAMELOG, CAREER_STATS, SCOREBOARD,
+         LEAGUE_GAMELOG, DERIVED)
+PERSISTENT_KINDS = (PLAYER_GAMELOG, TEAM_GAMELOG, CAREER_STATS, LEAGUE_GAMELOG, DERIVED)
+
+DISK_PATH      = os.getenv("NBA_CACHE_DB")
+DISK_ENABLED   = bool(DISK_PATH) and os.getenv("NBA_CACHE_DISK", "1") != "0"
+DISK_MAX_BYTES = int(float(os.getenv("NBA_CACHE_DISK_MAX_MB", "1024")) * 1024 * 1024)
+DISK_MAX_AGE   = int(os.getenv("NBA_CACHE_DISK_MAX_AGE", str(7 * 24 * 3600)))
+INCREMENTAL    = os.getenv("NBA_CACHE_INCREMENTAL", "1") != "0"
+
+
+def current_season():
+    now = datetime.datetime.now()
+    start = now.year if now.month >= 10 else now.year - 1
+    return f"{start}-{str(start + 1)[-2:]}"
+
+
+def ttl_for_season(season):
+    """Finished seasons never change, so they can live much longer."""
+    return CURRENT_TTL if season == current_season() else PAST_TTL
+
+
+def _sizeof(value, seen=None):
+    """
+    Approximate in-memory footprint of a cached value (bytes). Derived indexes
+    are nested dicts/lists of frames, arrays and numbers, so containers are
+    walked; an object reachable twice is counted once.
+    """
+    if seen is None:
+        seen = set()
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        usage = value.memory_usage(index=True, deep=True)
+        return int(usage.sum()) if isinstance(value, pd.DataFrame) else int(usage)
+    if isinstance(value, np.ndarray):
+        return sys.getsizeof(value) + (value.nbytes if value.base is not None else 0)
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(_sizeof(k, seen) + _sizeof(v, seen) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(_sizeof(item, seen) for item in value)
+    return size
+
+
+class _TTLCache:
+    """
+    Thread-safe LRU cache bounded by an approximate memory budget.
+    Keys are (kind, key) tuples so every endpoint shares the same budget.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._data = OrderedDict()      # (kind, key) -> (value, expires_at, size)
+        self._bytes = 0
+        self._lock = threading.RLock()
+        self._stats = {kind: {"hits": 0, "misses": 0} for kind in KINDS}
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, kind, key):
+        # Expired entries are reported as misses but kept (until replaced or
+        # LRU-evicted) so they can serve as the base of an incremental refresh.
+        with self._lock:
+            entry = self._data.get((kind, key))
+            if entry is not None and entry[1] < time.monotonic():
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self._stats[kind]["misses"] += 1
+                return None
+            self._data.move_to_end((kind, key))
+            self._stats[kind]["hits"] += 1
+            return entry[0]
+
+    def live(self, kind, key):
+        """Return the value only if unexpired, without touching stats or LRU order."""
+        with self._lock:
+            entry = self._data.get((kind, key))
+            return entry[0] if entry is not None and entry[1] >= time.monotonic() else None
+
+    def peek(self, kind, key):
+        """Return the stored value even if expired, without touching stats or LRU order."""
+        with self._lock:
+            entry = self._data.get((kind, key))
+            return entry[0] if entry is not None else None
+
+    def set(self, kind, key, value, ttl):
+        size = _sizeof(value)
+        with self._lock:
+            if (kind, key) in self._data:
+                self._drop((kind, key))
+            if size > self.max_bytes:
+                return                                   # would evict everything – don't cache
+            self._data[(kind, key)] = (value, time.monotonic() + ttl, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._data))
+                self._drop(oldest)
+                self.evictions += 1
+
+    def _drop(self, full_key):
+        _, _, size = self._data.pop(full_key)
+        self._bytes -= size
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            counts = {kind: 0 for kind in KINDS}
+            for kind, _ in self._data:
+                counts[kind] += 1
+            hits = sum(s["hits"] for s in self._stats.values())
+            misses = sum(s["misses"] for s in self._stats.values())
+            return {
+                "counts": counts,
+                "by_kind": {kind: dict(s) for kind, s in self._stats.items()},
+                "hits": hits,
+                "misses": misses,
+                "hit_rate": hits / (hits + misses) if hits + misses else None,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "entries": len(self._data),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+
+class _DiskStore:
+    """
+    SQLite persistence for cache entries, shared by every gunicorn worker on
+    the same disk. `expires_at` is wall-clock seconds; NULL means permanent.
+    Failures are logged and treated as misses – the disk is only an accelerator.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._conn = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.writes = 0
+
+    def _connection(self):
+        # one connection per process (workers fork after import)
+        if self._conn is None or self._pid != os.getpid():
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                " kind TEXT NOT NULL, key TEXT NOT NULL, value BLOB NOT NULL,"
+                " stored_at REAL NOT NULL, expires_at REAL,"
+                " PRIMARY KEY (kind, key))"
+            )
+            conn.commit()
+            self._conn, self._pid = conn, os.getpid()
+        return self._conn
+
+    def get(self, kind, key, include_expired=False):
+        """Return (value, expires_at) for a live entry, else None."""
+        try:
+            with self._lock:
+                row = self._connection().execute(
+                    "SELECT value, expires_at FROM entries WHERE kind = ? AND key = ?",
+                    (kind, repr(key)),
+                ).fetchone()
+        except (sqlite3.Error, OSError) as e:
+            logger.warning(f"[nba_cache] disk read failed for {kind} {key}: {e}")
+            return None
+        if row is None:
+            return None
+        if row[1] is not None and row[1] < time.time():
+            if not include_expired:
+                return None
+        else:
+            self.hits += 1
+        return pickle.loads(row[0]), row[1]
+
+    def set(self, kind, key, value, expires_at):
+        try:
+            blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+            with self._lock:
+                conn = self._connection()
+                conn.execute(
+                    "INSERT OR REPLACE INTO entries (kind, key, value, stored_at, expires_at)"
+                    " VALUES (?, ?, ?, ?, ?)",
+                    (kind, repr(key), blob, time.time(), expires_at),
+                )
+                conn.commit()
+            self.writes += 1
+        except (sqlite3.Error, OSError) as e:
+            logger.warning(f"[nba_cache] disk write failed for {kind} {key}: {e}")
+
+    def live_entries(self):
+        """Yield (kind, key_repr, value, expires_at) for every unexpired entry, oldest first."""
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT kind, key, value, expires_at FROM entries"
+                " WHERE expires_at IS NULL OR expires_at > ? ORDER BY stored_at",
+                (time.time(),),
+            ).fetchall()
+        for kind, key, blob, expires_at in rows:
+            yield kind, key, pickle.loads(blob), expires_at
+
+    def prune(self, max_bytes, max_age):
+        """
+        Delete entries that expired more than `max_age` seconds ago (expired
+        ones are kept that long as bases for incremental refreshes), then the
+        oldest – permanent ones included – until the stored values fit in
+        `max_bytes`. Returns the number of entries deleted.
+        """
+        with self._lock:
+            conn = self._connection()
+            deleted = conn.execute(
+                "DELETE FROM entries WHERE expires_at IS NOT NULL AND expires_at < ?",
+                (time.time() - max_age,),
+            ).rowcount
+            total = conn.execute("SELECT COALESCE(SUM(LENGTH(value)), 0) FROM entries").fetchone()[0]
+            if total > max_bytes:
+                drop = []
+                for kind, key, size in conn.execute(
+                        "SELECT kind, key, LENGTH(value) FROM entries ORDER BY stored_at").fetchall():
+                    if total <= max_bytes:
+                        break
+                    drop.append((kind, key))
+                    total -= size
+                conn.executemany("DELETE FROM entries WHERE kind = ? AND key = ?", drop)
+                deleted += len(drop)
+            conn.commit()
+        return deleted
+
+    def clear(self):
+        with self._lock:
+            conn = self._connection()
+            conn.execute("DELETE FROM entries")
+            conn.commit()
+
+
+_cache = _TTLCache(MAX_BYTES)
+_disk = _DiskStore(DISK_PATH) if DISK_ENABLED else None
+_fetches = singleflight.Group("nba_cache")       # one in-flight upstream call per entry
+
+
+def _memory_ttl(expires_at, ttl):
+    """Seconds an entry restored from disk may stay in memory."""
+    if expires_at is None:
+        return ttl
+    return min(ttl, max(0.0, expires_at - time.time()))
+
+
+def _stale_value(kind, key):
+    """Most recent (possibly expired) value held in memory or on disk, or None."""
+    value = _cache.peek(kind, key)
+    if value is None and _disk is not None and kind in PERSISTENT_KINDS:
+        stored = _disk.get(kind, key, include_expired=True)
+        value = stored[0] if stored is not None else None
+    return value
+
+
+def _cached(kind, key, ttl, fetch, permanent=False, refresh=None):
+    """
+    Return the cached value for (kind, key): memory first, then disk, and only
+    then `fetch()` from upstream. `permanent` entries never expire on disk.
+    If `refresh(stale_value)` is given and an expired value is still held, it
+    is used instead of a full `fetch()`.
+    """
+    value = _cache.get(kind, key)
+    if value is not None:
+        return value
+
+    if _disk is not None and kind in PERSISTENT_KINDS:
+        stored = _disk.get(kind, key)
+        if stored is not None:
+            value, expires_at = stored
+            _cache.set(kind, key, value, _memory_ttl(expires_at, ttl))
+            return value
+
+    def load():
+        # a caller that led an earlier flight may have stored it meanwhile
+        value = _cache.live(kind, key)
+        if value is not None:
+            return value
+        stale = _stale_value(kind, key) if refresh is not None else None
+        value = refresh(stale) if stale is not None else fetch()
+        _store(kind, key, value, ttl, permanent)
+        return value
+
+    # concurrent misses for the same entry share one upstream call
+    value, _ = _fetches.do((kind, key), load)
+    return value
+
+
+def _store(kind, key, value, ttl, permanent=False):
+    _cache.set(kind, key, value, ttl)
+    if _disk is not None and kind in PERSISTENT_KINDS:
+        _disk.set(kind, key, value, None if permanent else time.time() + ttl)
+
+
+def _is_finished(season):
+    return season != current_season()
+
+
+# ----  INCREMENTAL GAME-LOG REFRESH  --------------------------------------
+def _newest_game_date(df):
+    # read from the held frame itself, so it lives and is evicted with the entry
+    if df.empty:
+        return None
+    return pd.to_datetime(df["GAME_DATE"], format="%b %d, %Y").max()
+
+
+def _merge_new_games(base, fetch_since):
+    """
+    Append games on/after the newest GAME_DATE in `base` (newest-first frame)
+    using `fetch_since("MM/DD/YYYY")`. The boundary day is requested again and
+    de-duplicated on Game_ID, so a game finishing late that night is not lost.
+    """
+    latest = _newest_game_date(base)
+    if latest is None:
+        return None
+    new = fetch_since(latest.strftime("%m/%d/%Y"))
+    new = new[~new["Game_ID"].isin(base["Game_ID"])]
+    if new.empty:
+        return base
+    return pd.concat([new, base], ignore_index=True)
+
+
+def _incremental(fetch_since):
+    """Build a `refresh` callback for `_cached` (None when disabled)."""
+    if not INCREMENTAL:
+        return None
+
+    def refresh(base):
+        merged = _merge_new_games(base, fetch_since) if not base.empty else None
+        return merged if merged is not None else fetch_since("")
+
+    return refresh
+
+
+# ----  CACHED ENDPOINTS  ------------------------------------------------
+def get_player_gamelog(player_id, season, season_type="Regular Season"):
+    """
+    Return the PlayerGameLog frame for (player_id, season, season_type).
+
+    Only the first lookup of a key goes to stats.nba.com; every later caller
+    (player_analyzer, monte_carlo, volatility, ...) shares the same frame, so
+    treat it as read-only and copy before mutating. Once the entry expires only
+    games newer than the ones held are fetched.
+    """
+    key = (int(player_id), season, season_type)
+
+    def fetch_since(date_from=""):
+        return PlayerGameLog(
+            player_id=player_id,
+            season=season,
+            season_type_all_star=season_type,
+            date_from_nullable=date_from
+        ).get_data_frames()[0]
+
+    return _cached(
+        PLAYER_GAMELOG, key, ttl_for_season(season), fetch_since,
+        permanent=_is_finished(season),
+        refresh=_incremental(fetch_since),
+    )
+
+
+def get_team_gamelog(team_id, season, season_type="Regular Season"):
+    """Return the (shared, read-only) TeamGameLog frame for a team/season."""
+    key = (int(team_id), season, season_type)
+
+    def fetch_since(date_from=""):
+        return TeamGameLog(
+            team_id=team_id,
+            season=season,
+            season_type_all_star=season_type,
+            date_from_nullable=date_from
+        ).get_data_frames()[0]
+
+    return _cached(
+        TEAM_GAMELOG, key, ttl_for_season(season), fetch_since,
+        permanent=_is_finished(season),
+        refresh=_incremental(fetch_since),
+    )
+
+
+# ----  LEAGUE-WIDE BULK INGEST  -------------------------------------------
+# LeagueGameLog columns that are named differently in PlayerGameLog/TeamGameLog
+_PLAYER_LOG_RENAMES = {"PLAYER_ID": "Player_ID", "GAME_ID": "Game_ID"}
+_TEAM_LOG_RENAMES   = {"TEAM_ID": "Team_ID", "GAME_ID": "Game_ID"}
+_PLAYER_LOG_COLUMNS = [
+    "SEASON_ID", "Player_ID", "Game_ID", "GAME_DATE", "MATCHUP", "WL", "MIN",
+    "FGM", "FGA", "FG_PCT", "FG3M", "FG3A", "FG3_PCT", "FTM", "FTA", "FT_PCT",
+    "OREB", "DREB", "REB", "AST", "STL", "BLK", "TOV", "PF", "PTS", "PLUS_MINUS",
+    "VIDEO_AVAILABLE",
+]
+_TEAM_LOG_COLUMNS = [
+    "Team_ID", "Game_ID", "GAME_DATE", "MATCHUP", "WL", "W", "L", "W_PCT", "MIN",
+    "FGM", "FGA", "FG_PCT", "FG3M", "FG3A", "FG3_PCT", "FTM", "FTA", "FT_PCT",
+    "OREB", "DREB", "REB", "AST", "STL", "BLK", "TOV", "PF", "PTS",
+]
+
+
+def get_league_gamelog(season=None, season_type="Regular Season", player_or_team="P"):
+    """Return the whole league's LeagueGameLog for a season ("P" players, "T" teams)."""
+    season = season or current_season()
+    return _cached(
+        LEAGUE_GAMELOG, (season, season_type, player_or_team), ttl_for_season(season),
+        lambda: LeagueGameLog(
+            season=season,
+            season_type_all_star=season_type,
+            player_or_team_abbreviation=player_or_team
+        ).get_data_frames()[0],
+        permanent=_is_finished(season),
+    )
+
+
+def _to_per_entity_logs(league_df, id_col, renames, columns):
+    """
+    Split a LeagueGameLog frame into {entity_id: frame} shaped like the
+    per-entity endpoint: same column names, GAME_DATE as "APR 13, 2025",
+    newest game first.
+    """
+    df = league_df.rename(columns=renames)
+    dates = pd.to_datetime(df["GAME_DATE"])
+    df = df.assign(GAME_DATE=dates.dt.strftime("%b %d, %Y").str.upper(), _date=dates)
+    df = df.sort_values(["_date", "Game_ID"], ascending=False).reset_index(drop=True)
+
+    if "W" in columns:
+        # TeamGameLog carries the running record; rebuild it oldest → newest
+        wins = (df["WL"] == "W").astype(int)[::-1].groupby(df[id_col][::-1]).cumsum()
+        losses = (df["WL"] == "L").astype(int)[::-1].groupby(df[id_col][::-1]).cumsum()
+        df = df.assign(W=wins, L=losses)
+        df["W_PCT"] = (df["W"] / (df["W"] + df["L"])).round(3)
+
+    keep = [c for c in columns if c in df.columns]
+    logs = {}
+    for entity_id, frame in df.groupby(id_col, sort=False):
+        logs[int(entity_id)] = frame[keep].reset_index(drop=True)
+    return logs
+
+
+def ingest_league_gamelogs(season=None, season_type="Regular Season"):
+    """
+    Warm every player and team game log for a season from two LeagueGameLog
+    calls, storing each one exactly where get_player_gamelog()/get_team_gamelog()
+    look for it. Returns {"players": n, "teams": m}.
+    """
+    season = season or current_season()
+    ttl = ttl_for_season(season)
+    permanent = _is_finished(season)
+    counts = {}
+    for code, kind, id_col, renames, columns in (
+        ("P", PLAYER_GAMELOG, "Player_ID", _PLAYER_LOG_RENAMES, _PLAYER_LOG_COLUMNS),
+        ("T", TEAM_GAMELOG,   "Team_ID",   _TEAM_LOG_RENAMES,   _TEAM_LOG_COLUMNS),
+    ):
+        league_df = get_league_gamelog(season, season_type, code)
+        logs = _to_per_entity_logs(league_df, id_col, renames, columns) if not league_df.empty else {}
+        for entity_id, frame in logs.items():
+            key = (entity_id, season, season_type)
+            _store(kind, key, frame, ttl, permanent)
+        counts["players" if code == "P" else "teams"] = len(logs)
+    logger.info(f"[nba_cache] ingested {counts} logs for {season} {season_type}")
+    return counts
+
+
+def get_player_career_stats(player_id):
+    """
+    Return the season-totals frame from PlayerCareerStats.
+
+    Stored permanently per (player, current season): the list of seasons it
+    is used for only changes when a new season starts, which changes the key.
+    """
+    return _cached(
+        CAREER_STATS, (int(player_id), current_season()), PAST_TTL,
+        lambda: playercareerstats.PlayerCareerStats(player_id=player_id).get_data_frames()[0],
+        permanent=True,
+    )
+
+
+def get_scoreboard(game_date):
+    """Return the ScoreboardV2 game_header frame for a MM/DD/YYYY date."""
+    return _cached(
+        SCOREBOARD, game_date, SCOREBOARD_TTL,
+        lambda: ScoreboardV2(game_date=game_date, league_id='00').game_header.get_data_frame()
+    )
+
+
+# ----  DERIVED INDEXES  -------------------------------------------------
+def get_derived(name, key):
+    """
+    Return a derived index (e.g. career-vs-opponent aggregates) stored with
+    set_derived(), from memory or the shared on-disk store; None if absent.
+    """
+    full_key = (name, key)
+    value = _cache.get(DERIVED, full_key)
+    if value is None and _disk is not None:
+        stored = _disk.get(DERIVED, full_key)
+        if stored is not None:
+            value, expires_at = stored
+            _cache.set(DERIVED, full_key, value, _memory_ttl(expires_at, PAST_TTL))
+    return value
+
+
+def set_derived(name, key, value, ttl=PAST_TTL, permanent=False):
+    """Store a derived index in memory and (so other workers see it) on disk."""
+    _store(DERIVED, (name, key), value, ttl, permanent)
+
+
+def load_persistent_cache():
+    """
+    Warm the in-memory cache from the on-disk store (call once at boot),
+    after pruning it to DISK_MAX_BYTES / DISK_MAX_AGE. Oldest entries are
+    loaded first, so if the disk holds more than the memory budget the most
+    recently stored ones are what stays resident.
+    Returns the number of entries loaded.
+    """
+    if _disk is None:
+        return 0
+    import ast
+    loaded = 0
+    try:
+        pruned = _disk.prune(DISK_MAX_BYTES, DISK_MAX_AGE)
+        if pruned:
+            logger.info(f"[nba_cache] pruned {pruned} entries from {DISK_PATH}")
+        for kind, key_repr, value, expires_at in _disk.live_entries():
+            if kind not in PERSISTENT_KINDS:
+                continue
+            key = ast.literal_eval(key_repr)
+            season = key[1] if isinstance(key, tuple) and len(key) > 1 else key
+            _cache.set(kind, key, value, _memory_ttl(expires_at, ttl_for_season(season)))
+            loaded += 1
+    except (sqlite3.Error, OSError, pickle.UnpicklingError) as e:
+        logger.warning(f"[nba_cache] could not load persistent cache from {DISK_PATH}: {e}")
+    logger.info(f"[nba_cache] loaded {loaded} entries from {DISK_PATH}")
+    return loaded
+
+
+def clear_cache(include_disk=False):
     """Clear all caches (useful for testing or memory management)"""
-    global _player_info_cache, _player_gamelog_df_cache, _team_gamelog_df_cache
-    _player_info_cache.clear()
-    _player_gamelog_df_cache.clear()
-    _team_gamelog_df_cache.clear()
+    _cache.clear()
+    if include_disk and _disk is not None:
+        _disk.clear()
+
 
 def get_cache_stats():
     """Return current cache statistics"""
+    stats = _cache.stats()
+    counts = stats.pop("counts")
     return {
-        "player_info_count": len(_player_info_cache),
-        "player_gamelog_count": len(_player_gamelog_df_cache),
-        "team_gamelog_count": len(_team_gamelog_df_cache)
+        "player_gamelog_count": counts[PLAYER_GAMELOG],
+        "team_gamelog_count": counts[TEAM_GAMELOG],
+        "career_stats_count": counts[CAREER_STATS],
+        "scoreboard_count": counts[SCOREBOARD],
+        "league_gamelog_count": counts[LEAGUE_GAMELOG],
+        "derived_count": counts[DERIVED],
+        **stats,
+        "disk_path": DISK_PATH if _disk is not None else None,
+        "disk_hits": _disk.hits if _disk is not None else 0,
+        "disk_writes": _disk.writes if _disk is not None else 0,
+        "singleflight": _fetches.stats(),
     }
+
+
+if __name__ == "__main__":
+    # slate warm-up: python nba_cache.py [season]
+    logging.basicConfig(level=logging.INFO)
+    print(ingest_league_gamelogs(sys.argv[1] if len(sys.argv) > 1 else None))
+    print(get_cache_stats())
@@ -0,0 +1,131 @@
+"""
+Career-vs-opponent index
+Per-(player, opponent) scoring aggregates so `careerAvgVsOpponent` is a dict
+lookup instead of one PlayerGameLog call (plus a sleep) per career season.
+
+The index for a player is built once from the historical game logs, stored
+through nba_cache (so it survives restarts and is shared by workers) and then
+updated incrementally: every season remembers which Game_IDs it has already
+folded in, so new games are added exactly once.
+
+Updates of one player are coalesced (single-flight per player_id) and built
+on a copy that replaces the stored index, so a reader never sees an index
+change under it and updates of different players do not wait on each other.
+"""
+import logging
+
+import nba_cache
+import singleflight
+
+logger = logging.getLogger(__name__)
+
+_INDEX_NAME = "opponent_index"
+_builds = singleflight.Group(_INDEX_NAME)
+
+
+def _empty_aggregate():
+    return {
+        "points": 0, "games": 0, "minutes": 0,
+        "home_points": 0, "home_games": 0,
+        "away_points": 0, "away_games": 0,
+    }
+
+
+def _parse_matchup(matchup):
+    """'IND vs. BOS' -> ('BOS', True); 'IND @ BOS' -> ('BOS', False); else (None, None)."""
+    if " vs. " in matchup:
+        return matchup.split(" vs. ")[1], True
+    if " @ " in matchup:
+        return matchup.split(" @ ")[1], False
+    return None, None
+
+
+def _parse_minutes(raw_min):
+    if isinstance(raw_min, str) and ":" in raw_min:
+        return int(raw_min.split(":")[0])
+    return int(raw_min) if raw_min else 0
+
+
+def record_game(index, season, game_id, matchup, points, minutes):
+    """Fold one finished game into `index` (no-op if already counted)."""
+    folded = index["folded"].setdefault(season, set())
+    if game_id in folded:
+        return False
+    opp, home = _parse_matchup(matchup)
+    if opp is None:
+        return False
+    agg = index["opponents"].setdefault(opp, _empty_aggregate())
+    points = int(points)
+    agg["points"] += points
+    agg["games"] += 1
+    agg["minutes"] += _parse_minutes(minutes)
+    side = "home" if home else "away"
+    agg[f"{side}_points"] += points
+    agg[f"{side}_games"] += 1
+    folded.add(game_id)
+    return True
+
+
+def _fold_log(index, season, df):
+    """Fold every game of a season log not yet counted; returns how many were added."""
+    if df is None or df.empty:
+        return 0
+    added = 0
+    for game_id, matchup, pts, minutes in zip(df["Game_ID"], df["MATCHUP"], df["PTS"], df["MIN"]):
+        added += record_game(index, season, game_id, matchup, pts, minutes)
+    return added
+
+
+def _load(player_id):
+    """Return (index, is_new) for a player; the index is a copy safe to fold into."""
+    index = nba_cache.get_derived(_INDEX_NAME, int(player_id))
+    if index is None:
+        return {"folded": {}, "opponents": {}}, True
+    return {
+        "folded": {season: set(ids) for season, ids in index["folded"].items()},
+        "opponents": {opp: dict(agg) for opp, agg in index["opponents"].items()},
+    }, False
+
+
+def build_player_index(player_id, seasons):
+    """
+    Make sure every season in `seasons` (e.g. career_df["SEASON_ID"].unique())
+    is folded into the player's index. Finished seasons are fetched once ever;
+    the current season only contributes games not seen before.
+    """
+    player_id = int(player_id)
+    seasons = list(seasons)
+    index, shared = _builds.do(player_id, _update, player_id, seasons)
+    if shared and not set(seasons) <= set(index["folded"]):
+        # joined an update that covered other seasons
+        index, _ = _builds.do(player_id, _update, player_id, seasons)
+    return index
+
+
+def _update(player_id, seasons):
+    current = nba_cache.current_season()
+    index, is_new = _load(player_id)
+    changed = 0
+    for season in seasons:
+        finished = season != current
+        if finished and season in index["folded"]:
+            continue
+        try:
+            df = nba_cache.get_player_gamelog(player_id, season)
+        except Exception as e:
+            logger.warning(f"[opponent_index] {player_id} {season}: {e}")
+            continue
+        changed += _fold_log(index, season, df)
+        index["folded"].setdefault(season, set())
+    if changed or is_new:
+        nba_cache.set_derived(_INDEX_NAME, player_id, index, permanent=True)
+    return index
+
+
+def career_avg_vs_opponent(player_id, opponent_abbr, seasons):
+    """Career points per game vs `opponent_abbr`, or None if they never met."""
+    index = build_player_index(player_id, seasons)
+    agg = index["opponents"].get(opponent_abbr)
+    if not agg or not agg["games"]:
+        return None
+    return float(agg["points"] / agg["games"])
@@ -0,0 +1,244 @@
+"""
+Running per-player season aggregates
+For every (player, season, season type) this keeps games, sums and sums of
+squares of the box-score stats – overall and per home / away split – so
+season averages, variances and usage inputs are read in O(1) instead of
+being recomputed over the whole game log.
+
+Aggregates are stored through nba_cache (shared by workers, kept across
+restarts). A newly Final game is folded in with observe_game() from
+check_active_players, and sync() folds in whatever a freshly fetched log
+holds that has not been counted yet; like opponent_index, every aggregate
+remembers its Game_IDs, so a game is counted exactly once however many
+paths report it. verify() recomputes from the log as an integrity check.
+
+    python player_aggregates.py [season]     # nightly: sync + verify every player
+"""
+import sys
+import logging
+import threading
+
+import nba_cache
+
+logger = logging.getLogger(__name__)
+
+_INDEX_NAME = "player_aggregates"
+_lock = threading.Lock()
+
+# PlayerGameLog columns aggregated (MIN counted in whole minutes, as everywhere else)
+STATS = ("PTS", "MIN", "FGM", "FGA", "FG3M", "FG3A", "FTM", "FTA", "TOV")
+SPLITS = ("all", "Home", "Away")
+# the same stats under BoxScoreTraditionalV2 PlayerStats names
+_BOX_SCORE_NAMES = {"TOV": "TO"}
+_GAME_TYPES = {"002": "Regular Season", "004": "Playoffs"}
+
+
+def _empty_split():
+    return {"games": 0, "sums": dict.fromkeys(STATS, 0.0), "squares": dict.fromkeys(STATS, 0.0)}
+
+
+def _empty():
+    return {"folded": set(), "splits": {split: _empty_split() for split in SPLITS}}
+
+
+def _location(matchup):
+    if " vs. " in matchup:
+        return "Home"
+    if " @ " in matchup:
+        return "Away"
+    return None
+
+
+def _minutes(raw_min):
+    """'34:12' / '34.000000:12' / 34 -> 34 (minute part only)."""
+    if isinstance(raw_min, str):
+        head = raw_min.split(":")[0].split(".")[0]
+        return int(head) if head.strip() else 0
+    return int(raw_min) if raw_min and raw_min == raw_min else 0
+
+
+def _values(row):
+    """Stat values of a log row / box-score row (missing stats count as 0)."""
+    values = {}
+    for stat in STATS:
+        raw = row.get(stat)
+        if raw is None and stat in _BOX_SCORE_NAMES:
+            raw = row.get(_BOX_SCORE_NAMES[stat])
+        if stat == "MIN":
+            values[stat] = _minutes(raw)
+        else:
+            values[stat] = float(raw) if raw is not None and raw == raw else 0.0
+    return values
+
+
+def record_game(agg, game_id, location, values):
+    """Fold one game into `agg` in O(1) (no-op if already counted)."""
+    if game_id in agg["folded"]:
+        return False
+    for split in ("all", location):
+        if split not in agg["splits"]:
+            continue
+        target = agg["splits"][split]
+        target["games"] += 1
+        for stat, value in values.items():
+            target["sums"][stat] += value
+            target["squares"][stat] += value * value
+    agg["folded"].add(game_id)
+    return True
+
+
+def _fold_log(agg, df):
+    """Fold every game of a log not yet counted; returns how many were added."""
+    if df is None or df.empty:
+        return 0
+    added = 0
+    for row in df.to_dict("records"):
+        added += record_game(agg, row["Game_ID"], _location(str(row.get("MATCHUP", ""))), _values(row))
+    return added
+
+
+def build(df):
+    """Full recompute of an aggregate from a game log."""
+    agg = _empty()
+    _fold_log(agg, df)
+    return agg
+
+
+def _key(player_id, season, season_type):
+    return int(player_id), season, season_type
+
+
+def _copy(agg):
+    # stored aggregates are shared with other threads: update a copy, then store it
+    return {
+        "folded": set(agg["folded"]),
+        "splits": {
+            split: {"games": s["games"], "sums": dict(s["sums"]), "squares": dict(s["squares"])}
+            for split, s in agg["splits"].items()
+        },
+    }
+
+
+def get(player_id, season, season_type="Regular Season"):
+    """The stored aggregate, built from the (cached) game log the first time."""
+    key = _key(player_id, season, season_type)
+    agg = nba_cache.get_derived(_INDEX_NAME, key)
+    if agg is not None:
+        return agg
+    return sync(player_id, season, season_type, nba_cache.get_player_gamelog(player_id, season, season_type))
+
+
+def sync(player_id, season, season_type, df):
+    """Fold the games of `df` not counted yet (a no-op when the log has nothing new)."""
+    key = _key(player_id, season, season_type)
+    with _lock:
+        stored = nba_cache.get_derived(_INDEX_NAME, key)
+        if df is None or df.empty:
+            return stored if stored is not None else _empty()      # nothing to fold (or a failed fetch)
+        if stored is not None and df["Game_ID"].isin(stored["folded"]).all():
+            return stored
+        agg = _copy(stored) if stored is not None else _empty()
+        _fold_log(agg, df)
+        nba_cache.set_derived(_INDEX_NAME, key, agg, permanent=True)
+    return agg
+
+
+def season_of_game(game_id):
+    """'0022500401' -> '2025-26'."""
+    start = int(game_id[3:5])
+    century = 1900 if start >= 46 else 2000
+    return f"{century + start}-{(start + 1) % 100:02d}"
+
+
+def observe_game(player_id, game_id, location, row):
+    """
+    Fold a newly Final game (a BoxScoreTraditionalV2 player row, or any
+    mapping with the STATS columns) into the player's aggregate. Only
+    players whose aggregate already exists are updated – the others are
+    built from their log when first needed. Returns True if the game was added.
+    """
+    season_type = _GAME_TYPES.get(str(game_id)[:3])
+    if season_type is None:
+        return False
+    key = _key(player_id, season_of_game(game_id), season_type)
+    with _lock:
+        stored = nba_cache.get_derived(_INDEX_NAME, key)
+        if stored is None or game_id in stored["folded"]:
+            return False
+        agg = _copy(stored)
+        record_game(agg, game_id, location, _values(row))
+        nba_cache.set_derived(_INDEX_NAME, key, agg, permanent=True)
+    return True
+
+
+def verify(player_id, season, season_type="Regular Season", df=None):
+    """
+    Integrity check: recompute from the game log and compare with the running
+    aggregate. A mismatch is logged and the recomputed aggregate replaces the
+    stored one. Returns True if they agreed (or the log is still behind games
+    observed from box scores, in which case the next run checks them).
+    """
+    if df is None:
+        df = nba_cache.get_player_gamelog(player_id, season, season_type)
+    key = _key(player_id, season, season_type)
+    fresh = build(df)
+    stored = sync(player_id, season, season_type, df)
+    if stored["folded"] != fresh["folded"]:
+        return True
+    agrees = all(
+        stored["splits"][split]["games"] == fresh["splits"][split]["games"]
+        and all(abs(stored["splits"][split][part][stat] - fresh["splits"][split][part][stat]) < 1e-6
+                for part in ("sums", "squares") for stat in STATS)
+        for split in SPLITS
+    )
+    if not agrees:
+        logger.warning(f"[player_aggregates] {key} drifted from its game log; recomputed")
+        with _lock:
+            nba_cache.set_derived(_INDEX_NAME, key, fresh, permanent=True)
+    return agrees
+
+
+def games(agg, split="all"):
+    return agg["splits"][split]["games"]
+
+
+def total(agg, stat, split="all"):
+    return agg["splits"][split]["sums"][stat]
+
+
+def mean(agg, stat, split="all"):
+    """Per-game average, or None without games."""
+    n = games(agg, split)
+    return agg["splits"][split]["sums"][stat] / n if n else None
+
+
+def variance(agg, stat, split="all", ddof=1):
+    """Variance from the running sums, or None with too few games."""
+    n = games(agg, split)
+    if n <= ddof:
+        return None
+    s = agg["splits"][split]
+    mean_sq = s["sums"][stat] ** 2 / n
+    return max(0.0, (s["squares"][stat] - mean_sq) / (n - ddof))
+
+
+def refresh_all(season=None, season_type="Regular Season"):
+    """
+    Nightly job: sync every player's aggregate with the league-wide log (one
+    LeagueGameLog call via nba_cache.ingest_league_gamelogs) and verify it.
+    Returns {"players": n, "drifted": m}.
+    """
+    season = season or nba_cache.current_season()
+    nba_cache.ingest_league_gamelogs(season, season_type)
+    league_df = nba_cache.get_league_gamelog(season, season_type, "P")
+    drifted = 0
+    player_ids = league_df["PLAYER_ID"].unique() if not league_df.empty else []
+    for player_id in player_ids:
+        drifted += not verify(player_id, season, season_type)
+    logger.info(f"[player_aggregates] refreshed {len(player_ids)} players, {drifted} drifted")
+    return {"players": len(player_ids), "drifted": drifted}
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    print(refresh_all(sys.argv[1] if len(sys.argv) > 1 else None))
@@ -1,14 +1,21 @@
-import requests
+import bisect
 import datetime
 import pytz
-import time
 import pandas as pd
-from nba_api.stats.endpoints import leaguestandings
-from nba_api.stats.static import teams, players
-from nba_api.stats.endpoints import ScoreboardV2 as Scoreboard
-from nba_api.stats.endpoints import playercareerstats, playergamelog
-from nba_api.stats.endpoints import PlayerGameLog
 from typing import Dict, Tuple, Union, Optional
+import nba_cache
+import opponent_index
+import schedule_index
+import standings_snapshot
+import static_index
+import fanout
+import player_identity
+import player_aggregates
+import asof_stats
+import rolling_stats
+import team_usage
+import timing
+from game_record import GameRecord
 
 
 
@@ -21,15 +28,14 @@ def get_player_image_url(player_id):
     return f"https://ak-static.cms.nba.com/wp-content/uploads/headshots/nba/latest/260x190/{player_id}.png"
 
 def player_image_loading(player_name):
-    nba_found = players.find_players_by_full_name(player_name)
-    if not nba_found:
+    nba_player_id = static_index.player_id_from_name(player_name)
+    if nba_player_id is None:
         return {"error": f"No matching NBA Stats player found for {player_name}"}
-    nba_player_id = nba_found[0]["id"]
     return get_player_image_url(nba_player_id)
 
 # Get team logo URL
 def get_team_logo_url(team_id):
-    return f"https://cdn.nba.com/logos/nba/{team_id}/global/L/logo.svg"
+    return static_index.team_logo_url(team_id)
 
 # Get Game Type from Game ID
 def deduce_game_type(game_id):
@@ -45,19 +51,11 @@ def deduce_game_type(game_id):
 
 
 def get_team_full_name_from_abbr(abbr):
-        all_teams = teams.get_teams()
-        for t in all_teams:
-            if t["abbreviation"] == abbr:
-                return t["full_name"]
-        return abbr
+    return static_index.team_full_name_from_abbr(abbr)
 
 
 def get_team_id_from_abbr(abbr):
-    all_teams = teams.get_teams()
-    for t in all_teams:
-        if t["abbreviation"] == abbr:
-            return t["id"]
-    return None
+    return static_index.team_id_from_abbr(abbr)
 
 
 def get_current_season():
@@ -71,14 +69,105 @@ def get_current_season():
     return f"{season_start}-{str(season_end)[-2:]}"
 
 
-def _slice_before_game(df, game_id):
+_MATCHUP_PATTERN = r'^.*? (vs\.|@) (.*)$'      # "IND vs. BOS" / "IND @ BOS"
+_LOCATIONS = {'vs.': 'Home', '@': 'Away'}
+
+
+def _parse_minutes(minutes):
+    """MIN column -> whole minutes (only the minute part of "MM:SS"; blanks -> 0)."""
+    if not pd.api.types.is_numeric_dtype(minutes):
+        minutes = minutes.astype(str).str.split(':').str[0]
+    return pd.to_numeric(minutes, errors='coerce').fillna(0).astype(int)
+
+
+def _game_columns(df):
     """
-    Return a sub-DF containing only rows BEFORE the supplied Game_ID.
-    Assumes df is in chronological order (earliest first).
+    Vectorized per-game columns for a game log: location ('Home' / 'Away' /
+    'Unknown'), opponent abbreviation (None if MATCHUP can't be parsed),
+    whole minutes and points.
     """
-    # index of the current game (will raise if not in DF – good sanity check)
-    idx_curr = df.index[df["Game_ID"] == game_id][0]
-    return df.iloc[:idx_curr]              # everything *before* that row
+    parts = df['MATCHUP'].astype(str).str.extract(_MATCHUP_PATTERN)
+    cols = pd.DataFrame(index=df.index)
+    cols['location'] = parts[0].map(_LOCATIONS).fillna('Unknown')
+    cols['opponent'] = parts[1].astype(object).where(parts[1].notna(), None)
+    cols['minutes'] = _parse_minutes(df['MIN']) if 'MIN' in df else 0
+    cols['points'] = df['PTS'].astype(int)
+    return cols
+
+
+def _home_away_totals(cols):
+    """{'Home' | 'Away': (points, minutes, games)} as plain ints."""
+    grouped = cols.groupby('location').agg(
+        points=('points', 'sum'), minutes=('minutes', 'sum'), games=('points', 'size')
+    )
+    return {
+        loc: tuple(int(v) for v in grouped.loc[loc]) if loc in grouped.index else (0, 0, 0)
+        for loc in ('Home', 'Away')
+    }
+
+
+def _game_records(df, game_type, include_game_id=True, extra=None):
+    """
+    Build the per-game GameRecords (dict-shaped, see game_record) for a game log.
+    `extra` is an optional {field: list} of playoff columns (game_number, round,
+    series_score, result).
+    """
+    cols = _game_columns(df)
+    game_ids = df['Game_ID'].tolist() if include_game_id else [None] * len(df)
+    extra = extra or {}
+    return [
+        GameRecord(game_id, date, points, opp, location, minutes, game_type,
+                   **{field: values[i] for field, values in extra.items()})
+        for i, (game_id, date, points, opp, location, minutes) in enumerate(zip(
+            game_ids, df['GAME_DATE'].tolist(), cols['points'].tolist(),
+            cols['opponent'].tolist(), cols['location'].tolist(), cols['minutes'].tolist(),
+        ))
+    ]
+
+
+def _playoff_series(cols, results):
+    """
+    Series bookkeeping for a chronological playoff log: a new series starts
+    whenever the opponent changes (or after 7 games against the same one).
+    Returns (game_number, series_index, series_score) arrays.
+    """
+    opp = cols['opponent'].fillna('')
+    run = opp.ne(opp.shift()).cumsum()
+    position = opp.groupby(run).cumcount()
+    game_number = position % 7 + 1
+    series = (game_number == 1).cumsum() - 1
+    wins = (results == 'W').astype(int).groupby(series.to_numpy()).cumsum().to_numpy()
+    losses = game_number.to_numpy() - wins
+    series_score = [f"{w}-{l}" for w, l in zip(wins, losses)]
+    return game_number.to_numpy(), series.to_numpy(), series_score
+
+
+def _probe_scoreboards(team_id, start_date, max_days):
+    """
+    Fallback for when the schedule index cannot be built: walk ScoreboardV2
+    one day at a time. Returns the same dict shape as schedule_index.next_game.
+    """
+    search_date = start_date
+    for _ in range(max_days):
+        try:
+            game_df = nba_cache.get_scoreboard(search_date.strftime("%m/%d/%Y"))
+        except Exception:
+            search_date += datetime.timedelta(days=1)
+            continue
+        for side, opp_side, is_home in (('HOME_TEAM_ID', 'VISITOR_TEAM_ID', True),
+                                        ('VISITOR_TEAM_ID', 'HOME_TEAM_ID', False)):
+            rows = game_df[game_df[side] == team_id]
+            if not rows.empty:
+                row = rows.iloc[0]
+                return {
+                    "gameId": row['GAME_ID'],
+                    "date": search_date,
+                    "home": is_home,
+                    "opponentId": int(row[opp_side]),
+                    "statusText": row['GAME_STATUS_TEXT'],
+                }
+        search_date += datetime.timedelta(days=1)
+    return None
 
 
 def fetch_more_games(player_id, gameStatus, season, game_id, gameType):
@@ -86,51 +175,15 @@ def fetch_more_games(player_id, gameStatus, season, game_id, gameType):
     Fetch more games for a player, up to max_games
     """
 
-    more_regular_games = []
-    pgl = PlayerGameLog(
-            player_id=player_id,                 
-            season=season,
-            season_type_all_star='Regular Season'
-        )
-    df = pgl.get_data_frames()[0]
-
+    season = season or get_current_season()
     if gameStatus == "Concluded" and gameType != "Playoffs":
-        df = _slice_before_game(df, game_id)
-
-
-    for i in range(5, len(df)):
-        curr = df.iloc[i]
-        matchup = curr['MATCHUP']            
-        if ' vs. ' in matchup:
-            location = 'Home'
-            opp_abbr = matchup.split(' vs. ')[1]
-        elif ' @ ' in matchup:
-            location = 'Away'
-            opp_abbr = matchup.split(' @ ')[1]
-        else:
-            location = 'Unknown'
-            opp_abbr = None
-        # lookup full name & logo
-        opp_full = get_team_full_name_from_abbr(opp_abbr) if opp_abbr else None
-        opp_id   = get_team_id_from_abbr(opp_abbr)        if opp_abbr else None
-        opp_logo = get_team_logo_url(opp_id)              if opp_id   else None
-        # minutes (takes only the minute portion if it's "MM:SS")
-        raw_min = curr.get('MIN', '')
-        if isinstance(raw_min, str) and ':' in raw_min:
-            minutes = int(raw_min.split(':')[0])
-        else:
-            minutes = int(raw_min) if raw_min else 0
-        
-        more_regular_games.append({
-            "date":             curr['GAME_DATE'],
-            "points":           int(curr['PTS']),
-            "opponent":         opp_abbr,
-            "opponentFullName": opp_full,
-            "opponentLogo":     opp_logo,
-            "location":         location,
-            "minutes":          minutes,
-            "gameType":         "Regular Season"
-        })
+        # the games as of the pick: everything before its game, newest first
+        df = asof_stats.player_index(player_id, season, 'Regular Season').frame_before(game_id)
+    else:
+        df = nba_cache.get_player_gamelog(player_id, season, 'Regular Season')
+
+
+    more_regular_games = _game_records(df.iloc[5:], "Regular Season", include_game_id=False)
 
     return more_regular_games
     
@@ -142,111 +195,24 @@ def fetch_all_opponent_games(player_id, opponent_abbr):
     Returns a list of dicts with keys:
       date, points, opponent, opponentFullName, opponentLogo,
       location, minutes, gameType
+    (an empty list when there is no opponent, i.e. no upcoming game).
     """
+    if not opponent_abbr:
+        return []
+
     # 1) pull full regular-season game log
     season_str = get_current_season()
-    pgl = PlayerGameLog(
-        player_id=player_id,
-        season=season_str,
-        season_type_all_star='Regular Season'
-    )
-    df = pgl.get_data_frames()[0]
+    df = nba_cache.get_player_gamelog(player_id, season_str, 'Regular Season')
     if df.empty:
         return []
 
-    games = []
-    for _, row in df.iterrows():
-        # only keep games vs. this opponent
-        matchup = row.get('MATCHUP', '')
-        if opponent_abbr not in matchup:
-            continue
-
-        # determine home/away and raw abbr
-        if ' vs. ' in matchup:
-            location = 'Home'
-            opp = matchup.split(' vs. ')[1]
-        elif ' @ ' in matchup:
-            location = 'Away'
-            opp = matchup.split(' @ ')[1]
-        else:
-            location = 'Unknown'
-            opp = None
-
-        # minutes parsing
-        raw_min = row.get('MIN', '')
-        if isinstance(raw_min, str) and ':' in raw_min:
-            minutes = int(raw_min.split(':')[0])
-        else:
-            minutes = int(raw_min) if raw_min else 0
-
-        # lookup full name & logo
-        opp_full = get_team_full_name_from_abbr(opp) if opp else None
-        opp_id   = get_team_id_from_abbr(opp)        if opp else None
-        opp_logo = get_team_logo_url(opp_id)         if opp_id else None
-
-
-        games.append({
-            "gameId":           row['Game_ID'],
-            "date":             row['GAME_DATE'],
-            "points":           int(row['PTS']),
-            "opponent":         opp,
-            "opponentFullName": opp_full,
-            "opponentLogo":     opp_logo,
-            "location":         location,
-            "minutes":          minutes,
-            "gameType":         "Regular Season"
-        })
+    # only keep games vs. this opponent
+    df = df[df['MATCHUP'].str.contains(opponent_abbr, regex=False)]
+    games = _game_records(df, "Regular Season")
 
     return games
    
 
-def fetch_player_game_logs(nba_player_id, season_str):
-    """
-    Fetches advanced game logs for the specified NBA player (by official nba_api ID).
-    Returns per-game stats including FGM, FGA, 3PA, 3PM, etc.
-    """
-    try:
-        gamelog_df = playergamelog.PlayerGameLog(player_id=nba_player_id, season=season_str).get_data_frames()[0]
-    except Exception as e:
-        print(f"[fetch_player_game_logs] Error fetching logs for {nba_player_id}, season {season_str}: {e}")
-        return []
-    if gamelog_df.empty:
-        return []
-    game_dicts = []
-    for idx, row in gamelog_df.iterrows():
-        fgm = row.get("FGM", 0)
-        fga = row.get("FGA", 0)
-        fg3m = row.get("FG3M", 0)
-        fg3a = row.get("FG3A", 0)
-        ftm = row.get("FTM", 0)
-        fta = row.get("FTA", 0)
-        tov = row.get("TOV", 0)
-        pts = row.get("PTS", 0)
-        minutes = row.get("MIN", 0)
-        matchup_str = row.get("MATCHUP", "")
-        if "vs." in matchup_str:
-            home_away_flag = 1
-        elif "@" in matchup_str:
-            home_away_flag = 0
-        else:
-            home_away_flag = None
-        team_possessions = None  # Not provided in standard boxscores
-        game_dicts.append({
-            "points": pts,
-            "fgm": fgm,
-            "fga": fga,
-            "3pm": fg3m,
-            "3pa": fg3a,
-            "ftm": ftm,
-            "fta": fta,
-            "turnovers": tov,
-            "minutes": minutes,
-            "home_away_flag": home_away_flag,
-            "team_possessions": team_possessions
-        })
-    return game_dicts
-
-
 def _safe_div(num: float, den: float) -> Optional[float]:
     """Return num/den or None if denominator is zero (avoids -1 magic numbers)."""
     return num / den if den else None
@@ -272,42 +238,26 @@ def analyze_player_performance(
         shot_dist_3pt, ft_rate, efg, usage_rate
     """
 
-    logs = fetch_player_game_logs(nba_player_id, season_str)
-    if not logs:
+    # season totals come from the running aggregates (O(1), see player_aggregates)
+    try:
+        agg = player_aggregates.get(nba_player_id, season_str)
+    except Exception as e:
+        print(f"[analyze_player_performance] Error fetching logs for {nba_player_id}, season {season_str}: {e}")
+        agg = None
+    if not agg or not player_aggregates.games(agg):
         print(f"[analyze_player_performance] No logs for ID={nba_player_id}, season={season_str}")
         return {}
 
-    # ── accumulate raw totals ───────────────────────────────────────────────────
+    total = lambda stat: player_aggregates.total(agg, stat)
     totals = dict(
-        fga=0, fgm=0,
-        pa3=0, pm3=0,
-        fta=0, ftm=0,
-        tov=0, poss=0,
-        points=0,
+        fga=total("FGA"), fgm=total("FGM"),
+        pa3=total("FG3A"), pm3=total("FG3M"),
+        fta=total("FTA"), ftm=total("FTM"),
+        tov=total("TOV"),
+        points=total("PTS"),
     )
 
-    for g in logs:
-
-        fga  = g.get("fga", 0)
-        fgm  = g.get("fgm", 0)
-        pa3  = g.get("3pa", 0)
-        pm3  = g.get("3pm", 0)
-        fta  = g.get("fta", 0)
-        ftm  = g.get("ftm", 0)
-        tov  = g.get("turnovers", 0)
-        poss = g.get("team_possessions") or 0
-        points  = g.get("points", 0)
-
-        totals["fga"]  += fga
-        totals["fgm"]  += fgm
-        totals["pa3"]  += pa3
-        totals["pm3"]  += pm3
-        totals["fta"]  += fta
-        totals["ftm"]  += ftm
-        totals["tov"]  += tov
-        totals['points'] += points
-
-    G     = len(logs)
+    G     = player_aggregates.games(agg)
     FGA   = totals["fga"]
     FTA   = totals["fta"]
 
@@ -340,120 +290,206 @@ def analyze_player_performance(
     return results_dict
  
 
+@timing.timed("analyze.next_game")
+def _find_next_game(team_id, start_date, max_days):
+    """Binary search in the daily schedule index, probing scoreboards if it is unavailable."""
+    try:
+        return schedule_index.next_game(team_id, start_date, max_days)
+    except Exception as e:
+        print(f"[analyze_player] schedule index unavailable ({e}); probing scoreboards")
+        return _probe_scoreboards(team_id, start_date, max_days)
+
+
+@timing.timed("analyze.career")
+def _safe_career_stats(player_id):
+    try:
+        return nba_cache.get_player_career_stats(player_id)
+    except Exception:
+        return None
+
+
+@timing.timed("analyze.season_log")
+def _safe_season_log(player_id, season):
+    try:
+        return nba_cache.get_player_gamelog(player_id, season)
+    except Exception:
+        return pd.DataFrame()
+
+
+def _opponent_abbr(upcoming):
+    if not upcoming:
+        return None
+    opponent = static_index.team_by_id(upcoming["opponentId"])
+    return opponent["abbreviation"] if opponent else None
+
+
+@timing.timed("analyze.playoff_log")
+def _playoff_log(player_id, season, upcoming):
+    """This season's playoff log, fetched only when the next game is a playoff game."""
+    if upcoming and deduce_game_type(upcoming["gameId"]) == "Playoffs":
+        return nba_cache.get_player_gamelog(player_id, season, 'Playoffs')
+    return None
+
+
+@timing.timed("analyze.career_vs_opponent")
+def _career_vs_opponent(player_id, career_df, upcoming):
+    """
+    O(1) lookup in the per-(player, opponent) index; only seasons it has never
+    seen (or new games this season) touch the game logs.
+    """
+    opponent_abbr = _opponent_abbr(upcoming)
+    if opponent_abbr is None or career_df is None or career_df.empty:
+        return None
+    return opponent_index.career_avg_vs_opponent(player_id, opponent_abbr, career_df["SEASON_ID"].unique())
+
+
+# Key of the sorted point histories a base analysis keeps for with_threshold();
+# dropped from every thresholded copy, so it never reaches Firestore or the client
+SCORING_KEY = "_scoring"
+
+
+def _count_at_or_below(sorted_points, threshold):
+    if sorted_points is None or threshold is None:
+        return None
+    return bisect.bisect_right(sorted_points, threshold)
+
+
+def with_threshold(base, threshold):
+    """
+    The analysis of one line: a copy of `base` (from analyze_player_base) with
+    threshold, underCount and playoff_underCount filled in. Counting is a
+    bisect in the sorted points under SCORING_KEY – no upstream calls.
+    """
+    scoring = base[SCORING_KEY]
+    data = {k: v for k, v in base.items() if k != SCORING_KEY}
+    data["threshold"] = threshold
+    data["underCount"] = _count_at_or_below(scoring["season"], threshold)
+    data["playoff_underCount"] = _count_at_or_below(scoring["playoffs"], threshold)
+    return data
+
+
 def analyze_player(first_name, last_name, threshold=None):
     """
-    1) Use balldontlie just for the player's name confirmation.
-    2) Then obtain the official NBA ID via players.find_players_by_full_name.
-    3) Retrieve logs and team info from nba_api.
-    4) Return a data object with original fields (name, photoUrl, teamLogo, opponentLogo, etc.)
+    1) Resolve the name to an NBA ID, team and position locally (player_identity).
+    2) Retrieve logs and team info from nba_api.
+    3) Return a data object with original fields (name, photoUrl, teamLogo, opponentLogo, etc.)
        plus advanced metrics and career season stats.
     """
-    # (A) Use balldontlie to check for player's existence (but ignore its ID)
-    url = "https://api.balldontlie.io/v1/players"
-    headers = {"Authorization": "03f64803-21d9-40e4-ab9f-5d69ca82c8dc"}
-    params = {"first_name": first_name, "last_name": last_name}
-    response = requests.get(url, headers=headers, params=params)
-    if response.status_code != 200:
-        return {"error": f"API Error from balldontlie: {response.status_code}"}
-    bd_players = response.json().get("data", [])
-    if not bd_players:
-        return {"error": f"No players found in balldontlie for {first_name} {last_name}"}
-    bdl_player = bd_players[0]
-    
-    # (B) Get the official NBA ID using nba_api
-    full_name = f"{bdl_player['first_name']} {bdl_player['last_name']}"
-    nba_found = players.find_players_by_full_name(full_name)
-    if not nba_found:
-        return {"error": f"No matching NBA Stats player found for {full_name}"}
-    nba_player_id = nba_found[0]["id"]
+    base = analyze_player_base(first_name, last_name)
+    if "error" in base:
+        return base
+    return with_threshold(base, threshold)
+
+
+@timing.timed("analyze")
+def analyze_player_base(first_name, last_name):
+    """
+    Everything analyze_player returns that does not depend on the line:
+    threshold, underCount and playoff_underCount are None, and the point
+    histories they are counted from are kept under SCORING_KEY. Store it once
+    per (player, game) and derive each line with with_threshold().
+    """
+    # (A) Resolve the player (roster snapshot + static index, no network hop
+    #     once today's snapshot is cached) and load the standings at once
+    with timing.span("analyze.identity"):
+        identity = (
+            fanout.Plan()
+            .add("player", lambda: player_identity.resolve(first_name, last_name))
+            .add("standings", standings_snapshot.get_snapshot)
+            .run()
+        )
+    player = identity["player"]
+    if player is None:
+        return {"error": f"No matching NBA Stats player found for {first_name} {last_name}"}
+    if player["teamId"] is None:
+        return {"error": f"{player['name']} is not on an NBA roster"}
+    nba_player_id = player["playerId"]
     
     ##################################################################
-    # (C) Retrieve team info and game schedule as before.
+    # (B) Retrieve team info and game schedule as before.
     ##################################################################
-    player_name = full_name
-    player_position = bdl_player.get("position", "N/A")
-    player_team = bdl_player["team"]["full_name"] if bdl_player.get("team") else "Unknown Team"
-    player_team_conference = bdl_player["team"].get("conference", "Unknown")
-    standings = leaguestandings.LeagueStandings().get_data_frames()[0]
-    standings["TeamID"] = standings["TeamID"].astype(int)
-    player_team_standings = teams.find_teams_by_full_name(player_team)[0]
-    player_team_id = player_team_standings["id"]
-    player_team_standings = standings[standings["TeamID"] == player_team_id]
+    player_name = player["name"]
+    player_position = player["position"] or "N/A"
+    player_team = player["team"]
+    player_team_conference = player["conference"] or "Unknown"
+    standings = identity["standings"]
+    player_team_id = player["teamId"]
     player_team_logo = get_team_logo_url(player_team_id)
-    player_team_playoffRank = int(player_team_standings["PlayoffRank"].values[0])
+    player_team_playoffRank = standings[player_team_id]["PlayoffRank"]
     
-    # Find upcoming game (using Scoreboard)
+    # Upcoming game (binary search in the daily schedule index, fetched below)
     max_search_days = 14
     eastern = pytz.timezone('America/New_York')
     today_eastern = datetime.datetime.now(eastern).date()
-    search_date = today_eastern
     game_date_str = None
     game_date_est = None
     opponent_team_name = None
     opponent_team_conference = None
     opponent_team_playoffRank = None
     opponent_team_logo = None
+    opponent_team_id = None
     home = None
     next_game_id = None
+    next_game_type = None
     home_game = True
-    for _ in range(max_search_days):
-        game_date_str = search_date.strftime("%m/%d/%Y")
-        try:
-            scoreboard = Scoreboard(game_date=game_date_str, league_id='00')
-            game_df = scoreboard.game_header.get_data_frame()
-        except Exception:
-            search_date += datetime.timedelta(days=1)
-            continue
-        if not game_df.empty:
-            if player_team_id in game_df['HOME_TEAM_ID'].values:
-                home_index = int(game_df.index[game_df['HOME_TEAM_ID'] == player_team_id][0])
-                opponent_team_id = game_df.at[home_index, 'VISITOR_TEAM_ID']
-                game_date_est = game_df.at[home_index, 'GAME_STATUS_TEXT']
-                home = True
-                next_game_id = game_df.at[home_index, 'GAME_ID']
-                next_game_type = deduce_game_type(next_game_id) if next_game_id else None
-                break
-            elif player_team_id in game_df['VISITOR_TEAM_ID'].values:
-                home_game = False
-                away_index = int(game_df.index[game_df['VISITOR_TEAM_ID'] == player_team_id][0])
-                opponent_team_id = game_df.at[away_index, 'HOME_TEAM_ID']
-                game_date_est = game_df.at[away_index, 'GAME_STATUS_TEXT']
-                home = False
-                next_game_id = game_df.at[away_index, 'GAME_ID']
-                next_game_type = deduce_game_type(next_game_id) if next_game_id else None
-                break
-        search_date += datetime.timedelta(days=1)
-    all_teams = teams.get_teams()
-    opponent_team = next((t for t in all_teams if t["id"] == opponent_team_id), None)
+    current_season_str = get_current_season()
+
+    # (C) Every remaining upstream call only needs the ids above (or the next
+    #     game); run them concurrently and join before computing metrics.
+    plan = fanout.Plan()
+    plan.add("next_game", lambda: _find_next_game(player_team_id, today_eastern, max_search_days))
+    plan.add("career", lambda: _safe_career_stats(nba_player_id))
+    plan.add("season_log", lambda: _safe_season_log(nba_player_id, current_season_str))
+    plan.add("team_usage", lambda: team_usage.usage_inputs(player_team_id, current_season_str))
+    plan.add("playoff_log", lambda upcoming: _playoff_log(nba_player_id, current_season_str, upcoming),
+             deps=("next_game",))
+    plan.add("career_vs_opp", lambda career_df, upcoming: _career_vs_opponent(nba_player_id, career_df, upcoming),
+             deps=("career", "next_game"))
+    plan.add(
+        "opponent_games",
+        lambda _season_log, upcoming: fetch_all_opponent_games(nba_player_id, _opponent_abbr(upcoming)),
+        deps=("season_log", "next_game"),
+    )
+    plan.add(
+        "season_totals",
+        lambda season_log: player_aggregates.sync(nba_player_id, current_season_str, 'Regular Season', season_log),
+        deps=("season_log",),
+        host=fanout.LOCAL,
+    )
+    plan.add(
+        "performance",
+        lambda _season_totals: analyze_player_performance(nba_player_id, current_season_str),
+        deps=("season_totals",),
+        host=fanout.LOCAL,
+    )
+    with timing.span("analyze.fetch"):
+        fetched = plan.run()
+
+    upcoming = fetched["next_game"]
+    if upcoming:
+        next_game_id = upcoming["gameId"]
+        opponent_team_id = upcoming["opponentId"]
+        game_date_str = upcoming["date"].strftime("%m/%d/%Y")
+        game_date_est = upcoming["statusText"]
+        home = upcoming["home"]
+        home_game = upcoming["home"]
+        next_game_type = deduce_game_type(next_game_id)
+    opponent_team = static_index.team_by_id(opponent_team_id)
     opponent_team_name = opponent_team["full_name"] if opponent_team else "Unknown Opponent"
     opponent_team_logo = get_team_logo_url(opponent_team_id) if opponent_team else "/placeholder.svg?height=40&width=40"
     matchup = f"{opponent_team_name} at {player_team}" if home else f"{player_team} at {opponent_team_name}"
-    opponent_team_standings = standings[standings["TeamID"] == opponent_team_id] if opponent_team_id else None
-    if opponent_team_standings is not None and not opponent_team_standings.empty:
-        opponent_team_conference = opponent_team_standings["Conference"].values[0]
-        opponent_team_playoffRank = int(opponent_team_standings["PlayoffRank"].values[0])
+    opponent_team_standings = standings.get(int(opponent_team_id)) if opponent_team_id else None
+    if opponent_team_standings is not None:
+        opponent_team_conference = opponent_team_standings["Conference"]
+        opponent_team_playoffRank = opponent_team_standings["PlayoffRank"]
     
     # Get player image URL from official NBA ID
     player_image_url = get_player_image_url(nba_player_id)
 
-    current_season_str = get_current_season()
-
-
-    # Career stats from playercareerstats
-    try:
-        career_df = playercareerstats.PlayerCareerStats(player_id=nba_player_id).get_data_frames()[0]
-    except Exception:
-        career_df = None
-
-    # Current season stats
-    try:
-        season_log = playergamelog.PlayerGameLog(player_id=nba_player_id, season=current_season_str).get_data_frames()[0]
-    except Exception:
-        season_log = pd.DataFrame()
-    if not season_log.empty:
-        season_avg_points = float(season_log['PTS'].mean())
-    else:
-        season_avg_points = None
+    # Current season stats (running aggregates, topped up with any new games in the log)
+    season_log = fetched["season_log"]
+    season_totals = fetched["season_totals"]
+    season_avg_points = player_aggregates.mean(season_totals, 'PTS')
 
     # Stats vs opponent
     opponent_abbr = opponent_team.get("abbreviation") if opponent_team else None
@@ -469,37 +505,14 @@ def analyze_player(first_name, last_name, threshold=None):
                 season_avg_points_vs_opponent = None
         else:
             season_avg_points_vs_opponent = None
-        career_points_list = []
-        career_games_list = []
-        if career_df is not None and not career_df.empty:
-            seasons = career_df["SEASON_ID"].unique()
-            for season in seasons:
-                try:
-                    season_game_log = playergamelog.PlayerGameLog(player_id=nba_player_id, season=season).get_data_frames()[0]
-                except Exception:
-                    continue
-                if season_game_log.empty:
-                    continue
-                games_vs_opponent = season_game_log[season_game_log["MATCHUP"].str.contains(opponent_abbr)]
-                if not games_vs_opponent.empty:
-                    total_points = games_vs_opponent["PTS"].sum()
-                    games_played = games_vs_opponent.shape[0]
-                    career_points_list.append(total_points)
-                    career_games_list.append(games_played)
-                time.sleep(0.5)
-            if career_games_list:
-                career_avg_points_vs_opponent = float(sum(career_points_list) / sum(career_games_list))
-            else:
-                career_avg_points_vs_opponent = None
-        else:
-            career_avg_points_vs_opponent = None
+        career_avg_points_vs_opponent = fetched["career_vs_opp"]
 
     # Check if Playoff Game First
     num_playoff_games = 0
     playoff_games = []
     playoff_avg = 0
     playoff_minutes_avg = 0
-    playoff_underCount = 0
+    playoff_points = None
     playoff_points_home_avg = 0
     playoff_home_games = 0
     playoff_points_away_avg = 0
@@ -509,16 +522,10 @@ def analyze_player(first_name, last_name, threshold=None):
     playoff_curr_score = ""
 
     if next_game_type == "Playoffs":
-        pgl = PlayerGameLog(
-            player_id=nba_player_id,                 
-            season=get_current_season(),
-            season_type_all_star='Playoffs'
-        )
-        games_df = pgl.get_data_frames()[0]  # most recent game is first row
+        # most recent game is first row
+        games_df = fetched["playoff_log"]
         num_playoff_games = len(games_df)
-        game = 1
         round_playoff_game = 0
-        series_score = "0-0"
         type_playoff_game = ['Conference First Round', 'Conference Semifinals', 'Conference Finals', 'NBA Finals']
 
         # Get all playoff games data
@@ -530,73 +537,24 @@ def analyze_player(first_name, last_name, threshold=None):
         #    series_id=''        
         #)
         #series_df = cps.get_data_frames()[0][['GAME_ID', 'SERIES_ID', 'GAME_NUM']]
-        
-        for i in range(num_playoff_games):
-            curr = games_df.iloc[num_playoff_games - 1 - i]
-
-            matchup = curr['MATCHUP']            
-            if ' vs. ' in matchup:
-                location = 'Home'
-                opp_abbr = matchup.split(' vs. ')[1]
-                playoff_home_games += 1
-            elif ' @ ' in matchup:
-                location = 'Away'
-                opp_abbr = matchup.split(' @ ')[1]
-                playoff_away_games += 1
 
-            else:
-                location = 'Unknown'
-                opp_abbr = None
-
-            # lookup full name & logo
-            opp_full = get_team_full_name_from_abbr(opp_abbr) if opp_abbr else None
-            opp_id   = get_team_id_from_abbr(opp_abbr)        if opp_abbr else None
-            opp_logo = get_team_logo_url(opp_id)              if opp_id   else None
-
-            # minutes (takes only the minute portion if it's "MM:SS")
-            raw_min = curr.get('MIN', '')
-            if isinstance(raw_min, str) and ':' in raw_min:
-                minutes = int(raw_min.split(':')[0])
-            else:
-                minutes = int(raw_min) if raw_min else 0
-
-            playoff_minutes_avg += minutes
-
-            if int(curr['PTS']) <= threshold:
-                playoff_underCount += 1
-
-            if location == 'Home':
-                playoff_points_home_avg += int(curr['PTS'])
-                playoff_minutes_home_avg += minutes
-            elif location == 'Away':
-                playoff_points_away_avg += int(curr['PTS'])
-                playoff_minutes_away_avg += minutes
-            
-            if game > 7 or (playoff_games and opp_abbr != playoff_games[-1]['opponent']):
-                game = 1
-                round_playoff_game += 1
-                series_score = "0-0"
-            if  curr['WL'] == 'W':
-                series_score = f"{int(series_score.split('-')[0]) + 1}-{series_score.split('-')[1]}"
-            else:
-                series_score = f"{series_score.split('-')[0]}-{int(series_score.split('-')[1]) + 1}"
-
-            playoff_games.append({
-                "gameId":           curr['Game_ID'],
-                "date":             curr['GAME_DATE'],
-                "points":           int(curr['PTS']),
-                "opponent":         opp_abbr,
-                "opponentFullName": opp_full,
-                "opponentLogo":     opp_logo,
-                "location":         location,
-                "minutes":          minutes,
-                "game_number":      game,
-                "round":            type_playoff_game[round_playoff_game],
-                "series_score": series_score,
-                "result":         curr['WL'],
-                "gameType":         "Playoffs"
+        if num_playoff_games:
+            chrono_df = games_df.iloc[::-1]          # oldest game first
+            cols = _game_columns(chrono_df)
+            splits = _home_away_totals(cols)
+            playoff_points_home_avg, playoff_minutes_home_avg, playoff_home_games = splits['Home']
+            playoff_points_away_avg, playoff_minutes_away_avg, playoff_away_games = splits['Away']
+            playoff_minutes_avg = int(cols['minutes'].sum())
+            playoff_points = sorted(cols['points'].tolist())
+
+            game_numbers, series, series_scores = _playoff_series(cols, chrono_df['WL'])
+            round_playoff_game = int(series[-1])
+            playoff_games = _game_records(chrono_df, "Playoffs", extra={
+                "game_number":  game_numbers.tolist(),
+                "round":        [type_playoff_game[s] for s in series],
+                "series_score": series_scores,
+                "result":       chrono_df['WL'].tolist(),
             })
-            game += 1
         
         
         playoff_avg = games_df['PTS'].sum() / len(games_df)
@@ -630,122 +588,27 @@ def analyze_player(first_name, last_name, threshold=None):
 
 
     # Get the last 5 games
-    last_5_regular_games = []
-    last_5_regular_games_avg = 0
-    underCount = 0
     num_season_count = 5
-    average_mins = 0
 
     # Check for (if remaining) Regular Season Game
-    pgl = PlayerGameLog(
-            player_id=nba_player_id,                 
-            season=get_current_season(),
-            season_type_all_star='Regular Season'
-        )
-    games_df = pgl.get_data_frames()[0]
-    
-    for i in range(5):
-        curr = games_df.iloc[i]
-        matchup = curr['MATCHUP']            
-        if ' vs. ' in matchup:
-            location = 'Home'
-            opp_abbr = matchup.split(' vs. ')[1]
-        elif ' @ ' in matchup:
-            location = 'Away'
-            opp_abbr = matchup.split(' @ ')[1]
-        else:
-            location = 'Unknown'
-            opp_abbr = None
-        # lookup full name & logo
-        opp_full = get_team_full_name_from_abbr(opp_abbr) if opp_abbr else None
-        opp_id   = get_team_id_from_abbr(opp_abbr)        if opp_abbr else None
-        opp_logo = get_team_logo_url(opp_id)              if opp_id   else None
-        # minutes (takes only the minute portion if it's "MM:SS")
-        raw_min = curr.get('MIN', '')
-        if isinstance(raw_min, str) and ':' in raw_min:
-            minutes = int(raw_min.split(':')[0])
-        else:
-            minutes = int(raw_min) if raw_min else 0
-        last_5_regular_games_avg += int(curr['PTS'])
-
-        if int(curr['PTS']) <= threshold:
-                underCount += 1
-        
-        average_mins += minutes
-        
-        last_5_regular_games.append({
-            "gameId":           curr['Game_ID'],
-            "date":             curr['GAME_DATE'],
-            "points":           int(curr['PTS']),
-            "opponent":         opp_abbr,
-            "opponentFullName": opp_full,
-            "opponentLogo":     opp_logo,
-            "location":         location,
-            "minutes":          minutes,
-            "gameType":         "Regular Season"
-        })
-    
-    last_5_regular_games_avg /= 5
-
-    home_games = 0
-    away_games = 0
-    points_home_avg = 0
-    points_away_avg = 0
-    minutes_home_avg = 0
-    minutes_away_avg = 0
-
-    pgl = PlayerGameLog(
-            player_id=nba_player_id,                 
-            season=get_current_season(),
-            season_type_all_star='Regular Season'
-        )
-    games_df = pgl.get_data_frames()[0]
-    for i in range(5, len(games_df)):
-        curr = games_df.iloc[i]
-        matchup = curr['MATCHUP']            
-        if ' vs. ' in matchup:
-            location = 'Home'
-        elif ' @ ' in matchup:
-            location = 'Away'
-        
-        num_season_count += 1
+    games_df = nba_cache.get_player_gamelog(nba_player_id, current_season_str, 'Regular Season')
+    cols = _game_columns(games_df)
 
-        # minutes (takes only the minute portion if it's "MM:SS")
-        raw_min = curr.get('MIN', '')
-        if isinstance(raw_min, str) and ':' in raw_min:
-            minutes = int(raw_min.split(':')[0])
-        else:
-            minutes = int(raw_min) if raw_min else 0
-
-        if location == 'Home':
-            if curr['PTS'] is None:
-                continue
-            else:
-                points_home_avg += int(curr['PTS'])
-            if minutes is None:
-                continue
-            else:
-                minutes_home_avg += minutes
-            home_games += 1
-        elif location == 'Away':
-            if curr['PTS'] is None:
-                continue
-            else:
-                points_away_avg += int(curr['PTS'])
-            if minutes is None:
-                continue
-            else:
-                minutes_away_avg += minutes
-            away_games += 1
-        
+    last_5_regular_games = _game_records(games_df.iloc[:5], "Regular Season")
+    last_5_regular_games_avg = int(cols['points'].iloc[:5].sum()) / 5
 
-        average_mins += minutes
+    # home/away splits over the rest of the season (the last 5 are listed above)
+    rest = cols.iloc[5:]
+    num_season_count += len(rest)
+    splits = _home_away_totals(rest)
+    points_home_avg, minutes_home_avg, home_games = splits['Home']
+    points_away_avg, minutes_away_avg, away_games = splits['Away']
 
-        if int(curr['PTS']) <= threshold:
-            underCount += 1
+    # both halves from the aggregate: it may already hold a game the log does not
+    average_mins = player_aggregates.mean(season_totals, 'MIN') or 0
+    season_points = sorted(cols['points'].tolist())
+    rolling = rolling_stats.summarize(games_df, opponent=opponent_abbr)
 
-    
-    average_mins /= num_season_count
     playoff_minutes_avg /= num_playoff_games if num_playoff_games > 0 else 0
     points_home_avg /= playoff_home_games if playoff_home_games > 0 else 0
     points_away_avg /= playoff_away_games if playoff_away_games > 0 else 0
@@ -753,7 +616,7 @@ def analyze_player(first_name, last_name, threshold=None):
     minutes_away_avg /= playoff_away_games if playoff_away_games > 0 else 0
 
 
-    player_performace_dict = analyze_player_performance(nba_player_id, current_season_str)
+    player_performace_dict = fetched["performance"]
     if not player_performace_dict:
         player_performace_dict['avg_fga'] = None
         player_performace_dict['avg_fgm'] = None
@@ -768,20 +631,7 @@ def analyze_player(first_name, last_name, threshold=None):
         player_performace_dict['ts_pct'] = None
 
     # Get Team Data Metrics To Calculate Usage Rate
-    from nba_api.stats.endpoints import TeamGameLog
-    def fetch_team_stats_for_usage(team_id, season):
-        """
-        Fetches per‐game averages for every team, then adds an 'AVG_POSS' column.
-        """
-        gamelog_df = TeamGameLog(team_id=team_id, season=season).get_data_frames()[0]
-        return (
-            float(gamelog_df['FGA'].mean()),
-            float(gamelog_df['FTA'].mean()),
-            float(gamelog_df['TOV'].mean())
-        )
-        
-
-    team_fga, team_fta, team_tov = fetch_team_stats_for_usage(player_team_id, get_current_season())
+    team_fga, team_fta, team_tov = fetched["team_usage"]
 
     # ── importance metrics ───────────────────────────────────────────────────
     alpha = 0.7
@@ -805,7 +655,7 @@ def analyze_player(first_name, last_name, threshold=None):
         playoff_games = []
         playoff_avg = None
         playoff_minutes_avg = None
-        playoff_underCount = None
+        playoff_points = None
         playoff_points_home_avg = None
         playoff_home_games = None
         playoff_points_away_avg = None
@@ -844,7 +694,7 @@ def analyze_player(first_name, last_name, threshold=None):
         "opponentLogo": opponent_team_logo,
         
 
-        "threshold": threshold,
+        "threshold": None,
         "last5RegularGames": last_5_regular_games,
         "num_season_games" : num_season_count,
         "seasonAvgPoints": season_avg_points,
@@ -858,8 +708,9 @@ def analyze_player(first_name, last_name, threshold=None):
         "seasonAvgVsOpponent": season_avg_points_vs_opponent,
         "careerAvgVsOpponent": career_avg_points_vs_opponent,
         "last5RegularGamesAvg": last_5_regular_games_avg,
-        "season_games_agst_opp" : fetch_all_opponent_games(nba_player_id, opponent_abbr),
-        "underCount" : underCount,
+        "rollingStats": rolling,
+        "season_games_agst_opp" : fetched["opponent_games"],
+        "underCount" : None,
 
         # Advanced metrics
         "avg_fga": player_performace_dict['avg_fga'],
@@ -887,12 +738,97 @@ def analyze_player(first_name, last_name, threshold=None):
         "playoff_minutes_avg" : playoff_minutes_avg,
         "playoff_minutes_home_avg": playoff_minutes_home_avg,
         "playoff_minutes_away_avg": playoff_minutes_away_avg,
-        "playoff_underCount" : playoff_underCount
+        "playoff_underCount" : None,
+
+        SCORING_KEY: {"season": season_points, "playoffs": playoff_points},
     }    
 
 
     return player_data
 
+
+def _quietly(label, fn, *args):
+    """Warm-up task wrapper: a failed fetch is logged, and retried by the pick that needs it."""
+    try:
+        return fn(*args)
+    except Exception as e:
+        print(f"[analyze_players_batch] warm-up {label} failed: {e}")
+        return None
+
+
+def _warm_up(players):
+    """
+    Fetch everything the given players' analyses share, once per unique key
+    and concurrently: standings, the schedule index, the team usage table,
+    and per player the season log, career stats, playoff log and
+    career-vs-opponent index. Results land in nba_cache; nothing is returned.
+    """
+    season = get_current_season()
+    today_eastern = datetime.datetime.now(pytz.timezone('America/New_York')).date()
+
+    plan = fanout.Plan()
+    plan.add("standings", lambda: _quietly("standings", standings_snapshot.get_snapshot))
+    plan.add("schedule", lambda: _quietly("schedule", schedule_index.get_index))
+    plan.add("team_usage", lambda: _quietly("team usage", team_usage.get_table, season))
+    for team_id in {p["teamId"] for p in players}:
+        plan.add(f"next_game:{team_id}",
+                 lambda _schedule, tid=team_id: _quietly(f"next game {tid}", _find_next_game, tid, today_eastern, 14),
+                 deps=("schedule",))
+    for player in players:
+        pid, tid = player["playerId"], player["teamId"]
+        plan.add(f"season_log:{pid}", lambda pid=pid: _safe_season_log(pid, season))
+        plan.add(f"career:{pid}", lambda pid=pid: _safe_career_stats(pid))
+        plan.add(f"playoff_log:{pid}",
+                 lambda upcoming, pid=pid: _quietly(f"playoff log {pid}", _playoff_log, pid, season, upcoming),
+                 deps=(f"next_game:{tid}",))
+        plan.add(f"career_vs_opp:{pid}",
+                 lambda career_df, upcoming, pid=pid: _quietly(
+                     f"career vs opponent {pid}", _career_vs_opponent, pid, career_df, upcoming),
+                 deps=(f"career:{pid}", f"next_game:{tid}"))
+    plan.run()
+
+
+def analyze_players_batch(picks):
+    """
+    Analyze many (first_name, last_name, threshold) picks at once.
+
+    Work the picks share – roster, standings, schedule, the team usage table
+    and each unique player's logs – is fetched once and concurrently, then
+    each unique player's base analysis is built from nba_cache and every
+    line on that player is derived from it with with_threshold(). Returns
+    one entry per pick, in input order: the analyze_player dict (the base
+    itself when the threshold is None), or {"error": ...} if that player
+    failed.
+    """
+    identities = {}
+    for first_name, last_name, _ in picks:
+        name_key = (first_name.lower(), last_name.lower())
+        if name_key in identities:
+            continue
+        identities[name_key] = _quietly(f"resolve {first_name} {last_name}",
+                                        player_identity.resolve, first_name, last_name)
+
+    players = {p["playerId"]: p for p in identities.values() if p and p["teamId"]}
+    _warm_up(list(players.values()))
+
+    bases = {}
+    results = []
+    for first_name, last_name, threshold in picks:
+        name_key = (first_name.lower(), last_name.lower())
+        if name_key not in bases:
+            try:
+                bases[name_key] = analyze_player_base(first_name, last_name)
+            except Exception as e:
+                print(f"[analyze_players_batch] {first_name} {last_name}: {e}")
+                bases[name_key] = {"error": str(e)}
+        base = bases[name_key]
+        if "error" in base or threshold is None:
+            results.append(base)
+        else:
+            results.append(with_threshold(base, threshold))
+    return results
+
+
 if __name__ == "__main__":
     player_info = analyze_player("aaron", "nesmith", threshold=20)
     print(player_info)
\ No newline at end of file
@@ -0,0 +1,152 @@
+"""
+Local player identity resolver
+Turns a typed name into {playerId, name, teamId, team, position, conference}
+without calling balldontlie: names are matched against a roster snapshot
+(one PlayerIndex call per day, shared through nba_cache) and nba_api's static
+player list.
+
+Matching goes exact -> normalized (case / accents / punctuation, see
+static_index.normalize_name) -> fuzzy (difflib, for typos such as
+"Giannis Antetokounpo"). Every result says which rule matched.
+"""
+import difflib
+import datetime
+import logging
+import unicodedata
+
+import pytz
+from nba_api.stats.endpoints import PlayerIndex
+
+import nba_cache
+import static_index
+import standings_snapshot
+import singleflight
+
+logger = logging.getLogger(__name__)
+
+_INDEX_NAME = "roster_snapshot"
+_REFRESH_HOUR_ET = 4          # after the previous day's transactions have posted
+_FUZZY_CUTOFF = 0.8
+_eastern = pytz.timezone("America/New_York")
+_refreshes = singleflight.Group("roster_snapshot")     # one PlayerIndex call per process at a time
+
+# Display names that differ from nba_api's static team list. balldontlie (and
+# ESPN, whose odds are matched on team name) use these, so keep them.
+_TEAM_DISPLAY_NAMES = {1610612746: "LA Clippers"}
+
+
+def _seconds_until_refresh():
+    now = datetime.datetime.now(_eastern)
+    refresh_at = now.replace(hour=_REFRESH_HOUR_ET, minute=0, second=0, microsecond=0)
+    if refresh_at <= now:
+        refresh_at += datetime.timedelta(days=1)
+    return int((refresh_at - now).total_seconds())
+
+
+def _ascii(name):
+    """'Luka Dončić' -> 'Luka Doncic' (the form balldontlie used to return)."""
+    return unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode("ascii")
+
+
+def _build(season):
+    """Return {"players": {player_id: entry}, "byName": {normalized name: [player_id, ...]}}."""
+    df = PlayerIndex(season=season).get_data_frames()[0]
+    players, by_name = {}, {}
+    for pid, first, last, team_id, position in zip(
+        df["PERSON_ID"], df["PLAYER_FIRST_NAME"], df["PLAYER_LAST_NAME"], df["TEAM_ID"], df["POSITION"]
+    ):
+        pid = int(pid)
+        full_name = f"{first} {last}".strip()
+        players[pid] = {
+            "name": full_name,
+            "teamId": int(team_id) if team_id else None,
+            "position": position or None,
+        }
+        by_name.setdefault(static_index.normalize_name(full_name), []).append(pid)
+    return {"players": players, "byName": by_name}
+
+
+def refresh(season=None):
+    """Fetch the roster now and replace the shared snapshot."""
+    season = season or nba_cache.current_season()
+    snapshot = _build(season)
+    nba_cache.set_derived(_INDEX_NAME, season, snapshot, ttl=_seconds_until_refresh())
+    # kept without expiry so a failed refresh can fall back to yesterday's roster
+    nba_cache.set_derived(_INDEX_NAME, (season, "last_good"), snapshot, permanent=True)
+    logger.info(f"[player_identity] roster snapshot refreshed for {season} ({len(snapshot['players'])} players)")
+    return snapshot
+
+
+def get_roster(season=None):
+    """Today's roster snapshot (fetched at most once per day across workers)."""
+    season = season or nba_cache.current_season()
+    snapshot = nba_cache.get_derived(_INDEX_NAME, season)
+    if snapshot is None:
+        try:
+            snapshot, _ = _refreshes.do(season, refresh, season)
+        except Exception as e:
+            snapshot = nba_cache.get_derived(_INDEX_NAME, (season, "last_good"))
+            if snapshot is None:
+                raise
+            logger.warning(f"[player_identity] roster refresh failed ({e}); using last snapshot")
+    return snapshot
+
+
+def _pick(candidates, roster):
+    """Prefer players currently on a roster, then nba_api's order."""
+    on_team = [pid for pid in candidates if (roster["players"].get(pid) or {}).get("teamId")]
+    return (on_team or candidates)[0]
+
+
+def _match(full_name, roster):
+    """Return (player_id, rule) or (None, None)."""
+    key = static_index.normalize_name(full_name)
+    candidates = roster["byName"].get(key, [])
+    exact = [pid for pid in candidates if roster["players"][pid]["name"] == full_name]
+    if exact:
+        return _pick(exact, roster), "exact"
+    if candidates:
+        return _pick(candidates, roster), "normalized"
+    static = static_index.PLAYERS_BY_NAME.get(key)
+    if static:
+        return static[0]["id"], "normalized"
+
+    close = difflib.get_close_matches(key, roster["byName"].keys(), n=1, cutoff=_FUZZY_CUTOFF)
+    if close:
+        return _pick(roster["byName"][close[0]], roster), "fuzzy"
+    return None, None
+
+
+def resolve(first_name, last_name="", season=None):
+    """
+    Resolve a player by name. Returns None if nothing matches, else a dict
+    with playerId, name, teamId, team, teamAbbreviation, position, conference
+    and match ("exact" | "normalized" | "fuzzy"). Team fields are None for a
+    player who is not on a roster.
+    """
+    full_name = " ".join(part for part in (first_name, last_name) if part).strip()
+    if not full_name:
+        return None
+    roster = get_roster(season)
+    player_id, rule = _match(full_name, roster)
+    if player_id is None:
+        return None
+
+    entry = roster["players"].get(player_id)
+    if entry is None:
+        static = static_index.PLAYER_BY_ID.get(player_id)
+        entry = {"name": static["full_name"] if static else full_name, "teamId": None, "position": None}
+
+    team_id = entry["teamId"]
+    team = static_index.team_by_id(team_id)
+    standings = standings_snapshot.get_team(team_id, season) if team_id else None
+    return {
+        "playerId": player_id,
+        "name": _ascii(entry["name"]),
+        "teamId": team_id,
+        "team": _TEAM_DISPLAY_NAMES.get(team_id, team["full_name"]) if team else None,
+        "teamAbbreviation": team["abbreviation"] if team else None,
+        "position": entry["position"],
+        "conference": standings["Conference"] if standings else None,
+        "match": rule,
+    }
@@ -70,7 +70,7 @@ def aggregate_prediction_data(player_data, threshold):
     team_info = {
         "team": player_data["team"],
         "opponent": player_data["opponent"],
-        "home_away": "Home" if player_data.get("matchup", "").find("vs.") != -1 else "Away"
+        "home_away": "Home" if player_data.get("home_game") else "Away"
     }
     
     season_averages = {
@@ -0,0 +1,171 @@
+"""
+Upstream rate limiter
+One token bucket per upstream host, shared by every thread of a process and –
+through a small state file guarded by flock – by every gunicorn worker and
+backfill script on the machine. Calls are paced to stay just under each
+host's limit instead of sleeping blindly or waiting for a 429.
+
+acquire() reserves the next free slot and then sleeps until it: the bucket
+may go negative, and each caller waits for its own reservation, so callers
+are served strictly in the order they asked (FIFO) and nobody is starved by
+a burst of later arrivals.
+
+nba_api traffic is limited by mounting RateLimitedAdapter on the session all
+endpoints share (install_nba_api); other callers use acquire(host) or get().
+
+Env vars:
+  NBA_STATS_RATE / NBA_STATS_BURST       requests per second / bucket size (default 2 / 4)
+  BALLDONTLIE_RATE / BALLDONTLIE_BURST   requests per second / bucket size (default 1 / 5)
+  ESPN_RATE / ESPN_BURST                 requests per second / bucket size (default 1 / 3)
+  RATE_LIMIT_DIR                         bucket state files (default <tmp>/lambda_rim_rate_limits)
+  RATE_LIMIT_SHARED                      set to "0" to keep buckets process-local
+"""
+import os
+import time
+import struct
+import logging
+import tempfile
+import threading
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    import fcntl
+except ImportError:          # non-POSIX: fall back to per-process buckets
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+NBA_STATS   = "stats.nba.com"
+BALLDONTLIE = "api.balldontlie.io"
+ESPN        = "site.api.espn.com"
+
+LIMITS = {
+    NBA_STATS:   (float(os.getenv("NBA_STATS_RATE", "2")),   int(os.getenv("NBA_STATS_BURST", "4"))),
+    BALLDONTLIE: (float(os.getenv("BALLDONTLIE_RATE", "1")), int(os.getenv("BALLDONTLIE_BURST", "5"))),
+    ESPN:        (float(os.getenv("ESPN_RATE", "1")),        int(os.getenv("ESPN_BURST", "3"))),
+}
+STATE_DIR = os.getenv("RATE_LIMIT_DIR", os.path.join(tempfile.gettempdir(), "lambda_rim_rate_limits"))
+SHARED    = os.getenv("RATE_LIMIT_SHARED", "1") != "0" and fcntl is not None
+
+_STATE = struct.Struct("dd")          # (tokens, updated_at)
+
+
+class TokenBucket:
+    def __init__(self, name, rate, burst, state_dir=None):
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+        self._lock = threading.Lock()
+        self._path = os.path.join(state_dir, f"{name}.bucket") if state_dir else None
+        self._fd = None
+        self._pid = None
+        self._tokens = float(burst)
+        self._updated = time.time()
+        self.acquired = 0
+        self.waited = 0.0
+
+    def _file(self):
+        # one descriptor per process – flock on an inherited fd would be shared
+        if self._fd is None or self._pid != os.getpid():
+            os.makedirs(os.path.dirname(self._path), exist_ok=True)
+            self._fd = os.open(self._path, os.O_RDWR | os.O_CREAT, 0o644)
+            self._pid = os.getpid()
+        return self._fd
+
+    def _take(self, now, tokens):
+        elapsed = max(0.0, now - self._updated)
+        self._tokens = min(self.burst, self._tokens + elapsed * self.rate) - tokens
+        self._updated = max(now, self._updated)
+        return max(0.0, -self._tokens / self.rate)
+
+    def reserve(self, tokens=1):
+        """Take `tokens` now and return how long the caller must wait before using them."""
+        with self._lock:
+            now = time.time()
+            if self._path is None:
+                wait = self._take(now, tokens)
+            else:
+                fd = self._file()
+                fcntl.flock(fd, fcntl.LOCK_EX)
+                try:
+                    raw = os.pread(fd, _STATE.size, 0)
+                    if len(raw) == _STATE.size:
+                        self._tokens, self._updated = _STATE.unpack(raw)
+                    else:
+                        self._tokens, self._updated = float(self.burst), now
+                    wait = self._take(now, tokens)
+                    os.pwrite(fd, _STATE.pack(self._tokens, self._updated), 0)
+                finally:
+                    fcntl.flock(fd, fcntl.LOCK_UN)
+            self.acquired += 1
+            self.waited += wait
+            return wait
+
+    def acquire(self, tokens=1):
+        wait = self.reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+_buckets = {
+    host: TokenBucket(host, rate, burst, STATE_DIR if SHARED else None)
+    for host, (rate, burst) in LIMITS.items()
+}
+
+
+def acquire(host, tokens=1):
+    """Block until a call to `host` is allowed. Hosts without a limit return at once."""
+    bucket = _buckets.get(host)
+    if bucket is None:
+        return 0.0
+    wait = bucket.acquire(tokens)
+    if wait > 1:
+        logger.info(f"[rate_limiter] waited {wait:.1f}s for {host}")
+    return wait
+
+
+def get(url, **kwargs):
+    """requests.get paced by the limiter of the URL's host."""
+    acquire(urlparse(url).hostname)
+    return requests.get(url, **kwargs)
+
+
+class RateLimitedAdapter(HTTPAdapter):
+    """HTTPAdapter that takes a token for the request's host before sending."""
+
+    def send(self, request, **kwargs):
+        acquire(urlparse(request.url).hostname)
+        return super().send(request, **kwargs)
+
+
+def install_nba_api(retry=None):
+    """
+    Mount RateLimitedAdapter on the session every nba_api endpoint reuses.
+    Without `retry`, an already installed adapter (and its retry policy) is kept.
+    """
+    from nba_api.stats.library.http import NBAStatsHTTP
+
+    session = NBAStatsHTTP().get_session()
+    if retry is None and isinstance(session.get_adapter("https://"), RateLimitedAdapter):
+        return session
+    for prefix in ("https://", "http://"):
+        session.mount(prefix, RateLimitedAdapter(max_retries=retry if retry is not None else 0))
+    return session
+
+
+def get_stats():
+    """Per-host calls and total seconds spent waiting in this process."""
+    return {
+        host: {
+            "rate": bucket.rate,
+            "burst": bucket.burst,
+            "acquired": bucket.acquired,
+            "waitedSeconds": round(bucket.waited, 3),
+            "shared": bucket._path is not None,
+        }
+        for host, bucket in _buckets.items()
+    }
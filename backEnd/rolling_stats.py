@@ -0,0 +1,135 @@
+"""
+Rolling-window statistics
+Last-N means / standard deviations for any set of window lengths, an
+exponentially weighted mean and deviation, and the same views restricted to
+home games, away games or games against one opponent – all from a player's
+game log with a handful of NumPy calls (one cumulative sum per filter covers
+every window). Adding a "last 20" view is one more entry in `windows`.
+
+summarize() is the `rollingStats` field of an analysis (and so what the
+explainer sees); last_n() feeds monte_carlo and points_series() the
+volatility forecast.
+"""
+import numpy as np
+import pandas as pd
+
+import asof_stats
+
+WINDOWS = (5, 10, 15)
+EWMA_HALFLIFE = 5.0               # games
+STATS = {"PTS": "points", "MIN": "minutes"}
+
+
+def _newest_first(df, stats):
+    """(values, matchups, dates) of a game log, newest game first; values is (games, len(stats))."""
+    if df is None or df.empty:
+        return np.empty((0, len(stats))), np.array([], dtype=str), np.array([], dtype="datetime64[ns]")
+    frame, dates = asof_stats.chronological(df)
+    frame = frame.iloc[::-1]
+    columns = []
+    for stat in stats:
+        column = frame[stat] if stat in frame else pd.Series(0, index=frame.index)
+        if stat == "MIN":
+            column = asof_stats.parse_minutes(column)
+        columns.append(pd.to_numeric(column, errors="coerce").fillna(0).to_numpy(dtype=float))
+    values = np.column_stack(columns) if columns else np.empty((len(frame), 0))
+    matchups = frame["MATCHUP"].astype(str).to_numpy() if "MATCHUP" in frame else np.full(len(frame), "")
+    return values, matchups, dates.iloc[::-1].to_numpy()
+
+
+def window_table(values, windows):
+    """
+    Mean and sample std of the newest N rows for every N in `windows`, from
+    one cumulative sum. `values` is (games, stats), newest first. Returns
+    (games, means, stds): arrays shaped (windows,) and (windows, stats), NaN
+    where a window has too few games.
+    """
+    n = len(values)
+    sizes = np.minimum(np.asarray(windows, dtype=int), n)
+    if n == 0:
+        empty = np.full((len(sizes), values.shape[1]), np.nan)
+        return sizes, empty, empty.copy()
+    sums = np.cumsum(values, axis=0)
+    squares = np.cumsum(values * values, axis=0)
+    rows = np.maximum(sizes - 1, 0)
+    k = sizes[:, None].astype(float)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = np.where(k > 0, sums[rows] / k, np.nan)
+        variance = (squares[rows] - sums[rows] ** 2 / k) / (k - 1)
+        stds = np.where(k > 1, np.sqrt(np.maximum(variance, 0.0)), np.nan)
+    return sizes, means, stds
+
+
+def ewma(values, halflife=EWMA_HALFLIFE):
+    """Exponentially weighted mean and (bias-corrected) std per column, newest row weighted 1."""
+    n = len(values)
+    if n == 0:
+        nan = np.full(values.shape[1], np.nan)
+        return nan, nan.copy()
+    weights = 0.5 ** (np.arange(n) / halflife)
+    v1, v2 = weights.sum(), (weights * weights).sum()
+    means = weights @ values / v1
+    spread = weights @ (values - means) ** 2 / v1
+    with np.errstate(invalid="ignore", divide="ignore"):
+        stds = np.sqrt(spread * v1 * v1 / (v1 * v1 - v2)) if n > 1 else np.full(values.shape[1], np.nan)
+    return means, stds
+
+
+def _number(x):
+    return None if np.isnan(x) else round(float(x), 3)
+
+
+def _float(x):
+    return None if np.isnan(x) else float(x)
+
+
+def _view(values, windows, halflife):
+    labels = [f"last{w}" for w in windows] + ["season"]
+    sizes, means, stds = window_table(values, list(windows) + [len(values)])
+    view = {}
+    for label, games, mean_row, std_row in zip(labels, sizes, means, stds):
+        entry = {"games": int(games)}
+        for name, mean, std in zip(STATS.values(), mean_row, std_row):
+            entry[name] = _number(mean)
+            entry[f"{name}Std"] = _number(std)
+        view[label] = entry
+    ewm_means, ewm_stds = ewma(values, halflife)
+    view["ewma"] = {"halflife": halflife}
+    for name, mean, std in zip(STATS.values(), ewm_means, ewm_stds):
+        view["ewma"][name] = _number(mean)
+        view["ewma"][f"{name}Std"] = _number(std)
+    return view
+
+
+def summarize(df, windows=WINDOWS, halflife=EWMA_HALFLIFE, opponent=None):
+    """
+    {"all" | "home" | "away" | "vsOpponent": {"last5": {...}, ..., "season": {...}, "ewma": {...}}}
+    for a game log; each window holds games, points, pointsStd, minutes,
+    minutesStd. "vsOpponent" is only present when `opponent` (an abbreviation)
+    is given.
+    """
+    values, matchups, _ = _newest_first(df, STATS)
+    masks = {
+        "all":  np.ones(len(values), dtype=bool),
+        "home": np.char.find(matchups.astype(str), " vs. ") >= 0,
+        "away": np.char.find(matchups.astype(str), " @ ") >= 0,
+    }
+    if opponent:
+        masks["vsOpponent"] = np.char.endswith(matchups.astype(str), f" {opponent}")
+    return {name: _view(values[mask], windows, halflife) for name, mask in masks.items()}
+
+
+def last_n(df, n, stat="PTS"):
+    """(games, mean, sample std) of `stat` over the newest `n` games; mean/std None if too few."""
+    values, _, _ = _newest_first(df, (stat,))
+    sizes, means, stds = window_table(values, [n])
+    return int(sizes[0]), _float(means[0, 0]), _float(stds[0, 0])
+
+
+def points_series(df, n, before_game=None):
+    """Points of the newest `n` games (before `before_game`, if given) as a date-indexed Series, oldest first."""
+    if before_game is not None:
+        df = asof_stats.PrefixIndex(df).frame_before(before_game)
+    values, _, dates = _newest_first(df, ("PTS",))
+    values, dates = values[:n, 0], dates[:n]
+    return pd.Series(values[::-1], index=pd.DatetimeIndex(dates[::-1]))
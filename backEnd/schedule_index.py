@@ -0,0 +1,103 @@
+"""
+Season schedule index
+team_id -> chronologically ordered games (game_id, date, home/away, opponent),
+built once per day from a single ScheduleLeagueV2 call and shared by every
+request and gunicorn worker through nba_cache. Resolving a team's next game is
+a binary search instead of probing ScoreboardV2 one day at a time.
+"""
+import bisect
+import datetime
+import logging
+
+import pytz
+from nba_api.stats.endpoints import ScheduleLeagueV2
+
+import nba_cache
+import singleflight
+
+logger = logging.getLogger(__name__)
+
+_INDEX_NAME = "schedule_index"
+_eastern = pytz.timezone("America/New_York")
+_builds = singleflight.Group(_INDEX_NAME)
+
+
+def _today_eastern():
+    return datetime.datetime.now(_eastern).date()
+
+
+def _seconds_until_tomorrow():
+    now = datetime.datetime.now(_eastern)
+    tomorrow = _eastern.localize(datetime.datetime.combine(now.date() + datetime.timedelta(days=1),
+                                                           datetime.time()))
+    return max(60, int((tomorrow - now).total_seconds()))
+
+
+def build_index(season):
+    """
+    Return {team_id: {"dates": [date ordinals], "games": [game dicts]}} for a
+    season. Both lists are sorted by date, so they can be bisected together.
+    """
+    df = ScheduleLeagueV2(season=season).season_games.get_data_frame()
+    index = {}
+    if df.empty:
+        return index
+
+    dates = [datetime.date.fromisoformat(str(d)[:10]) for d in df["gameDateEst"]]
+    for game_date, game_id, home_id, away_id, status in zip(
+        dates, df["gameId"], df["homeTeam_teamId"], df["awayTeam_teamId"], df["gameStatusText"]
+    ):
+        home_id, away_id = int(home_id), int(away_id)
+        if not home_id or not away_id:          # TBD playoff slots
+            continue
+        for team_id, opp_id, is_home in ((home_id, away_id, True), (away_id, home_id, False)):
+            index.setdefault(team_id, []).append({
+                "gameId": str(game_id),
+                "date": game_date,
+                "home": is_home,
+                "opponentId": opp_id,
+                "statusText": status,
+            })
+
+    for games in index.values():
+        games.sort(key=lambda g: (g["date"], g["gameId"]))
+    return {
+        team_id: {"dates": [g["date"].toordinal() for g in games], "games": games}
+        for team_id, games in index.items()
+    }
+
+
+def _build_once(season, key):
+    # another worker may have built it while this one waited for the lock
+    with singleflight.file_lock((_INDEX_NAME,) + key):
+        index = nba_cache.get_derived(_INDEX_NAME, key)
+        if index is None:
+            index = build_index(season)
+            nba_cache.set_derived(_INDEX_NAME, key, index, ttl=_seconds_until_tomorrow())
+        return index
+
+
+def get_index(season=None):
+    """Today's schedule index (built at most once per day across all workers)."""
+    season = season or nba_cache.current_season()
+    key = (season, _today_eastern().isoformat())
+    index = nba_cache.get_derived(_INDEX_NAME, key)
+    if index is None:
+        index, _ = _builds.do(key, _build_once, season, key)
+    return index
+
+
+def next_game(team_id, on_or_after=None, max_days=14, season=None):
+    """
+    Return the team's first game dated on/after `on_or_after` (default: today
+    ET) and within `max_days`, as a dict with gameId, date, home, opponentId
+    and statusText – or None if there is none.
+    """
+    start = on_or_after or _today_eastern()
+    team = get_index(season).get(int(team_id))
+    if not team:
+        return None
+    i = bisect.bisect_left(team["dates"], start.toordinal())
+    if i == len(team["dates"]) or team["dates"][i] >= start.toordinal() + max_days:
+        return None
+    return team["games"][i]
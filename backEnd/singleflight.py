@@ -0,0 +1,101 @@
+"""
+Single-flight call coalescing
+Group.do(key, fn) runs `fn` once per key at a time: callers that arrive while
+a call for the same key is in flight wait for it and share its result (or
+its exception) instead of repeating the work. Nothing is cached afterwards –
+the next call after completion runs `fn` again.
+
+Group only coalesces threads of one process. file_lock(key) extends this
+across gunicorn workers: the worker holding the lock computes, the others
+block on it and should then re-check the shared store (Firestore, nba_cache)
+the winner wrote to.
+
+Env vars:
+  SINGLEFLIGHT_DIR   lock files for file_lock (default <tmp>/lambda_rim_singleflight)
+"""
+import os
+import hashlib
+import logging
+import tempfile
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:          # non-POSIX: file_lock degrades to a no-op
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+LOCK_DIR = os.getenv("SINGLEFLIGHT_DIR", os.path.join(tempfile.gettempdir(), "lambda_rim_singleflight"))
+
+
+class _Call:
+    __slots__ = ("done", "value", "error", "waiters")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+        self.waiters = 0
+
+
+class Group:
+    def __init__(self, name=""):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    def do(self, key, fn, *args, **kwargs):
+        """
+        Return (result, shared): `shared` is True if the result was also
+        handed to (or taken from) another concurrent caller.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.calls += 1
+            else:
+                call.waiters += 1
+                self.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value, True
+
+        try:
+            call.value = fn(*args, **kwargs)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.value, call.waiters > 0
+
+    def stats(self):
+        with self._lock:
+            return {"calls": self.calls, "coalesced": self.coalesced, "inFlight": len(self._calls)}
+
+
+@contextmanager
+def file_lock(key, directory=LOCK_DIR):
+    """Exclusive cross-process lock for `key` (any repr-able value)."""
+    if fcntl is None:
+        yield
+        return
+    os.makedirs(directory, exist_ok=True)
+    name = hashlib.sha1(repr(key).encode("utf-8")).hexdigest()
+    fd = os.open(os.path.join(directory, f"{name}.lock"), os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        os.close(fd)          # closing releases the lock
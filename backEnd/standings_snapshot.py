@@ -0,0 +1,117 @@
+"""
+Standings snapshot
+League standings only change once a night, so they are fetched once and
+indexed by TeamID: {team_id: {"PlayoffRank", "Conference", "WINS", "LOSSES", ...}}.
+
+The snapshot lives in nba_cache (memory + shared SQLite store) until the next
+morning ET, and check_games refreshes it as soon as the last game of the day
+goes Final, so every analysis reads it from memory. A missing snapshot is
+fetched once however many threads and workers ask for it at the same time.
+"""
+import datetime
+import logging
+
+import pandas as pd
+import pytz
+from nba_api.stats.endpoints import leaguestandings
+
+import nba_cache
+import singleflight
+
+logger = logging.getLogger(__name__)
+
+_INDEX_NAME = "standings_snapshot"
+_REFRESH_HOUR_ET = 4          # every game of the previous night is final by then
+_COLUMNS = ("PlayoffRank", "Conference", "WINS", "LOSSES", "WinPCT", "TeamCity", "TeamName")
+_eastern = pytz.timezone("America/New_York")
+_refreshes = singleflight.Group(_INDEX_NAME)
+
+
+def _seconds_until_refresh():
+    now = datetime.datetime.now(_eastern)
+    refresh_at = now.replace(hour=_REFRESH_HOUR_ET, minute=0, second=0, microsecond=0)
+    if refresh_at <= now:
+        refresh_at += datetime.timedelta(days=1)
+    return int((refresh_at - now).total_seconds())
+
+
+def _build(season):
+    df = leaguestandings.LeagueStandings(season=season).get_data_frames()[0]
+    columns = [c for c in _COLUMNS if c in df.columns]
+    teams = {}
+    for record in df[["TeamID", *columns]].to_dict("records"):
+        team_id = int(record.pop("TeamID"))
+        if "PlayoffRank" in record:
+            record["PlayoffRank"] = int(record["PlayoffRank"])
+        teams[team_id] = record
+    return teams
+
+
+def refresh(season=None, as_of_date=None):
+    """Fetch standings now and replace the shared snapshot."""
+    season = season or nba_cache.current_season()
+    snapshot = {
+        "teams": _build(season),
+        "asOfDate": as_of_date,
+        "takenAt": datetime.datetime.now(_eastern).isoformat(),
+    }
+    nba_cache.set_derived(_INDEX_NAME, season, snapshot, ttl=_seconds_until_refresh())
+    logger.info(f"[standings] snapshot refreshed for {season} (as of {as_of_date})")
+    return snapshot
+
+
+def _refresh_once(season):
+    # another worker may have fetched it while this one waited for the lock
+    with singleflight.file_lock((_INDEX_NAME, season)):
+        snapshot = nba_cache.get_derived(_INDEX_NAME, season)
+        return snapshot if snapshot is not None else refresh(season)
+
+
+def get_snapshot(season=None):
+    """Return {team_id: standings row}, fetching only if no live snapshot exists."""
+    season = season or nba_cache.current_season()
+    snapshot = nba_cache.get_derived(_INDEX_NAME, season)
+    if snapshot is None:
+        snapshot, _ = _refreshes.do(season, _refresh_once, season)
+    return snapshot["teams"]
+
+
+def get_team(team_id, season=None):
+    """Standings row for one team, or None."""
+    return get_snapshot(season).get(int(team_id)) if team_id is not None else None
+
+
+def night_is_final(game_date):
+    """
+    True once `game_date` (MM/DD/YYYY) has games and every one of them is
+    final – GAME_STATUS_ID 3, which also covers "Final/OT" and "Final/2OT".
+    """
+    games = nba_cache.get_scoreboard(game_date)
+    return not games.empty and bool((pd.to_numeric(games["GAME_STATUS_ID"], errors="coerce") == 3).all())
+
+
+def refresh_when_final(index_name, key, rebuild, game_date=None):
+    """
+    Shared by the nightly snapshots: call rebuild(game_date) once every game
+    on `game_date` (default today ET) is final and the derived entry
+    (index_name, key) does not already include that night. Returns True if
+    a rebuild happened.
+    """
+    game_date = game_date or datetime.datetime.now(_eastern).strftime("%m/%d/%Y")
+    held = nba_cache.get_derived(index_name, key)
+    if held is not None and held.get("asOfDate") == game_date:
+        return False
+    if not night_is_final(game_date):
+        return False
+    rebuild(game_date)
+    return True
+
+
+def refresh_after_final(game_date=None, season=None):
+    """
+    Refresh the snapshot once every game on `game_date` (MM/DD/YYYY, default
+    today ET) is Final and the snapshot does not already include that night.
+    Returns True if a refresh happened.
+    """
+    season = season or nba_cache.current_season()
+    return refresh_when_final(_INDEX_NAME, season, lambda night: refresh(season, as_of_date=night), game_date)
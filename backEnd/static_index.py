@@ -0,0 +1,83 @@
+"""
+Static team / player lookup indexes
+nba_api's static helpers scan (or regex-search) the full team and player lists
+on every call. These dicts are built once at import so every lookup is O(1).
+
+Player and team names are keyed by `normalize_name`, which is case-, accent-
+and punctuation-insensitive ("Luka Dončić" == "luka doncic",
+"P.J. Washington" == "PJ Washington").
+"""
+import re
+import unicodedata
+
+from nba_api.stats.static import teams, players
+
+
+def normalize_name(name):
+    """Lower-case, strip accents and punctuation, collapse whitespace."""
+    if not name:
+        return ""
+    ascii_name = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode("ascii")
+    ascii_name = re.sub(r"[.'’`]", "", ascii_name.lower())
+    return " ".join(re.sub(r"[-_,]", " ", ascii_name).split())
+
+
+# ----  TEAMS  -------------------------------------------------------------
+_ALL_TEAMS = teams.get_teams()
+TEAM_BY_ID        = {t["id"]: t for t in _ALL_TEAMS}
+TEAM_BY_ABBR      = {t["abbreviation"]: t for t in _ALL_TEAMS}
+TEAM_BY_FULL_NAME = {normalize_name(t["full_name"]): t for t in _ALL_TEAMS}
+TEAM_BY_NICKNAME  = {normalize_name(t["nickname"]): t for t in _ALL_TEAMS}
+
+# ----  PLAYERS  -----------------------------------------------------------
+_ALL_PLAYERS = players.get_players()
+PLAYER_BY_ID = {p["id"]: p for p in _ALL_PLAYERS}
+PLAYERS_BY_NAME = {}          # normalized full name -> [player dicts], nba_api order
+for _p in _ALL_PLAYERS:
+    PLAYERS_BY_NAME.setdefault(normalize_name(_p["full_name"]), []).append(_p)
+
+
+def team_id_from_abbr(abbr):
+    team = TEAM_BY_ABBR.get(abbr)
+    return team["id"] if team else None
+
+
+def team_full_name_from_abbr(abbr):
+    team = TEAM_BY_ABBR.get(abbr)
+    return team["full_name"] if team else abbr
+
+
+def team_logo_url(team_id):
+    return f"https://cdn.nba.com/logos/nba/{team_id}/global/L/logo.svg"
+
+
+def team_by_id(team_id):
+    return TEAM_BY_ID.get(int(team_id)) if team_id is not None else None
+
+
+def team_by_full_name(full_name):
+    """Exact (normalized) full-name match, else nickname ("LA Clippers" -> Clippers)."""
+    key = normalize_name(full_name)
+    team = TEAM_BY_FULL_NAME.get(key)
+    if team is None:
+        for nickname, candidate in TEAM_BY_NICKNAME.items():
+            if key.endswith(" " + nickname) or key == nickname:
+                return candidate
+    return team
+
+
+def find_players(full_name):
+    """
+    Players whose normalized full name matches exactly. Falls back to
+    nba_api's partial regex match only when there is no exact hit.
+    """
+    found = PLAYERS_BY_NAME.get(normalize_name(full_name))
+    if found:
+        return found
+    return players.find_players_by_full_name(full_name)
+
+
+def player_id_from_name(full_name):
+    """First matching nba_api player id, or None."""
+    found = find_players(full_name)
+    return found[0]["id"] if found else None
@@ -0,0 +1,124 @@
+"""
+League-wide team usage table
+Per-game FGA, FTA, TOV, OREB, possessions and pace for all 30 teams, built
+from one LeagueGameLog ("T") call instead of a TeamGameLog call per analysis
+or per injured player.
+
+Like the standings snapshot, the table lives in nba_cache until the next
+morning ET and check_games rebuilds it once the night's last game is Final,
+so usage-rate / importance-score calculations read it from memory. A
+missing table is built once however many threads and workers ask for it.
+"""
+import datetime
+import logging
+
+import pandas as pd
+import pytz
+
+import nba_cache
+import singleflight
+import standings_snapshot
+
+logger = logging.getLogger(__name__)
+
+_INDEX_NAME = "team_usage"
+COLUMNS = ("FGA", "FTA", "TOV", "OREB", "MIN")
+_eastern = pytz.timezone("America/New_York")
+_builds = singleflight.Group(_INDEX_NAME)
+
+
+def possessions(fga, fta, oreb, tov):
+    """Possession estimate: FGA + 0.44·FTA − OREB + TOV."""
+    return fga + 0.44 * fta - oreb + tov
+
+
+def _row(games, sums):
+    """Per-game averages from `games` and column totals (None without games)."""
+    if not games:
+        return None
+    poss = possessions(sums["FGA"], sums["FTA"], sums["OREB"], sums["TOV"])
+    return {
+        "games": int(games),
+        "FGA": sums["FGA"] / games,
+        "FTA": sums["FTA"] / games,
+        "TOV": sums["TOV"] / games,
+        "OREB": sums["OREB"] / games,
+        "possessions": poss / games,
+        "pace": 48 * poss / (sums["MIN"] / 5) if sums["MIN"] else None,
+    }
+
+
+def _build(season, season_type):
+    league_df = nba_cache.get_league_gamelog(season, season_type, "T")
+    teams = {}
+    if league_df.empty:
+        return teams, None
+    numeric = league_df[list(COLUMNS)].apply(pd.to_numeric, errors="coerce").fillna(0)
+    grouped = numeric.groupby(league_df["TEAM_ID"])
+    for (team_id, sums), games in zip(grouped.sum().iterrows(), grouped.size()):
+        teams[int(team_id)] = _row(games, {c: float(sums[c]) for c in COLUMNS})
+    return teams, pd.to_datetime(league_df["GAME_DATE"]).max().strftime("%m/%d/%Y")
+
+
+def refresh(season=None, season_type="Regular Season", as_of_date=None):
+    """Rebuild the table from the league log and replace the shared copy."""
+    season = season or nba_cache.current_season()
+    teams, latest = _build(season, season_type)
+    table = {
+        "teams": teams,
+        # only claim a night once its games are in the log (the league log is cached briefly)
+        "asOfDate": as_of_date if as_of_date is not None and as_of_date == latest else None,
+        "takenAt": datetime.datetime.now(_eastern).isoformat(),
+    }
+    nba_cache.set_derived(_INDEX_NAME, (season, season_type), table,
+                          ttl=standings_snapshot._seconds_until_refresh())
+    logger.info(f"[team_usage] table rebuilt for {season} {season_type}: {len(teams)} teams")
+    return table
+
+
+def _build_once(season, season_type):
+    # another worker may have built it while this one waited for the lock
+    with singleflight.file_lock((_INDEX_NAME, season, season_type)):
+        table = nba_cache.get_derived(_INDEX_NAME, (season, season_type))
+        return table if table is not None else refresh(season, season_type)
+
+
+def get_table(season=None, season_type="Regular Season"):
+    """The whole table, building it only if no live copy exists."""
+    season = season or nba_cache.current_season()
+    table = nba_cache.get_derived(_INDEX_NAME, (season, season_type))
+    if table is None:
+        table, _ = _builds.do((season, season_type), _build_once, season, season_type)
+    return table
+
+
+def get_team(team_id, season=None, season_type="Regular Season"):
+    """{"games", "FGA", "FTA", "TOV", "OREB", "possessions", "pace"} per game, or None."""
+    return get_table(season, season_type)["teams"].get(int(team_id))
+
+
+def usage_inputs(team_id, season=None):
+    """
+    Per-game team (FGA, FTA, TOV) – the denominator of usage rate. Falls back
+    to the team's own game log if the league table does not have the team.
+    """
+    row = get_team(team_id, season)
+    if row is not None:
+        return row["FGA"], row["FTA"], row["TOV"]
+    gamelog_df = nba_cache.get_team_gamelog(team_id, season or nba_cache.current_season())
+    return (
+        float(gamelog_df['FGA'].mean()),
+        float(gamelog_df['FTA'].mean()),
+        float(gamelog_df['TOV'].mean())
+    )
+
+
+def refresh_after_final(game_date=None, season=None):
+    """
+    Rebuild once every game on `game_date` (MM/DD/YYYY, default today ET) is
+    Final and the table does not already include that night. Returns True if
+    a rebuild happened.
+    """
+    season = season or nba_cache.current_season()
+    return standings_snapshot.refresh_when_final(
+        _INDEX_NAME, (season, "Regular Season"), lambda night: refresh(season, as_of_date=night), game_date)
@@ -3,10 +3,16 @@ from nba_api.stats.endpoints import playergamelog
 from typing import Optional
 import firebase_admin
 from firebase_admin import firestore
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import rate_limiter
+import asof_stats
+rate_limiter.install_nba_api()      # share the stats.nba.com budget with the API workers
 
 
 _player_gamelog_df_cache = {}     # player_id  -> full pd.DataFrame
-_team_gamelog_df_cache   = {}     # team_id    -> full pd.DataFrame
+_team_index_cache        = {}     # team_id    -> asof_stats.PrefixIndex
 
 def init_firestore():
     """
@@ -22,33 +28,19 @@ def _safe_div(num: float, den: float) -> Optional[float]:
     """Return num/den or None if denominator is zero (avoids -1 magic numbers)."""
     return num / den if den else None
 
-def _slice_before_game(df, game_id):
-    """
-    Return a sub-DF containing only rows BEFORE the supplied Game_ID.
-    Assumes df is in chronological order (earliest first).
-    """
-    # index of the current game (will raise if not in DF – good sanity check)
-    idx_curr = df.index[df["Game_ID"] == game_id][0]
-    return df.iloc[:idx_curr]              # everything *before* that row
-
 def fetch_team_stats_for_usage(team_id, season, game_id, gameType):
-    if team_id in _team_gamelog_df_cache:
-        df = _team_gamelog_df_cache[team_id]
-    else:
-        df = TeamGameLog(team_id=team_id, season=season).get_data_frames()[0][::-1].reset_index(drop=True)
-        _team_gamelog_df_cache[team_id] = df
+    if team_id not in _team_index_cache:
+        df = TeamGameLog(team_id=team_id, season=season).get_data_frames()[0]
+        _team_index_cache[team_id] = asof_stats.PrefixIndex(df)
+    index = _team_index_cache[team_id]
 
-    if df.empty:
+    if not len(index):
         return None, None, None
-    
-    if gameType != "Playoffs":
-        df = _slice_before_game(df, game_id)
 
-    return (
-        df["FGA"].mean(),
-        df["FTA"].mean(),
-        df["TOV"].mean(),
-    )
+    stats = ("FGA", "FTA", "TOV")
+    if gameType != "Playoffs":
+        return index.means_before(game_id, stats)
+    return tuple(index.mean(stat) for stat in stats)
 
 def calculate_importance_metrics(fga, fta, tov, mins, team_fga, team_fta, team_tov):
     alpha = 0.7
@@ -26,15 +26,20 @@ import time
 
 # ----  GLOBAL CACHES  ---------------------------------------------------
 _player_info_cache   = {}
-_player_gamelog_df_cache = {}     # player_id  -> full pd.DataFrame
-_team_gamelog_df_cache   = {}     # team_id    -> full pd.DataFrame
+_player_index_cache      = {}     # player_id  -> asof_stats.PrefixIndex
+_team_index_cache        = {}     # team_id    -> asof_stats.PrefixIndex
 
 # ----  ONE SHARED HTTP SESSION WITH RETRY / BACK-OFF  -------------------
 # -----------------------------------------------------------------------
 #  Retry-and-back-off logic for every call nba_api makes
 # -----------------------------------------------------------------------
-from requests.adapters import HTTPAdapter, Retry
+import os
+import sys
+from requests.adapters import Retry
 from nba_api.stats.library.http import NBAStatsHTTP
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import rate_limiter
+import asof_stats
 
 retry = Retry(
     total=6,                 # 6 attempts max
@@ -43,12 +48,9 @@ retry = Retry(
     allowed_methods=["GET"],
 )
 
-# ---> 1.  Get the *global* session that all nba_api endpoints reuse
-session = NBAStatsHTTP().get_session()      # <—  FIX: use get_session()
-
-# ---> 2.  Attach our retry adapter once
-session.mount("https://", HTTPAdapter(max_retries=retry))
-session.mount("http://",  HTTPAdapter(max_retries=retry))
+# ---> 1+2.  Attach our retry + rate-limit adapter to the *global* session
+#            that all nba_api endpoints reuse (shared stats.nba.com budget)
+session = rate_limiter.install_nba_api(retry)
 
 # ---> 3.  Increase the default request timeout for every endpoint
 NBAStatsHTTP.TIMEOUT = 30   # seconds (default is 10)                  # seconds (default is 10)
@@ -245,60 +247,33 @@ def player_image_loading(player_name):
     nba_player_id = nba_found[0]["id"]
     return get_player_image_url(nba_player_id)
 
-def _slice_before_game(df, game_id):
-    """
-    Return a sub-DF containing only rows BEFORE the supplied Game_ID.
-    Assumes df is in chronological order (earliest first).
-    """
-    # index of the current game (will raise if not in DF – good sanity check)
-    idx_curr = df.index[df["Game_ID"] == game_id][0]
-    return df.iloc[:idx_curr]              # everything *before* that row
-
 ## MAIN FUNCTIONS ##
 
 def fetch_player_game_stats(player_id, season_str, game_id):
-    if player_id in _player_gamelog_df_cache:
-        df = _player_gamelog_df_cache[player_id]
-    else:
+    if player_id not in _player_index_cache:
         df = playergamelog.PlayerGameLog(
                 player_id=player_id,
                 season=SeasonAll.current_season
-             ).get_data_frames()[0][::-1]   # reverse → chronological
-        _player_gamelog_df_cache[player_id] = df
-
-    if df.empty or game_id not in df["Game_ID"].values:
-        return None, None, None, None
+             ).get_data_frames()[0]
+        _player_index_cache[player_id] = asof_stats.PrefixIndex(df)
+    index = _player_index_cache[player_id]
 
-    df_past = _slice_before_game(df, game_id)
-    if df_past.empty:
+    if game_id not in index:
         return None, None, None, None
 
-    return (
-        df_past["FGA"].mean(),
-        df_past["FTA"].mean(),
-        df_past["TOV"].mean(),
-        df_past["MIN"].mean(),
-    )
+    # averages over the games before this one (Nones if it was the first)
+    return index.means_before(game_id, ("FGA", "FTA", "TOV", "MIN"))
 
 def fetch_team_stats_for_usage(team_id, season, game_id):
-    if team_id in _team_gamelog_df_cache:
-        df = _team_gamelog_df_cache[team_id]
-    else:
-        df = TeamGameLog(team_id=team_id, season=season).get_data_frames()[0][::-1]
-        _team_gamelog_df_cache[team_id] = df
+    if team_id not in _team_index_cache:
+        df = TeamGameLog(team_id=team_id, season=season).get_data_frames()[0]
+        _team_index_cache[team_id] = asof_stats.PrefixIndex(df)
+    index = _team_index_cache[team_id]
 
-    if df.empty or game_id not in df["Game_ID"].values:
+    if game_id not in index:
         return None, None, None
 
-    df_past = _slice_before_game(df, game_id)
-    if df_past.empty:
-        return None, None, None
-
-    return (
-        df_past["FGA"].mean(),
-        df_past["FTA"].mean(),
-        df_past["TOV"].mean(),
-    )
+    return index.means_before(game_id, ("FGA", "FTA", "TOV"))
 
 def get_data_metrics(player_name, game_id):
     player_image_url = player_image_loading(player_name)
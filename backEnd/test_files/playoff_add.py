@@ -6,9 +6,15 @@ from nba_api.stats.static import teams
 import time
 from typing import Optional
 from nba_api.stats.endpoints import TeamGameLog
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import rate_limiter
+import asof_stats
+rate_limiter.install_nba_api()      # share the stats.nba.com budget with the API workers
 
 _player_gamelog_df_cache = {}     # player_id  -> full pd.DataFrame
-_team_gamelog_df_cache   = {}     # team_id    -> full pd.DataFrame
+_team_index_cache        = {}     # team_id    -> asof_stats.PrefixIndex
 
 def init_firestore():
     """
@@ -24,15 +30,6 @@ def _safe_div(num: float, den: float) -> Optional[float]:
     """Return num/den or None if denominator is zero (avoids -1 magic numbers)."""
     return num / den if den else None
 
-def _slice_before_game(df, game_id):
-    """
-    Return a sub-DF containing only rows BEFORE the supplied Game_ID.
-    Assumes df is in chronological order (earliest first).
-    """
-    # index of the current game (will raise if not in DF – good sanity check)
-    idx_curr = df.index[df["Game_ID"] == game_id][0]
-    return df.iloc[:idx_curr]              # everything *before* that row
-
 def get_team_full_name_from_abbr(abbr):
         all_teams = teams.get_teams()
         for t in all_teams:
@@ -48,24 +45,16 @@ def get_team_id_from_abbr(abbr):
     return None
 
 def fetch_team_stats_for_usage(team_id, season, game_id):
-    if team_id in _team_gamelog_df_cache:
-        df = _team_gamelog_df_cache[team_id]
-    else:
-        df = TeamGameLog(team_id=team_id, season=season, season_type_all_star='Playoffs').get_data_frames()[0][::-1].reset_index(drop=True)
-        _team_gamelog_df_cache[team_id] = df
+    if team_id not in _team_index_cache:
+        df = TeamGameLog(team_id=team_id, season=season, season_type_all_star='Playoffs').get_data_frames()[0]
+        _team_index_cache[team_id] = asof_stats.PrefixIndex(df)
+    index = _team_index_cache[team_id]
 
-    if df.empty or game_id not in df["Game_ID"].values:
-        return None, None, None
-    
-    df_past = _slice_before_game(df, game_id)
-    if df_past.empty:
+    if game_id not in index:
         return None, None, None
 
-    return (
-        df_past["FGA"].mean(),
-        df_past["FTA"].mean(),
-        df_past["TOV"].mean(),
-    )
+    # averages over the games before this one (Nones if it was the first)
+    return index.means_before(game_id, ("FGA", "FTA", "TOV"))
 
 
 # Get team logo URL
@@ -26,6 +26,11 @@ from requests.exceptions import ReadTimeout
 
 import time
 from itertools import islice
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import rate_limiter
+rate_limiter.install_nba_api()      # paces every BoxScoreTraditionalV2 call
 
 
 # –– Firestore bootstrap –– #
@@ -95,8 +100,7 @@ def main() -> None:
     logging.info("Fetched %d docs", len(docs))
 
     # ── constants you can tweak ──────────────────────────────────
-    BATCH_SIZE     = 15          # throttle every N docs
-    PAUSE_SECS     = 10           # normal pause between batches
+    BATCH_SIZE     = 15          # check the timeout streak every N docs
     TIMEOUT_STREAK = 5           # consecutive timeouts ⇒ long pause
     TIMEOUT_PAUSE  = 30          # length of that long pause
     MAX_RETRIES    = 3           # per-doc retry cap
@@ -156,11 +160,6 @@ def main() -> None:
             i += 1
             run_player(snap, i)
 
-        # normal throttle
-        if i < len(docs):
-            logging.info("⏸  processed %d docs – sleeping %d s …", i, PAUSE_SECS)
-            time.sleep(PAUSE_SECS)
-
         # ── if 5 consecutive timeouts occurred ───────────────────
         if timeout_streak >= TIMEOUT_STREAK:
             logging.warning("⚠️  %d consecutive timeouts – pausing %d s and retrying %d docs",
@@ -0,0 +1,10 @@
+"""
+Shared setup for the backEnd tests: the modules live flat in backEnd/, so
+it goes on sys.path, and nba_cache never touches an on-disk store.
+Run: python -m pytest backEnd/tests -v
+"""
+import os
+import sys
+
+os.environ["NBA_CACHE_DISK"] = "0"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,101 @@
+"""
+Tests for asof_stats.py -- prefix-sum as-of queries against direct slices of
+a synthetic game log, no API calls.
+Run freely: python -m pytest backEnd/tests/test_asof_stats.py -v
+"""
+import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import asof_stats
+from asof_stats import PrefixIndex
+
+
+def make_log(games=30, seed=3):
+    """A PlayerGameLog-shaped frame, newest game first (the order nba_api returns)."""
+    rng = np.random.default_rng(seed)
+    start = datetime.date(2025, 10, 22)
+    rows = []
+    for i in range(games):
+        home = bool(rng.random() < 0.5)
+        rows.append({
+            "Game_ID": f"00225{i:05d}",
+            "GAME_DATE": (start + datetime.timedelta(days=2 * i)).strftime("%b %d, %Y").upper(),
+            "MATCHUP": "IND vs. BOS" if home else "IND @ BOS",
+            "PTS": int(rng.integers(2, 40)),
+            "MIN": f"{int(rng.integers(10, 40))}:{int(rng.integers(0, 60)):02d}",
+            "FGA": int(rng.integers(5, 25)),
+            "REB": int(rng.integers(0, 15)),
+        })
+    return pd.DataFrame(rows[::-1])
+
+
+@pytest.fixture
+def log():
+    return make_log()
+
+
+@pytest.fixture
+def oldest_first(log):
+    frame = log.iloc[::-1].reset_index(drop=True)
+    return frame.assign(MIN=frame["MIN"].str.split(":").str[0].astype(int))
+
+
+class TestAsOfQueries:
+    """Every as-of answer equals the mean of the matching slice."""
+
+    @pytest.mark.parametrize("position", [1, 5, 17, 29])
+    def test_means_before_game(self, log, oldest_first, position):
+        index = PrefixIndex(log)
+        before = oldest_first.iloc[:position]
+        pts, minutes, fga = index.means_before(oldest_first["Game_ID"][position], ("PTS", "MIN", "FGA"))
+        assert pts == pytest.approx(before["PTS"].mean())
+        assert minutes == pytest.approx(before["MIN"].mean())
+        assert fga == pytest.approx(before["FGA"].mean())
+
+    def test_first_game_has_no_history(self, log, oldest_first):
+        index = PrefixIndex(log)
+        assert index.means_before(oldest_first["Game_ID"][0], ("PTS",)) == (None,)
+
+    @pytest.mark.parametrize("split, marker", [("Home", " vs. "), ("Away", " @ ")])
+    def test_splits(self, log, oldest_first, split, marker):
+        index = PrefixIndex(log)
+        before = oldest_first.iloc[:20]
+        side = before[before["MATCHUP"].str.contains(marker, regex=False)]
+        assert index.games(0, 20, split) == len(side)
+        assert index.mean("PTS", 0, 20, split) == pytest.approx(side["PTS"].mean())
+
+    def test_range_mean_and_variance(self, log, oldest_first):
+        index = PrefixIndex(log)
+        window = oldest_first["PTS"].iloc[8:21]
+        assert index.mean("PTS", 8, 21) == pytest.approx(window.mean())
+        assert index.variance("PTS", 8, 21) == pytest.approx(window.var(ddof=1))
+
+    def test_frame_before_is_newest_first(self, log, oldest_first):
+        index = PrefixIndex(log)
+        frame = index.frame_before(oldest_first["Game_ID"][10])
+        assert frame["Game_ID"].tolist() == oldest_first["Game_ID"].iloc[:10][::-1].tolist()
+
+    def test_row_order_does_not_matter(self, log):
+        shuffled = log.sample(frac=1, random_state=0)
+        a, b = PrefixIndex(log), PrefixIndex(shuffled)
+        game_id = a.game_ids[15]
+        assert a.means_before(game_id, ("PTS", "REB")) == b.means_before(game_id, ("PTS", "REB"))
+
+
+class TestMemo:
+    """The memo follows the log's version, not the frame object."""
+
+    def test_same_games_reuse_the_index(self, log):
+        key = ("player", 1, "2025-26", "Regular Season")
+        first = asof_stats._memoized(key, log)
+        assert asof_stats._memoized(key, log.copy()) is first
+
+    def test_new_game_rebuilds_the_index(self, log):
+        key = ("player", 2, "2025-26", "Regular Season")
+        first = asof_stats._memoized(key, log.iloc[1:])
+        second = asof_stats._memoized(key, log)
+        assert second is not first
+        assert len(second) == len(first) + 1
@@ -0,0 +1,105 @@
+"""
+Tests for fanout.py -- dependency order, overlap of independent tasks, the
+per-host concurrency caps and error handling, with sleeps standing in for
+upstream calls.
+Run freely: python -m pytest backEnd/tests/test_fanout.py -v
+"""
+import contextvars
+import threading
+import time
+
+import pytest
+
+import fanout
+from fanout import Plan, LOCAL
+
+
+class TestDependencies:
+    """A task gets its dependencies' results, in order, once they are done."""
+
+    def test_results_flow_along_the_graph(self):
+        plan = Plan()
+        plan.add("a", lambda: 2, host=LOCAL)
+        plan.add("b", lambda: 3, host=LOCAL)
+        plan.add("product", lambda a, b: a * b, deps=("a", "b"), host=LOCAL)
+        plan.add("minus", lambda b, product: product - b, deps=("b", "product"), host=LOCAL)
+        assert plan.run() == {"a": 2, "b": 3, "product": 6, "minus": 3}
+
+    def test_dependent_starts_after_its_dependency(self):
+        order = []
+        def step(name, delay=0.0):
+            def run(*_):
+                time.sleep(delay)
+                order.append(name)
+            return run
+        plan = Plan()
+        plan.add("slow", step("slow", 0.05), host=LOCAL)
+        plan.add("after", step("after"), deps=("slow",), host=LOCAL)
+        plan.run()
+        assert order == ["slow", "after"]
+
+    def test_unknown_dependency(self):
+        with pytest.raises(ValueError):
+            Plan().add("b", lambda a: a, deps=("a",))
+
+    def test_context_is_copied_into_tasks(self):
+        var = contextvars.ContextVar("request_id")
+        var.set("r-1")
+        assert Plan().add("read", var.get, host=LOCAL).run() == {"read": "r-1"}
+
+
+class TestConcurrency:
+    """Independent tasks overlap, but never more than a host's cap at once."""
+
+    def test_independent_tasks_overlap(self):
+        both = threading.Barrier(2, timeout=5)      # broken if the tasks ran one after the other
+        plan = Plan()
+        plan.add("a", both.wait, host=LOCAL)
+        plan.add("b", both.wait, host=LOCAL)
+        plan.run()
+
+    def test_host_cap(self, monkeypatch):
+        monkeypatch.setitem(fanout._host_slots, "example.com", threading.BoundedSemaphore(2))
+        lock = threading.Lock()
+        active, peak = [0], [0]
+        def call():
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.05)
+            with lock:
+                active[0] -= 1
+        plan = Plan()
+        for i in range(6):
+            plan.add(f"call{i}", call, host="example.com")
+        plan.run()
+        assert peak[0] == 2
+
+
+class TestErrors:
+    """The first error is re-raised and nothing new starts after it."""
+
+    def test_error_is_raised_and_dependents_skipped(self):
+        started = []
+        def fail():
+            raise RuntimeError("upstream down")
+        plan = Plan()
+        plan.add("fail", fail, host=LOCAL)
+        plan.add("after", lambda _: started.append("after"), deps=("fail",), host=LOCAL)
+        with pytest.raises(RuntimeError, match="upstream down"):
+            plan.run()
+        assert started == []
+
+    def test_in_flight_tasks_are_joined(self):
+        finished = threading.Event()
+        def slow():
+            time.sleep(0.05)
+            finished.set()
+        def fail():
+            raise RuntimeError("boom")
+        plan = Plan()
+        plan.add("slow", slow, host=LOCAL)
+        plan.add("fail", fail, host=LOCAL)
+        with pytest.raises(RuntimeError):
+            plan.run()
+        assert finished.is_set()
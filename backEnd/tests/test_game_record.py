@@ -0,0 +1,82 @@
+"""
+Tests for game_record.py -- GameRecord reads, compares and serializes like
+the dict it replaced, and survives pickling (the on-disk cache).
+Run freely: python -m pytest backEnd/tests/test_game_record.py -v
+"""
+import json
+import pickle
+import sys
+
+import pytest
+
+import game_record
+from game_record import GameRecord
+
+
+def regular(**overrides):
+    fields = dict(game_id="0022500001", date="OCT 22, 2025", points=31, opponent="BOS",
+                  location="Home", minutes=35, game_type="Regular Season")
+    fields.update(overrides)
+    return GameRecord(**fields)
+
+
+def playoff():
+    return GameRecord("0042400101", "APR 19, 2025", 28, "MIL", "Away", 38, "Playoffs",
+                      game_number=1, round="First Round", series_score="1-0", result="W")
+
+
+class TestMapping:
+    """Records have the old dict's keys, in order, and nothing more."""
+
+    def test_regular_season_shape(self):
+        record = regular()
+        assert list(record) == ["gameId", "date", "points", "opponent", "opponentFullName",
+                                "opponentLogo", "location", "minutes", "gameType"]
+        assert record["opponentFullName"] == "Boston Celtics"
+        assert record.get("round") is None
+        with pytest.raises(KeyError):
+            record["round"]
+
+    def test_playoff_fields(self):
+        record = playoff()
+        assert (record["round"], record["series_score"], record["result"]) == ("First Round", "1-0", "W")
+        assert record["gameType"] == "Playoffs"
+
+    def test_without_game_id(self):
+        assert "gameId" not in regular(game_id=None)
+
+
+class TestEquality:
+    """A record equals its dict and any record with the same fields."""
+
+    def test_equals_its_dict(self):
+        record = playoff()
+        assert record == record.to_dict()
+        assert record.to_dict() == record
+
+    def test_equals_an_identical_record(self):
+        assert regular() == regular()
+        assert regular() != regular(points=30)
+        assert regular() != regular(location="Away")
+
+
+class TestSerialization:
+    """Pickles (the disk cache) and JSON (responses, Firestore) round-trip."""
+
+    @pytest.mark.parametrize("protocol", [0, pickle.DEFAULT_PROTOCOL, pickle.HIGHEST_PROTOCOL])
+    @pytest.mark.parametrize("make", [regular, playoff])
+    def test_pickle_round_trip(self, make, protocol):
+        record = make()
+        restored = pickle.loads(pickle.dumps(record, protocol=protocol))
+        assert type(restored) is GameRecord
+        assert restored == record
+
+    def test_unpickled_strings_are_interned(self):
+        restored = pickle.loads(pickle.dumps([regular()], protocol=pickle.HIGHEST_PROTOCOL))[0]
+        assert restored.opponent is sys.intern("BOS")
+        assert restored.date is regular().date
+
+    def test_json(self):
+        history = {"last5RegularGames": [regular()], "playoff_games": [playoff()]}
+        assert json.loads(json.dumps(history, default=game_record.json_default)) == game_record.to_jsonable(history)
+        assert game_record.to_jsonable(history)["playoff_games"][0] == playoff().to_dict()
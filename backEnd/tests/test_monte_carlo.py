@@ -0,0 +1,146 @@
+"""
+Tests for monte_carlo.py's probability engine -- pure math, no API calls.
+Closed forms are checked against the moments they are meant to match and
+against large seeded simulations.
+Run freely: python -m pytest backEnd/tests/test_monte_carlo.py -v
+"""
+import numpy as np
+import pytest
+from scipy import stats
+
+import monte_carlo
+from monte_carlo import probability, probabilities
+
+
+MU, SIGMA = 22.0, 7.0
+
+
+class TestParameterizations:
+    """The NB and skew-normal parameters reproduce the requested moments."""
+
+    @pytest.mark.parametrize("mu, sigma", [(22.0, 7.0), (8.0, 4.0), (30.0, 12.0)])
+    def test_negative_binomial_moments(self, mu, sigma):
+        n, p = monte_carlo._negative_binomial_params(mu, sigma)
+        mean, var = stats.nbinom.stats(n, p, moments="mv")
+        assert abs(mean - mu) < 1e-9
+        assert abs(var - sigma * sigma) < 1e-9
+
+    def test_negative_binomial_falls_back_to_poisson(self):
+        """Variance at or below the mean has no NB fit."""
+        assert monte_carlo._negative_binomial_params(20.0, 4.0) is None
+        result = probability(20.0, 4.0, 19.5, model="negative_binomial")
+        assert result["model"] == "poisson"
+
+    @pytest.mark.parametrize("skew", [-0.8, -0.3, 0.0, 0.4, 0.9])
+    def test_skew_normal_moments(self, skew):
+        shape, loc, scale = monte_carlo._skew_normal_params(MU, SIGMA, skew)
+        mean, var, sk = stats.skewnorm.stats(shape, loc=loc, scale=scale, moments="mvs")
+        assert abs(mean - MU) < 1e-9
+        assert abs(var - SIGMA * SIGMA) < 1e-9
+        assert abs(sk - skew) < 1e-6
+
+
+class TestAnalyticVsSimulation:
+    """Closed forms agree with 200k seeded draws to within 0.01."""
+
+    @pytest.mark.parametrize("model, skew", [
+        ("normal", 0.0),
+        ("poisson", 0.0),
+        ("negative_binomial", 0.0),
+        ("skew_normal", 0.6),
+        ("skew_normal", -0.6),
+    ])
+    @pytest.mark.parametrize("threshold", [15.5, 22.5, 29.5])
+    def test_agreement(self, model, skew, threshold):
+        exact = probability(MU, SIGMA, threshold, model=model, skew=skew)
+        simulated = probability(MU, SIGMA, threshold, model=model, skew=skew, method="simulation",
+                                num_simulations=200_000, rng=np.random.default_rng(7))
+        assert exact["method"] == "analytic"
+        assert simulated["method"] == "simulation"
+        assert abs(exact["probability"] - simulated["probability"]) < 0.01, (
+            f"{model} P(X > {threshold}): analytic {exact['probability']:.4f}, "
+            f"simulated {simulated['probability']:.4f}"
+        )
+
+    def test_auto_uses_the_closed_form(self):
+        result = probability(MU, SIGMA, 22.5)
+        assert result["method"] == "analytic"
+        assert abs(result["probability"] - stats.norm.sf(22.5, MU, SIGMA)) < 1e-12
+
+    def test_empirical_is_the_share_of_samples_over(self):
+        samples = [10, 15, 20, 25, 30]
+        result = probability(MU, SIGMA, 18.5, model="empirical", samples=samples,
+                             num_simulations=200_000, rng=np.random.default_rng(7))
+        assert abs(result["probability"] - 0.6) < 0.01
+
+
+class TestBatch:
+    """probabilities() matches probability() line by line."""
+
+    def test_normal_closed_form(self):
+        mu, sigma, lines = [18.0, 22.0, 30.0], [5.0, 7.0, 9.0], [20.5, 22.5, 24.5]
+        batch = probabilities(mu, sigma, lines)
+        single = [probability(m, s, t)["probability"] for m, s, t in zip(mu, sigma, lines)]
+        assert np.allclose(batch["probability"], single)
+
+    def test_skew_is_broadcast(self):
+        skews = [-0.5, 0.0, 0.5]
+        batch = probabilities(MU, SIGMA, 24.5, model="skew_normal", skew=skews)
+        single = [probability(MU, SIGMA, 24.5, model="skew_normal", skew=k)["probability"] for k in skews]
+        assert np.allclose(batch["probability"], single)
+        assert len(set(np.round(batch["probability"], 6))) == 3
+
+    def test_simulated_batch_matches_closed_form(self):
+        lines = np.array([15.5, 22.5, 29.5])
+        batch = probabilities(MU, SIGMA, lines, method="simulation", num_simulations=200_000,
+                              rng=np.random.default_rng(7))
+        assert np.allclose(batch["probability"], stats.norm.sf(lines, MU, SIGMA), atol=0.01)
+
+
+class TestSampling:
+    """Antithetic and Sobol estimators are unbiased, and adaptive runs stop honestly."""
+
+    @pytest.mark.parametrize("sampling", ["antithetic", "sobol"])
+    @pytest.mark.parametrize("model, skew", [("normal", 0.0), ("negative_binomial", 0.0), ("skew_normal", 0.6)])
+    def test_matches_closed_form(self, sampling, model, skew):
+        exact = probability(MU, SIGMA, 24.5, model=model, skew=skew)["probability"]
+        result = probability(MU, SIGMA, 24.5, model=model, skew=skew, method="simulation",
+                             num_simulations=65_536, sampling=sampling, rng=np.random.default_rng(11))
+        assert result["sampling"] == sampling
+        assert abs(result["probability"] - exact) < 0.01
+
+    @pytest.mark.parametrize("sampling", ["antithetic", "sobol"])
+    def test_batch_matches_closed_form(self, sampling):
+        lines = np.array([15.5, 22.5, 29.5])
+        p = monte_carlo.run_monte_carlo_batch(MU, SIGMA, lines, 65_536, np.random.default_rng(11), sampling)
+        assert np.allclose(p, stats.norm.sf(lines, MU, SIGMA), atol=0.01)
+
+    def test_sobol_error_is_below_random(self):
+        kwargs = dict(method="simulation", num_simulations=65_536, rng=np.random.default_rng(11))
+        random = probability(MU, SIGMA, 24.5, sampling="random", **kwargs)
+        sobol = probability(MU, SIGMA, 24.5, sampling="sobol", **kwargs)
+        assert sobol["stdError"] < random["stdError"]
+
+    @pytest.mark.parametrize("sampling", ["random", "antithetic", "sobol"])
+    def test_tolerance_stops_early(self, sampling):
+        result = probability(MU, SIGMA, 24.5, method="simulation", num_simulations=1_000_000,
+                             sampling=sampling, tolerance=0.005, rng=np.random.default_rng(11))
+        assert result["draws"] < 1_000_000
+        assert result["stdError"] <= 0.005
+
+    def test_sobol_tolerance_needs_sobol_blocks(self, monkeypatch):
+        """The error of an adaptive Sobol run is never taken from a couple of blocks."""
+        counts = []
+        std_error = monte_carlo._std_error
+        def recording(total, squares, count):
+            counts.append(count)
+            return std_error(total, squares, count)
+        monkeypatch.setattr(monte_carlo, "_std_error", recording)
+        probability(MU, SIGMA, 24.5, method="simulation", num_simulations=1_000_000,
+                    sampling="sobol", tolerance=0.5, rng=np.random.default_rng(11))
+        assert counts and min(counts) >= monte_carlo.SOBOL_BLOCKS
+
+    def test_sobol_draws_round_up_to_whole_blocks(self):
+        result = probability(MU, SIGMA, 24.5, method="simulation", num_simulations=100_000,
+                             sampling="sobol", rng=np.random.default_rng(11))
+        assert result["draws"] == 13 * 8192
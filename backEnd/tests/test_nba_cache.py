@@ -0,0 +1,256 @@
+"""
+Tests for nba_cache.py -- the bounded TTL/LRU store and the cached endpoints,
+with nba_api endpoints replaced by fakes (no API calls).
+Run freely: python -m pytest backEnd/tests/test_nba_cache.py -v
+"""
+import pickle
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import nba_cache
+from nba_cache import _TTLCache, PLAYER_GAMELOG
+from test_asof_stats import make_log
+
+
+def fake_endpoint(frame_for, calls):
+    """An nba_api endpoint class that records its kwargs and returns frame_for(**kwargs)."""
+    class Endpoint:
+        def __init__(self, **kwargs):
+            calls.append(kwargs)
+            self._frame = frame_for(**kwargs)
+
+        def get_data_frames(self):
+            return [self._frame]
+    return Endpoint
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    nba_cache.clear_cache()
+    yield
+    nba_cache.clear_cache()
+
+
+def block(n=1000):
+    return np.zeros(n)
+
+
+class TestTTLCache:
+    """Entries expire by TTL and the least recently used go first when over budget."""
+
+    def test_hit_and_miss(self):
+        cache = _TTLCache(10 * nba_cache._sizeof(block()))
+        assert cache.get(PLAYER_GAMELOG, 1) is None
+        cache.set(PLAYER_GAMELOG, 1, block(), ttl=60)
+        assert cache.get(PLAYER_GAMELOG, 1) is not None
+        stats = cache.stats()
+        assert (stats["hits"], stats["misses"]) == (1, 1)
+
+    def test_expired_entry_is_a_miss_but_kept(self):
+        cache = _TTLCache(10 * nba_cache._sizeof(block()))
+        cache.set(PLAYER_GAMELOG, 1, block(), ttl=-1)
+        assert cache.get(PLAYER_GAMELOG, 1) is None
+        assert cache.live(PLAYER_GAMELOG, 1) is None
+        assert cache.peek(PLAYER_GAMELOG, 1) is not None
+        assert cache.stats()["expirations"] == 1
+
+    def test_least_recently_used_is_evicted(self):
+        cache = _TTLCache(3 * nba_cache._sizeof(block()))
+        for key in (1, 2, 3):
+            cache.set(PLAYER_GAMELOG, key, block(), ttl=60)
+        cache.get(PLAYER_GAMELOG, 1)                 # 2 is now the oldest
+        cache.set(PLAYER_GAMELOG, 4, block(), ttl=60)
+        assert cache.peek(PLAYER_GAMELOG, 2) is None
+        assert all(cache.peek(PLAYER_GAMELOG, key) is not None for key in (1, 3, 4))
+        assert cache.stats()["evictions"] == 1
+        assert cache.stats()["bytes"] <= cache.max_bytes
+
+    def test_replacing_an_entry_frees_its_bytes(self):
+        cache = _TTLCache(10 * nba_cache._sizeof(block()))
+        cache.set(PLAYER_GAMELOG, 1, block(), ttl=60)
+        cache.set(PLAYER_GAMELOG, 1, block(), ttl=60)
+        assert cache.stats()["bytes"] == nba_cache._sizeof(block())
+
+    def test_value_over_budget_is_not_cached(self):
+        cache = _TTLCache(nba_cache._sizeof(block(10)))
+        cache.set(PLAYER_GAMELOG, 1, block(), ttl=60)
+        assert cache.peek(PLAYER_GAMELOG, 1) is None
+
+    def test_nested_values_count_against_the_budget(self):
+        assert nba_cache._sizeof({"a": [block(), block()]}) > 2 * block().nbytes
+
+
+class TestCachedEndpoints:
+    """Only the first lookup of a key reaches the endpoint."""
+
+    def test_second_lookup_is_served_from_memory(self, monkeypatch):
+        calls = []
+        monkeypatch.setattr(nba_cache, "PlayerGameLog", fake_endpoint(lambda **kw: make_log(), calls))
+        first = nba_cache.get_player_gamelog(1, "2024-25")
+        second = nba_cache.get_player_gamelog(1, "2024-25")
+        assert second is first
+        assert len(calls) == 1
+        assert nba_cache.get_cache_stats()["player_gamelog_count"] == 1
+
+    def test_keys_are_separate(self, monkeypatch):
+        calls = []
+        monkeypatch.setattr(nba_cache, "PlayerGameLog", fake_endpoint(lambda **kw: make_log(), calls))
+        nba_cache.get_player_gamelog(1, "2024-25")
+        nba_cache.get_player_gamelog(1, "2023-24")
+        nba_cache.get_player_gamelog(2, "2024-25")
+        assert len(calls) == 3
+
+    def test_finished_seasons_live_longer(self):
+        assert nba_cache.ttl_for_season(nba_cache.current_season()) == nba_cache.CURRENT_TTL
+        assert nba_cache.ttl_for_season("2019-20") == nba_cache.PAST_TTL
+
+
+@pytest.fixture
+def disk(tmp_path, monkeypatch):
+    store = nba_cache._DiskStore(str(tmp_path / "nba_cache.db"))
+    monkeypatch.setattr(nba_cache, "_disk", store)
+    return store
+
+
+def unreachable(**kwargs):
+    raise AssertionError(f"upstream called: {kwargs}")
+
+
+class TestDiskStore:
+    """Entries survive a cleared memory store (a cold start) through SQLite."""
+
+    def test_round_trip(self, disk):
+        log = make_log()
+        disk.set(PLAYER_GAMELOG, (1, "2024-25", "Regular Season"), log, expires_at=None)
+        value, expires_at = disk.get(PLAYER_GAMELOG, (1, "2024-25", "Regular Season"))
+        assert value.equals(log)
+        assert expires_at is None
+
+    def test_expired_entry_only_as_a_refresh_base(self, disk):
+        disk.set(PLAYER_GAMELOG, 1, make_log(), expires_at=1.0)
+        assert disk.get(PLAYER_GAMELOG, 1) is None
+        assert disk.get(PLAYER_GAMELOG, 1, include_expired=True) is not None
+
+    def test_cold_start_is_served_from_disk(self, disk, monkeypatch):
+        calls = []
+        monkeypatch.setattr(nba_cache, "PlayerGameLog", fake_endpoint(lambda **kw: make_log(), calls))
+        first = nba_cache.get_player_gamelog(1, "2024-25")
+        nba_cache.clear_cache()
+        monkeypatch.setattr(nba_cache, "PlayerGameLog", fake_endpoint(unreachable, calls))
+        assert nba_cache.get_player_gamelog(1, "2024-25").equals(first)
+        assert len(calls) == 1
+        assert disk.hits == 1
+
+    def test_load_persistent_cache(self, disk):
+        nba_cache.set_derived("index", ("a", 1), {"games": 3}, permanent=True)
+        nba_cache.clear_cache()
+        assert nba_cache.load_persistent_cache() == 1
+        assert nba_cache._cache.peek(nba_cache.DERIVED, ("index", ("a", 1))) == {"games": 3}
+
+    def test_prune(self, disk):
+        disk.set(PLAYER_GAMELOG, "long expired", make_log(), expires_at=1.0)
+        for key in ("oldest", "newer", "newest"):
+            disk.set(PLAYER_GAMELOG, key, make_log(), expires_at=None)
+            time.sleep(0.01)                         # distinct stored_at
+        one = len(pickle.dumps(make_log(), protocol=pickle.HIGHEST_PROTOCOL))
+        assert disk.prune(max_bytes=2 * one, max_age=60) == 2
+        assert disk.get(PLAYER_GAMELOG, "oldest") is None
+        assert disk.get(PLAYER_GAMELOG, "newest") is not None
+
+
+class TestIncrementalRefresh:
+    """An expired current-season log only asks for games since its newest date."""
+
+    KEY = (1, nba_cache.current_season(), "Regular Season")
+
+    @pytest.fixture
+    def season(self):
+        """(full log, expired base held in memory): the base lacks the two newest games."""
+        full = make_log(games=22)
+        base = full.iloc[2:].reset_index(drop=True)
+        nba_cache._cache.set(PLAYER_GAMELOG, self.KEY, base, ttl=-1)
+        return full, base
+
+    def test_new_games_are_merged_once(self, season, monkeypatch):
+        full, base = season
+        calls = []
+        # the boundary day is requested again, so the newest held game comes back too
+        since = lambda date_from_nullable, **kw: full.iloc[:3] if date_from_nullable else full
+        monkeypatch.setattr(nba_cache, "PlayerGameLog", fake_endpoint(since, calls))
+        merged = nba_cache.get_player_gamelog(*self.KEY)
+        newest_held = nba_cache._newest_game_date(base)
+        assert [c["date_from_nullable"] for c in calls] == [newest_held.strftime("%m/%d/%Y")]
+        assert merged["Game_ID"].tolist() == full["Game_ID"].tolist()
+        assert merged["Game_ID"].is_unique
+
+    def test_nothing_new_keeps_the_base(self, season, monkeypatch):
+        _, base = season
+        monkeypatch.setattr(nba_cache, "PlayerGameLog", fake_endpoint(lambda **kw: base.iloc[:1], []))
+        assert nba_cache.get_player_gamelog(*self.KEY) is base
+
+    def test_disabled_refetches_the_season(self, season, monkeypatch):
+        full, _ = season
+        calls = []
+        monkeypatch.setattr(nba_cache, "INCREMENTAL", False)
+        monkeypatch.setattr(nba_cache, "PlayerGameLog", fake_endpoint(lambda **kw: full, calls))
+        assert nba_cache.get_player_gamelog(*self.KEY) is full
+        assert [c["date_from_nullable"] for c in calls] == [""]
+
+
+def league_frames():
+    """LeagueGameLog "P" and "T" frames: teams 10 and 20 meet three times, two players each."""
+    games = [("0022500001", "2025-10-22", 10, "W"), ("0022500002", "2025-10-24", 20, "W"),
+             ("0022500003", "2025-10-26", 10, "W")]
+    players, teams = [], []
+    for game_id, date, winner, _ in games:
+        for team, other in ((10, 20), (20, 10)):
+            wl = "W" if team == winner else "L"
+            matchup = f"T{team} vs. T{other}" if team == 10 else f"T{team} @ T{other}"
+            teams.append({"TEAM_ID": team, "GAME_ID": game_id, "GAME_DATE": date,
+                          "MATCHUP": matchup, "WL": wl, "MIN": 240, "PTS": 100 + team})
+            for player in (team + 1, team + 2):
+                players.append({"PLAYER_ID": player, "TEAM_ID": team, "GAME_ID": game_id,
+                                "GAME_DATE": date, "MATCHUP": matchup, "WL": wl, "MIN": 30,
+                                "PTS": player})
+    return {"P": pd.DataFrame(players), "T": pd.DataFrame(teams)}
+
+
+class TestLeagueIngest:
+    """Two LeagueGameLog calls fill every per-player / per-team log key."""
+
+    @pytest.fixture
+    def ingested(self, monkeypatch):
+        calls = []
+        frames = league_frames()
+        monkeypatch.setattr(nba_cache, "LeagueGameLog", fake_endpoint(
+            lambda player_or_team_abbreviation, **kw: frames[player_or_team_abbreviation], calls))
+        monkeypatch.setattr(nba_cache, "PlayerGameLog", fake_endpoint(unreachable, calls))
+        monkeypatch.setattr(nba_cache, "TeamGameLog", fake_endpoint(unreachable, calls))
+        counts = nba_cache.ingest_league_gamelogs("2025-26")
+        return counts, calls
+
+    def test_counts_and_calls(self, ingested):
+        counts, calls = ingested
+        assert counts == {"players": 4, "teams": 2}
+        assert [c["player_or_team_abbreviation"] for c in calls] == ["P", "T"]
+
+    def test_player_log_is_shaped_like_player_game_log(self, ingested):
+        log = nba_cache.get_player_gamelog(11, "2025-26")
+        assert log["Game_ID"].tolist() == ["0022500003", "0022500002", "0022500001"]
+        assert log["GAME_DATE"].tolist() == ["OCT 26, 2025", "OCT 24, 2025", "OCT 22, 2025"]
+        assert (log["Player_ID"] == 11).all()
+        assert "PLAYER_ID" not in log and "TEAM_ID" not in log
+
+    def test_team_log_rebuilds_the_running_record(self, ingested):
+        log = nba_cache.get_team_gamelog(20, "2025-26")
+        assert log["WL"].tolist() == ["L", "W", "L"]
+        assert log["W"].tolist() == [1, 1, 0]
+        assert log["L"].tolist() == [2, 1, 1]
+        assert log["W_PCT"].iloc[0] == pytest.approx(0.333)
+
+    def test_split_logs_feed_the_incremental_refresh(self, ingested):
+        log = nba_cache.get_player_gamelog(21, "2025-26")
+        assert nba_cache._newest_game_date(log) == pd.Timestamp("2025-10-26")
@@ -0,0 +1,113 @@
+"""
+Tests for player_aggregates.py -- running season aggregates folded from game
+logs and live box-score rows, kept in nba_cache's memory store.
+Run freely: python -m pytest backEnd/tests/test_player_aggregates.py -v
+"""
+import pandas as pd
+import pytest
+
+import nba_cache
+import player_aggregates
+from test_asof_stats import make_log
+
+SEASON = "2025-26"
+
+
+def with_stats(log):
+    """make_log() plus the shooting / turnover columns the aggregates sum."""
+    n = len(log)
+    return log.assign(FGM=[4 + i % 5 for i in range(n)], FG3M=1, FG3A=3, FTM=2, FTA=3,
+                      TOV=[1 + i % 4 for i in range(n)])
+
+
+def box_score_row(player_id, log_row):
+    """The same game as a BoxScoreTraditionalV2 PlayerStats row (TO, not TOV; MIN as 'mm.000000:ss')."""
+    minutes, seconds = str(log_row["MIN"]).split(":")
+    return pd.Series({
+        "GAME_ID": log_row["Game_ID"], "PLAYER_ID": player_id, "COMMENT": "",
+        "MIN": f"{minutes}.000000:{seconds}", "FGM": log_row["FGM"], "FGA": log_row["FGA"],
+        "FG3M": log_row["FG3M"], "FG3A": log_row["FG3A"], "FTM": log_row["FTM"], "FTA": log_row["FTA"],
+        "TO": log_row["TOV"], "PTS": log_row["PTS"],
+    })
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    nba_cache.clear_cache()
+    yield
+    nba_cache.clear_cache()
+
+
+@pytest.fixture
+def log():
+    return with_stats(make_log(games=20))
+
+
+class TestSync:
+    """sync() folds each game once, however often the log is seen."""
+
+    def test_matches_a_full_build(self, log):
+        agg = player_aggregates.sync(1, SEASON, "Regular Season", log)
+        assert player_aggregates.games(agg) == 20
+        assert player_aggregates.total(agg, "PTS") == log["PTS"].sum()
+        assert player_aggregates.mean(agg, "TOV") == pytest.approx(log["TOV"].mean())
+        assert player_aggregates.variance(agg, "PTS") == pytest.approx(log["PTS"].var(ddof=1))
+        home = log[log["MATCHUP"].str.contains(" vs. ", regex=False)]
+        assert player_aggregates.games(agg, "Home") == len(home)
+
+    def test_new_games_only(self, log):
+        player_aggregates.sync(1, SEASON, "Regular Season", log.iloc[5:])
+        agg = player_aggregates.sync(1, SEASON, "Regular Season", log)
+        again = player_aggregates.sync(1, SEASON, "Regular Season", log)
+        assert player_aggregates.games(agg) == 20
+        assert again is agg
+
+    def test_stored_aggregate_is_never_mutated(self, log):
+        first = player_aggregates.sync(1, SEASON, "Regular Season", log.iloc[5:])
+        player_aggregates.sync(1, SEASON, "Regular Season", log)
+        assert player_aggregates.games(first) == 15
+
+
+class TestObserveGame:
+    """A live box-score row counts exactly like the log row of the same game."""
+
+    def test_box_score_row_matches_log_row(self, log):
+        newest = log.iloc[0]
+        player_aggregates.sync(1, SEASON, "Regular Season", log.iloc[1:])
+        location = "Home" if " vs. " in newest["MATCHUP"] else "Away"
+        assert player_aggregates.observe_game(1, newest["Game_ID"], location, box_score_row(1, newest))
+
+        observed = nba_cache.get_derived(player_aggregates._INDEX_NAME, (1, SEASON, "Regular Season"))
+        built = player_aggregates.build(log)
+        for stat in player_aggregates.STATS:
+            assert player_aggregates.total(observed, stat) == pytest.approx(player_aggregates.total(built, stat)), stat
+        assert player_aggregates.total(observed, "TOV") > 0
+
+    def test_counted_once(self, log):
+        newest = log.iloc[0]
+        player_aggregates.sync(1, SEASON, "Regular Season", log.iloc[1:])
+        assert player_aggregates.observe_game(1, newest["Game_ID"], "Home", box_score_row(1, newest))
+        assert not player_aggregates.observe_game(1, newest["Game_ID"], "Home", box_score_row(1, newest))
+        agg = player_aggregates.sync(1, SEASON, "Regular Season", log)
+        assert player_aggregates.games(agg) == 20
+
+    def test_unknown_player_is_left_to_its_log(self, log):
+        newest = log.iloc[0]
+        assert not player_aggregates.observe_game(2, newest["Game_ID"], "Home", box_score_row(2, newest))
+
+
+class TestVerify:
+    """verify() agrees with an honest aggregate and repairs a drifted one."""
+
+    def test_agrees(self, log):
+        player_aggregates.sync(1, SEASON, "Regular Season", log)
+        assert player_aggregates.verify(1, SEASON, "Regular Season", log)
+
+    def test_repairs_drift(self, log):
+        agg = player_aggregates.sync(1, SEASON, "Regular Season", log)
+        drifted = player_aggregates._copy(agg)
+        drifted["splits"]["all"]["sums"]["PTS"] += 7
+        nba_cache.set_derived(player_aggregates._INDEX_NAME, (1, SEASON, "Regular Season"), drifted, permanent=True)
+        assert not player_aggregates.verify(1, SEASON, "Regular Season", log)
+        repaired = nba_cache.get_derived(player_aggregates._INDEX_NAME, (1, SEASON, "Regular Season"))
+        assert player_aggregates.total(repaired, "PTS") == log["PTS"].sum()
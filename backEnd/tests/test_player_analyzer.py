@@ -0,0 +1,223 @@
+"""
+Tests for player_analyzer.py -- the vectorized game-log transforms against
+the row-by-row loops they replaced (logs served by a faked PlayerGameLog
+endpoint), and the batch API's sharing of work between picks. No API calls.
+Run freely: python -m pytest backEnd/tests/test_player_analyzer.py -v
+"""
+import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import nba_cache
+import player_analyzer
+import static_index
+from test_nba_cache import fake_endpoint
+
+OPPONENTS = ("BOS", "NYK", "MIA", "LAL", "OKC")
+
+
+def regular_log(games=40, seed=9):
+    """Newest-first PlayerGameLog frame with varied opponents, a blank MIN and an unparseable MATCHUP."""
+    rng = np.random.default_rng(seed)
+    start = datetime.date(2025, 10, 22)
+    rows = []
+    for i in range(games):
+        opponent = OPPONENTS[int(rng.integers(len(OPPONENTS)))]
+        home = bool(rng.random() < 0.5)
+        rows.append({
+            "Game_ID": f"00225{i:05d}",
+            "GAME_DATE": (start + datetime.timedelta(days=2 * i)).strftime("%b %d, %Y").upper(),
+            "MATCHUP": f"IND vs. {opponent}" if home else f"IND @ {opponent}",
+            "WL": "W" if rng.random() < 0.5 else "L",
+            "MIN": f"{int(rng.integers(10, 40))}:{int(rng.integers(0, 60)):02d}",
+            "PTS": int(rng.integers(2, 40)),
+        })
+    rows[3]["MIN"] = ""
+    rows[7]["MATCHUP"] = "IND"
+    return pd.DataFrame(rows[::-1])
+
+
+def playoff_log():
+    """Newest-first playoff log: a 5-game series, a 7-game one, then 4 games vs the same team as before."""
+    opponents = ["MIL"] * 5 + ["CLE"] * 7 + ["CLE"] * 4
+    results = list("WWLWW") + list("LWLWLWW") + list("WLWW")
+    rows = [{
+        "Game_ID": f"00424{i:05d}",
+        "GAME_DATE": (datetime.date(2025, 4, 19) + datetime.timedelta(days=2 * i)).strftime("%b %d, %Y").upper(),
+        "MATCHUP": f"IND {'vs.' if i % 2 == 0 else '@'} {opp}",
+        "WL": wl, "MIN": f"{30 + i % 8}:15", "PTS": 10 + 2 * i,
+    } for i, (opp, wl) in enumerate(zip(opponents, results))]
+    return pd.DataFrame(rows[::-1])
+
+
+# ── the loops the vectorized code replaced ──────────────────────────────────
+
+def old_game(row, game_type, include_game_id=True):
+    matchup = row['MATCHUP']
+    if ' vs. ' in matchup:
+        location, opp = 'Home', matchup.split(' vs. ')[1]
+    elif ' @ ' in matchup:
+        location, opp = 'Away', matchup.split(' @ ')[1]
+    else:
+        location, opp = 'Unknown', None
+    raw_min = row.get('MIN', '')
+    if isinstance(raw_min, str) and ':' in raw_min:
+        minutes = int(raw_min.split(':')[0])
+    else:
+        minutes = int(raw_min) if raw_min else 0
+    opp_id = static_index.team_id_from_abbr(opp) if opp else None
+    game = {
+        "gameId": row['Game_ID'],
+        "date": row['GAME_DATE'],
+        "points": int(row['PTS']),
+        "opponent": opp,
+        "opponentFullName": static_index.team_full_name_from_abbr(opp) if opp else None,
+        "opponentLogo": static_index.team_logo_url(opp_id) if opp_id else None,
+        "location": location,
+        "minutes": minutes,
+        "gameType": game_type,
+    }
+    if not include_game_id:
+        del game["gameId"]
+    return game
+
+
+def old_home_away(df):
+    totals = {"Home": [0, 0, 0], "Away": [0, 0, 0]}
+    for i in range(len(df)):
+        game = old_game(df.iloc[i], "Regular Season")
+        if game["location"] in totals:
+            side = totals[game["location"]]
+            side[0] += game["points"]
+            side[1] += game["minutes"]
+            side[2] += 1
+    return {loc: tuple(v) for loc, v in totals.items()}
+
+
+def old_playoff_games(games_df):
+    rounds = ['Conference First Round', 'Conference Semifinals', 'Conference Finals', 'NBA Finals']
+    playoff_games, game, round_index, series_score = [], 1, 0, "0-0"
+    for i in range(len(games_df)):
+        curr = games_df.iloc[len(games_df) - 1 - i]
+        base = old_game(curr, "Playoffs")
+        if game > 7 or (playoff_games and base["opponent"] != playoff_games[-1]['opponent']):
+            game, round_index, series_score = 1, round_index + 1, "0-0"
+        won, lost = (int(n) for n in series_score.split('-'))
+        series_score = f"{won + 1}-{lost}" if curr['WL'] == 'W' else f"{won}-{lost + 1}"
+        playoff_games.append(dict(base, game_number=game, round=rounds[round_index],
+                                  series_score=series_score, result=curr['WL']))
+        game += 1
+    return playoff_games
+
+
+# ── old vs new ──────────────────────────────────────────────────────────────
+
+@pytest.fixture
+def served(monkeypatch):
+    """Serve regular_log() / playoff_log() through nba_cache from a faked PlayerGameLog."""
+    logs = {"Regular Season": regular_log(), "Playoffs": playoff_log()}
+    nba_cache.clear_cache()
+    monkeypatch.setattr(nba_cache, "PlayerGameLog", fake_endpoint(
+        lambda season_type_all_star, **kw: logs[season_type_all_star], []))
+    yield logs
+    nba_cache.clear_cache()
+
+
+class TestAgainstTheLoops:
+    """Every vectorized transform returns exactly what the row loops returned."""
+
+    def test_fetch_all_opponent_games(self, served):
+        log = served["Regular Season"]
+        for opponent in OPPONENTS:
+            expected = [old_game(row, "Regular Season") for _, row in log.iterrows() if opponent in row['MATCHUP']]
+            assert player_analyzer.fetch_all_opponent_games(1, opponent) == expected
+
+    def test_fetch_more_games(self, served):
+        log = served["Regular Season"]
+        expected = [old_game(log.iloc[i], "Regular Season", include_game_id=False) for i in range(5, len(log))]
+        assert player_analyzer.fetch_more_games(1, "Scheduled", None, None, "Regular Season") == expected
+
+    def test_last_five(self, served):
+        log = served["Regular Season"]
+        records = player_analyzer._game_records(log.iloc[:5], "Regular Season")
+        assert [r.to_dict() for r in records] == [old_game(log.iloc[i], "Regular Season") for i in range(5)]
+
+    def test_home_away_totals(self, served):
+        log = served["Regular Season"]
+        assert player_analyzer._home_away_totals(player_analyzer._game_columns(log)) == old_home_away(log)
+
+    def test_playoff_series(self, served):
+        games_df = served["Playoffs"]
+        chrono_df = games_df.iloc[::-1]
+        rounds = ['Conference First Round', 'Conference Semifinals', 'Conference Finals', 'NBA Finals']
+        game_numbers, series, scores = player_analyzer._playoff_series(
+            player_analyzer._game_columns(chrono_df), chrono_df['WL'])
+        records = player_analyzer._game_records(chrono_df, "Playoffs", extra={
+            "game_number": game_numbers.tolist(),
+            "round": [rounds[s] for s in series],
+            "series_score": scores,
+            "result": chrono_df['WL'].tolist(),
+        })
+        expected = old_playoff_games(games_df)
+        assert [r.to_dict() for r in records] == expected
+        assert [g["series_score"] for g in expected][-4:] == ["1-0", "1-1", "2-1", "3-1"]
+
+
+# ── batch analysis ──────────────────────────────────────────────────────────
+
+@pytest.fixture
+def batch(monkeypatch):
+    """Fake identity, warm-up and base analysis; returns the recorded calls."""
+    calls = {"resolve": [], "warm_up": [], "base": []}
+    identities = {"tyrese haliburton": {"playerId": 1630169, "teamId": 1610612754},
+                  "pascal siakam": {"playerId": 1627783, "teamId": 1610612754},
+                  "retired player": {"playerId": 893, "teamId": None}}
+
+    def resolve(first_name, last_name):
+        calls["resolve"].append(f"{first_name} {last_name}")
+        return identities.get(f"{first_name} {last_name}".lower())
+
+    def base(first_name, last_name):
+        calls["base"].append(f"{first_name} {last_name}")
+        if last_name.lower() == "player":
+            raise LookupError("no game log")
+        return {"name": f"{first_name} {last_name}", "threshold": None, "underCount": None,
+                "playoff_underCount": None,
+                player_analyzer.SCORING_KEY: {"season": [8, 12, 20, 25, 31], "playoffs": None}}
+
+    monkeypatch.setattr(player_analyzer.player_identity, "resolve", resolve)
+    monkeypatch.setattr(player_analyzer, "_warm_up", calls["warm_up"].append)
+    monkeypatch.setattr(player_analyzer, "analyze_player_base", base)
+    return calls
+
+
+class TestBatch:
+    """One identity and one base per unique player; each line derived from it, in input order."""
+
+    PICKS = [("Tyrese", "Haliburton", 19.5), ("Pascal", "Siakam", 24.5),
+             ("tyrese", "haliburton", 25.5), ("Retired", "Player", 10.5), ("Tyrese", "Haliburton", None)]
+
+    def test_shared_work_once_per_player(self, batch):
+        player_analyzer.analyze_players_batch(self.PICKS)
+        assert batch["resolve"] == ["Tyrese Haliburton", "Pascal Siakam", "Retired Player"]
+        assert batch["base"] == ["Tyrese Haliburton", "Pascal Siakam", "Retired Player"]
+        warmed = batch["warm_up"][0]
+        assert sorted(p["playerId"] for p in warmed) == [1627783, 1630169]     # only players on a team
+
+    def test_results_in_input_order(self, batch):
+        results = player_analyzer.analyze_players_batch(self.PICKS)
+        assert [r.get("threshold") for r in results] == [19.5, 24.5, 25.5, None, None]
+        assert [r.get("underCount") for r in results[:3]] == [2, 3, 4]
+        assert results[0]["name"] == results[2]["name"] == "Tyrese Haliburton"
+
+    def test_a_failing_player_does_not_fail_the_batch(self, batch):
+        results = player_analyzer.analyze_players_batch(self.PICKS)
+        assert results[3] == {"error": "no game log"}
+        assert all("error" not in r for i, r in enumerate(results) if i != 3)
+
+    def test_lines_match_analyze_player(self, batch):
+        batched = player_analyzer.analyze_players_batch([("Pascal", "Siakam", 24.5)])[0]
+        assert batched == player_analyzer.analyze_player("Pascal", "Siakam", 24.5)
+        assert player_analyzer.SCORING_KEY not in batched
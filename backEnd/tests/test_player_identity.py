@@ -0,0 +1,108 @@
+"""
+Tests for player_identity.py -- exact / normalized / fuzzy name matching
+against a faked PlayerIndex roster, and the daily snapshot's fallback.
+Run freely: python -m pytest backEnd/tests/test_player_identity.py -v
+"""
+import pandas as pd
+import pytest
+
+import nba_cache
+import player_identity
+import standings_snapshot
+
+SEASON = "2025-26"
+MIL, LAL, LAC = 1610612749, 1610612747, 1610612746
+
+
+def roster_frame():
+    rows = [
+        (203507, "Giannis", "Antetokounmpo", MIL, "F"),
+        (1629029, "Luka", "Dončić", LAL, "G"),
+        (202695, "Kawhi", "Leonard", LAC, "F"),
+        (1630000, "Free", "Agent", 0, ""),
+    ]
+    return pd.DataFrame(rows, columns=["PERSON_ID", "PLAYER_FIRST_NAME", "PLAYER_LAST_NAME",
+                                       "TEAM_ID", "POSITION"])
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    """Fake PlayerIndex and standings; returns the list of PlayerIndex calls."""
+    calls = []
+
+    class PlayerIndex:
+        def __init__(self, **kwargs):
+            calls.append(kwargs)
+
+        def get_data_frames(self):
+            return [roster_frame()]
+
+    nba_cache.clear_cache()
+    monkeypatch.setattr(player_identity, "PlayerIndex", PlayerIndex)
+    monkeypatch.setattr(standings_snapshot, "get_team",
+                        lambda team_id, season=None: {"Conference": "West" if team_id in (LAL, LAC) else "East"})
+    yield calls
+    nba_cache.clear_cache()
+
+
+class TestMatching:
+    """Each rule resolves the typed name to the right player and says which rule it was."""
+
+    def test_exact(self, calls):
+        player = player_identity.resolve("Giannis", "Antetokounmpo", SEASON)
+        assert player["playerId"] == 203507
+        assert player["match"] == "exact"
+        assert (player["teamAbbreviation"], player["position"], player["conference"]) == ("MIL", "F", "East")
+
+    def test_normalized_case_and_accents(self, calls):
+        player = player_identity.resolve("luka", "doncic", SEASON)
+        assert player["playerId"] == 1629029
+        assert player["match"] == "normalized"
+        assert player["name"] == "Luka Doncic"
+
+    def test_fuzzy_typo(self, calls):
+        player = player_identity.resolve("Giannis", "Antetokounpo", SEASON)
+        assert player["playerId"] == 203507
+        assert player["match"] == "fuzzy"
+
+    def test_team_display_name(self, calls):
+        assert player_identity.resolve("Kawhi", "Leonard", SEASON)["team"] == "LA Clippers"
+
+    def test_player_without_a_team(self, calls):
+        player = player_identity.resolve("Free", "Agent", SEASON)
+        assert player["playerId"] == 1630000
+        assert player["team"] is None and player["conference"] is None
+
+    def test_static_list_covers_players_off_the_roster(self, calls):
+        player = player_identity.resolve("Michael", "Jordan", SEASON)
+        assert player["playerId"] == 893
+        assert player["teamId"] is None
+
+    @pytest.mark.parametrize("first, last", [("Nobody", "Atall"), ("", "")])
+    def test_no_match(self, calls, first, last):
+        assert player_identity.resolve(first, last, SEASON) is None
+
+
+class TestSnapshot:
+    """The roster is fetched once and yesterday's copy covers a failed refresh."""
+
+    def test_fetched_once(self, calls):
+        player_identity.resolve("Giannis", "Antetokounmpo", SEASON)
+        player_identity.resolve("Kawhi", "Leonard", SEASON)
+        assert calls == [{"season": SEASON}]
+
+    def test_failed_refresh_uses_last_good(self, calls, monkeypatch):
+        good = player_identity.get_roster(SEASON)
+        nba_cache._cache.set(nba_cache.DERIVED, (player_identity._INDEX_NAME, SEASON), good, ttl=-1)
+
+        def down(season):
+            raise ConnectionError("stats.nba.com unreachable")
+        monkeypatch.setattr(player_identity, "_build", down)
+        assert player_identity.get_roster(SEASON) is good
+
+    def test_failed_first_refresh_raises(self, calls, monkeypatch):
+        def down(season):
+            raise ConnectionError("stats.nba.com unreachable")
+        monkeypatch.setattr(player_identity, "_build", down)
+        with pytest.raises(ConnectionError):
+            player_identity.get_roster(SEASON)
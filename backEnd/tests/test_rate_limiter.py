@@ -0,0 +1,87 @@
+"""
+Tests for rate_limiter.py -- token-bucket pacing on a fake clock, the shared
+state file between processes, and host routing of get(). No network.
+Run freely: python -m pytest backEnd/tests/test_rate_limiter.py -v
+"""
+import types
+
+import pytest
+
+import rate_limiter
+from rate_limiter import TokenBucket
+
+
+class Clock:
+    """Stands in for the time module: time() is set by the test, sleep() advances it."""
+
+    def __init__(self, now=1_000.0):
+        self.now = now
+        self.slept = []
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(rate_limiter, "time", types.SimpleNamespace(time=clock.time, sleep=clock.sleep))
+    return clock
+
+
+class TestTokenBucket:
+    """A burst is free, then callers are spaced 1 / rate apart in arrival order."""
+
+    def test_burst_then_paced(self, clock):
+        bucket = TokenBucket("test", rate=2.0, burst=3)
+        waits = [bucket.reserve() for _ in range(6)]
+        assert waits == pytest.approx([0, 0, 0, 0.5, 1.0, 1.5])
+
+    def test_refills_at_rate_up_to_burst(self, clock):
+        bucket = TokenBucket("test", rate=2.0, burst=3)
+        for _ in range(3):
+            bucket.reserve()
+        clock.now += 1.0                                   # two tokens back
+        assert [bucket.reserve() for _ in range(3)] == pytest.approx([0, 0, 0.5])
+        clock.now += 60.0                                  # never more than the burst
+        assert [bucket.reserve() for _ in range(4)] == pytest.approx([0, 0, 0, 0.5])
+
+    def test_acquire_sleeps_for_its_reservation(self, clock):
+        bucket = TokenBucket("test", rate=1.0, burst=1)
+        assert bucket.acquire() == 0
+        assert bucket.acquire() == pytest.approx(1.0)
+        assert clock.slept == pytest.approx([1.0])
+        assert (bucket.acquired, bucket.waited) == (2, pytest.approx(1.0))
+
+    @pytest.mark.skipif(rate_limiter.fcntl is None, reason="shared buckets need flock")
+    def test_state_file_is_shared(self, clock, tmp_path):
+        """Two buckets on one state file (two workers) draw from the same tokens."""
+        worker_a = TokenBucket("shared", rate=1.0, burst=2, state_dir=str(tmp_path))
+        worker_b = TokenBucket("shared", rate=1.0, burst=2, state_dir=str(tmp_path))
+        assert worker_a.reserve() == 0
+        assert worker_b.reserve() == 0
+        assert worker_a.reserve() == pytest.approx(1.0)
+        assert worker_b.reserve() == pytest.approx(2.0)
+
+
+class TestRouting:
+    """Calls are charged to the bucket of their URL's host."""
+
+    def test_unlimited_host_returns_at_once(self):
+        assert rate_limiter.acquire("example.com") == 0.0
+
+    def test_get_takes_a_token_for_its_host(self, monkeypatch):
+        hosts, urls = [], []
+        monkeypatch.setattr(rate_limiter, "acquire", hosts.append)
+        monkeypatch.setattr(rate_limiter.requests, "get", lambda url, **kw: urls.append(url))
+        rate_limiter.get("https://api.balldontlie.io/v1/players?search=x", timeout=5)
+        rate_limiter.get("https://site.api.espn.com/apis/site/v2/sports/basketball/nba/scoreboard")
+        assert hosts == [rate_limiter.BALLDONTLIE, rate_limiter.ESPN]
+        assert len(urls) == 2
+
+    def test_every_limited_host_has_a_bucket(self):
+        assert set(rate_limiter.get_stats()) == set(rate_limiter.LIMITS)
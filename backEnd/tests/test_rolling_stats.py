@@ -0,0 +1,79 @@
+"""
+Tests for rolling_stats.py -- window and EWMA statistics against pandas and
+NumPy computed directly, no API calls.
+Run freely: python -m pytest backEnd/tests/test_rolling_stats.py -v
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+import rolling_stats
+from test_asof_stats import make_log
+
+
+@pytest.fixture
+def values():
+    """(games, 2) stats, newest first."""
+    return np.random.default_rng(5).normal(20, 6, size=(25, 2))
+
+
+class TestWindowTable:
+    """Cumulative-sum windows equal the mean / sample std of the newest rows."""
+
+    def test_against_numpy(self, values):
+        sizes, means, stds = rolling_stats.window_table(values, [1, 5, 10, 25])
+        for size, mean_row, std_row in zip(sizes, means, stds):
+            window = values[:size]
+            assert np.allclose(mean_row, window.mean(axis=0))
+            if size > 1:
+                assert np.allclose(std_row, window.std(axis=0, ddof=1))
+            else:
+                assert np.isnan(std_row).all()
+
+    def test_window_longer_than_log(self, values):
+        sizes, means, _ = rolling_stats.window_table(values[:3], [10])
+        assert sizes[0] == 3
+        assert np.allclose(means[0], values[:3].mean(axis=0))
+
+    def test_empty(self):
+        sizes, means, stds = rolling_stats.window_table(np.empty((0, 2)), [5])
+        assert sizes[0] == 0
+        assert np.isnan(means).all() and np.isnan(stds).all()
+
+
+class TestEwma:
+    """The bias-corrected EWMA equals pandas ewm(halflife) read at the newest game."""
+
+    @pytest.mark.parametrize("halflife", [2.0, 5.0, 12.0])
+    def test_against_pandas(self, values, halflife):
+        means, stds = rolling_stats.ewma(values, halflife)
+        oldest_first = pd.DataFrame(values[::-1])
+        ewm = oldest_first.ewm(halflife=halflife, adjust=True)
+        assert np.allclose(means, ewm.mean().iloc[-1].to_numpy())
+        assert np.allclose(stds, ewm.std(bias=False).iloc[-1].to_numpy())
+
+    def test_single_game_has_no_std(self, values):
+        means, stds = rolling_stats.ewma(values[:1])
+        assert np.allclose(means, values[0])
+        assert np.isnan(stds).all()
+
+
+class TestSummaries:
+    """Views over a game log match slices of it."""
+
+    def test_splits_and_windows(self):
+        log = make_log(games=30)
+        summary = rolling_stats.summarize(log, opponent="BOS")
+        home = log[log["MATCHUP"].str.contains(" vs. ", regex=False)]
+        assert summary["all"]["last5"]["points"] == pytest.approx(log["PTS"].iloc[:5].mean(), abs=1e-3)
+        assert summary["all"]["season"]["games"] == 30
+        assert summary["home"]["season"]["games"] == len(home)
+        assert summary["home"]["last5"]["points"] == pytest.approx(home["PTS"].iloc[:5].mean(), abs=1e-3)
+        assert summary["vsOpponent"]["season"]["games"] == 30
+
+    def test_last_n(self):
+        log = make_log(games=30)
+        games, mean, std = rolling_stats.last_n(log, 10)
+        assert games == 10
+        assert mean == pytest.approx(log["PTS"].iloc[:10].mean())
+        assert std == pytest.approx(log["PTS"].iloc[:10].std(ddof=1))
@@ -0,0 +1,106 @@
+"""
+Tests for singleflight.py -- concurrent callers of one key share a single
+call, its result and its exception; file_lock excludes other holders.
+Run freely: python -m pytest backEnd/tests/test_singleflight.py -v
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import singleflight
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+def run_coalesced(group, fn, callers=4):
+    """Start `callers` threads on one key, release the leader once all have joined."""
+    release = threading.Event()
+    def leader_fn():
+        release.wait(5)
+        return fn()
+    def call():
+        return group.do("key", leader_fn)
+    pool = ThreadPoolExecutor(callers)
+    futures = [pool.submit(call) for _ in range(callers)]
+    wait_for(lambda: group.stats()["coalesced"] == callers - 1)
+    release.set()
+    pool.shutdown(wait=True)
+    return futures
+
+
+class TestGroup:
+    """One call per key in flight; later calls start afresh."""
+
+    def test_concurrent_callers_share_one_call(self):
+        group, calls = singleflight.Group("test"), []
+        futures = run_coalesced(group, lambda: calls.append(1) or "value")
+        assert [f.result() for f in futures] == [("value", True)] * 4
+        assert calls == [1]
+        assert group.stats() == {"calls": 1, "coalesced": 3, "inFlight": 0}
+
+    def test_error_reaches_every_caller(self):
+        group = singleflight.Group("test")
+        def fail():
+            raise ValueError("upstream 500")
+        futures = run_coalesced(group, fail)
+        errors = [f.exception() for f in futures]
+        assert all(isinstance(e, ValueError) and str(e) == "upstream 500" for e in errors)
+        assert group.stats()["inFlight"] == 0
+
+    def test_key_is_released_after_an_error(self):
+        group = singleflight.Group("test")
+        with pytest.raises(ValueError):
+            group.do("key", int, "not a number")
+        assert group.do("key", int, "7") == (7, False)
+
+    def test_nothing_is_cached(self):
+        group, calls = singleflight.Group("test"), []
+        for _ in range(3):
+            group.do("key", calls.append, 1)
+        assert len(calls) == 3
+
+    def test_other_keys_do_not_wait(self):
+        group = singleflight.Group("test")
+        release = threading.Event()
+        with ThreadPoolExecutor(1) as pool:
+            blocked = pool.submit(group.do, "a", release.wait, 5)
+            wait_for(lambda: group.stats()["inFlight"] == 1)
+            assert group.do("b", lambda: "b") == ("b", False)
+            release.set()
+            assert blocked.result() == (True, False)
+
+
+@pytest.mark.skipif(singleflight.fcntl is None, reason="file_lock needs flock")
+class TestFileLock:
+    """A second holder of the same key blocks until the first releases it."""
+
+    def test_excludes_the_same_key(self, tmp_path):
+        order = []
+        held = threading.Event()
+        def first():
+            with singleflight.file_lock("key", str(tmp_path)):
+                held.set()
+                time.sleep(0.05)
+                order.append("first")
+        def second():
+            held.wait(5)
+            with singleflight.file_lock("key", str(tmp_path)):
+                order.append("second")
+        threads = [threading.Thread(target=first), threading.Thread(target=second)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert order == ["first", "second"]
+
+    def test_other_keys_are_independent(self, tmp_path):
+        with singleflight.file_lock("a", str(tmp_path)):
+            with singleflight.file_lock("b", str(tmp_path)):
+                pass
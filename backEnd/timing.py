@@ -0,0 +1,172 @@
+"""
+Per-stage latency timing
+span("stage") times a block; every span that finishes while a request is
+being handled is recorded on that request's collector (held in a
+contextvar, so spans inside fanout tasks land on the request that started
+them) and in a process-wide histogram per stage.
+
+app.py opens a collector per request and, when it finishes, logs one
+structured line – {"event": "timing", "path", "status", "totalMs",
+"stages": {stage: {"ms", "count"}}} – and, with SERVER_TIMING=1, adds a
+Server-Timing header the browser dev tools can display. stats() is the
+histogram summary served by /api/admin/system.
+
+Stages nest (e.g. "pick_base" contains "analyze" contains
+"analyze.fetch"); a breakdown lists each one with its own total, it does not
+subtract children. Spans of fanout tasks overlap, so their sum can exceed
+the request's wall time.
+
+Env vars:
+  SERVER_TIMING   1 to send the Server-Timing response header (default 0)
+"""
+import os
+import json
+import time
+import bisect
+import logging
+import threading
+import contextvars
+from contextlib import contextmanager
+from functools import wraps
+
+logger = logging.getLogger(__name__)
+
+SERVER_TIMING = os.getenv("SERVER_TIMING", "0") == "1"
+
+# histogram bucket upper bounds, in ms (the last bucket is open-ended)
+BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+_collector = contextvars.ContextVar("timing_collector", default=None)
+
+
+class Collector:
+    """The spans of one request, in completion order (thread-safe)."""
+
+    def __init__(self, name):
+        self.name = name
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+        self._stages = {}           # stage -> [total ms, count]
+
+    def add(self, stage, ms):
+        with self._lock:
+            entry = self._stages.setdefault(stage, [0.0, 0])
+            entry[0] += ms
+            entry[1] += 1
+
+    def elapsed_ms(self):
+        return (time.perf_counter() - self.started) * 1000
+
+    def breakdown(self):
+        """{stage: {"ms": total, "count": n}} in the order stages first finished."""
+        with self._lock:
+            return {stage: {"ms": round(ms, 1), "count": n} for stage, (ms, n) in self._stages.items()}
+
+    def server_timing(self):
+        """Server-Timing header value: 'stage;dur=12.3, ..., total;dur=45.6'."""
+        parts = [f"{stage.replace(' ', '_')};dur={entry['ms']}" for stage, entry in self.breakdown().items()]
+        parts.append(f"total;dur={self.elapsed_ms():.1f}")
+        return ", ".join(parts)
+
+
+class _Histogram:
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS_MS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, ms):
+        self.counts[bisect.bisect_left(BUCKETS_MS, ms)] += 1
+        self.count += 1
+        self.total += ms
+        self.max = max(self.max, ms)
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-quantile (the max for the open bucket)."""
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank and n:
+                return BUCKETS_MS[i] if i < len(BUCKETS_MS) else round(self.max, 1)
+        return None
+
+
+_histograms = {}
+_histograms_lock = threading.Lock()
+
+
+def observe(stage, ms):
+    """Record `ms` for `stage`: on the current request (if any) and in its histogram."""
+    collector = _collector.get()
+    if collector is not None:
+        collector.add(stage, ms)
+    with _histograms_lock:
+        histogram = _histograms.get(stage)
+        if histogram is None:
+            histogram = _histograms[stage] = _Histogram()
+        histogram.observe(ms)
+
+
+@contextmanager
+def span(stage):
+    """with span("garch"): ... – times the block, also when it raises."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(stage, (time.perf_counter() - start) * 1000)
+
+
+def timed(stage):
+    """Decorator form of span()."""
+    def decorate(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(stage):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def start(name):
+    """Open a collector for a request; returns the token finish() needs."""
+    collector = Collector(name)
+    return collector, _collector.set(collector)
+
+
+def finish(started, status=None):
+    """Close the collector opened by start(), log its breakdown and return it."""
+    collector, token = started
+    _collector.reset(token)
+    total = collector.elapsed_ms()
+    observe("request", total)
+    logger.info("[timing] " + json.dumps({
+        "event": "timing",
+        "path": collector.name,
+        "status": status,
+        "totalMs": round(total, 1),
+        "stages": collector.breakdown(),
+    }))
+    return collector
+
+
+def stats():
+    """{stage: {"count", "meanMs", "maxMs", "p50Ms", "p95Ms", "p99Ms", "buckets"}} since start-up."""
+    labels = [f"le{b}" for b in BUCKETS_MS] + ["inf"]
+    with _histograms_lock:
+        return {
+            stage: {
+                "count": h.count,
+                "meanMs": round(h.total / h.count, 1) if h.count else None,
+                "maxMs": round(h.max, 1),
+                "p50Ms": h.quantile(0.50),
+                "p95Ms": h.quantile(0.95),
+                "p99Ms": h.quantile(0.99),
+                "buckets": dict(zip(labels, h.counts)),
+            }
+            for stage, h in _histograms.items()
+        }
@@ -1,26 +1,26 @@
 from arch import arch_model
 import pandas as pd
 from datetime import datetime
-from player_analyzer import fetch_more_games
+import nba_cache
+import rolling_stats
+import timing
+from player_analyzer import get_current_season
 
 
+@timing.timed("volatility.series")
 def fetch_point_series(player_data, n_games=50):
     """
-    Build a pandas Series of the last n_games points,
-    combining the last5Games (already in player_data) with
-    older games fetched via fetch_more_games().
+    Build a pandas Series of the points of the last n_games regular-season
+    games (as of the pick's game once it has concluded), oldest first.
     """
-    last5 = player_data.get("last5RegularGames", [])[:5]
-    older = fetch_more_games(player_data["playerId"])[: max(0, n_games - 5)]
-    all_games = last5 + older
-
-    # convert dates to datetime
-    dates = [pd.to_datetime(g["date"]) for g in all_games]
-    pts   = [g["points"] for g in all_games]
-    series = pd.Series(data=pts, index=dates).sort_index()
-    return series
+    season_log = nba_cache.get_player_gamelog(player_data["playerId"], get_current_season(), "Regular Season")
+    before_game = None
+    if player_data.get("gameStatus") == "Concluded" and player_data.get("gameType") != "Playoffs":
+        before_game = player_data.get("gameId")
+    return rolling_stats.points_series(season_log, n_games, before_game=before_game)
 
 
+@timing.timed("volatility.garch")
 def forecast_volatility(point_series):
     """
     Fit a GARCH(1,1) to the day-to-day returns of points